@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+#
+#    Estonian TimeML corpus tools as an importable package. Importing the
+#   package does no work: the corpus loaders and the IAA experiment modules
+#   are imported on the first access to them:
+#
+#       import esttimeml
+#       corpus = esttimeml.corpus.Corpus("corpus")      # imports esttimeml/corpus.py
+#       base = esttimeml.data_import.load_base_segmentation( ... )
+#
+#   The submodules can also be imported directly:
+#
+#       import esttimeml.corpus
+#       from esttimeml.data_import import load_base_segmentation
+#
+#   The scripts of the package (the reader, the IAA experiments and the
+#   maintenance tools) are run with "python -m esttimeml.<script>", via the
+#   console commands (see cli.py), or via the script wrappers in the
+#   directory exp_iaa of the repository (see exp_iaa/readme.txt).
+#
+#    Requires Python's version: 3.7 or newer (module-level __getattr__)
+#
+
+#  Submodules available as attributes of the package
+submodules = [ "reader", "data_import", "corpus", "corpus_index", "corpus_sqlite", \
+               "corpus_columnar", "corpus_shm", "corpus_integrity", "disk_cache", \
+               "document_index", "document_export", "entity_table", "tlink_store", \
+               "dependency_trees", "sol_format_tools", "filtering_utils", \
+               "ia_agreements", "ia_agreements_chance_corrected" ]
+
+__all__ = sorted( submodules )
+
+def __getattr__(name):
+    if name in submodules:
+        import importlib
+        return importlib.import_module( "."+name, __name__ )
+    raise AttributeError("module 'esttimeml' has no attribute '"+name+"'")
+
+def __dir__():
+    return sorted( list(globals().keys()) + __all__ )
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+#
+#    Benchmarks the layer parsers of data_import against the straightforward
+#   line-by-line parsing (a regex per line for skipping the comment, and
+#   membership checks for building the nested dicts), and checks that both
+#   produce exactly the same structures and the same errors on malformed
+#   lines.
+#
+#   Usage:
+#      python  benchmark_loading.py  [corpus_dir]  [repeats]
+#
+#   Developed and tested under Python's version: 3.4.1
+#
+
+import sys, os, re, time, gc
+
+from . import data_import
+
+# =========================================================================
+#    Reference parsers (line-by-line)
+# =========================================================================
+
+def reference_base_segmentation(inputFile):
+    base_segmentation = dict()
+    last_sentenceID = ""
+    f = open(inputFile, mode='r', encoding="utf-8")
+    for line in f:
+        if ( re.match("^#.+$", line) ):
+            continue
+        items = (line.rstrip()).split("\t")
+        if (len(items) != 7):
+            raise Exception(" Unexpected number of items on line: '"+str(line)+"'")
+        file = items[0]
+        if (file not in base_segmentation):
+            base_segmentation[file] = []
+        sentenceID = items[1]
+        if (sentenceID != last_sentenceID):
+            base_segmentation[file].append([])
+        base_segmentation[file][-1].append( data_import.Token(int(sentenceID), int(items[2]), \
+                                            items[3], items[4], int(items[5]), int(items[6])) )
+        last_sentenceID = sentenceID
+    f.close()
+    return base_segmentation
+
+def reference_entity_annotation(inputFile):
+    annotationsByLoc = dict()
+    annotationsByID  = dict()
+    f = open(inputFile, mode='r', encoding="utf-8")
+    for line in f:
+        if ( re.match("^#.+$", line) ):
+            continue
+        items = (line.rstrip()).split("\t")
+        if (len(items) != 6):
+            raise Exception(" Unexpected number of items on line: '"+str(line)+"'")
+        [file, sentenceID, wordID, expression, annotation, entityID] = items
+        if (file not in annotationsByLoc):
+            annotationsByLoc[file] = dict()
+        if (file not in annotationsByID):
+            annotationsByID[file] = dict()
+        locKey = (sentenceID, wordID)
+        if (locKey not in annotationsByLoc[file]):
+            annotationsByLoc[file][locKey] = []
+        annotationsByLoc[file][locKey].append( [entityID, expression, annotation] )
+        if (entityID not in annotationsByID[file]):
+            annotationsByID[file][entityID] = []
+        annotationsByID[file][entityID].append( [sentenceID, wordID, expression, annotation] )
+    f.close()
+    return (annotationsByLoc, annotationsByID)
+
+def reference_dct_annotation(inputFile):
+    DCTsByFile = dict()
+    f = open(inputFile, mode='r', encoding="utf-8")
+    for line in f:
+        if ( re.match("^#.+$", line) ):
+            continue
+        items = (line.rstrip()).split("\t")
+        if (len(items) != 2):
+            raise Exception(" Unexpected number of items on line: '"+str(line)+"'")
+        DCTsByFile[ items[0] ] = items[1]
+    f.close()
+    return DCTsByFile
+
+def reference_relation_annotation(inputFile, toDCT = False):
+    annotationsByID  = dict()
+    f = open(inputFile, mode='r', encoding="utf-8")
+    for line in f:
+        if ( re.match("^#.+$", line) ):
+            continue
+        items = line.split("\t")
+        if (len(items) != (4 if toDCT else 5)):
+            raise Exception(" Unexpected number of items on line: '"+str(line)+"'")
+        file = items[0]
+        if toDCT:
+            annotation = [items[1], items[2], "t0", items[3].rstrip()]
+        else:
+            annotation = [items[1], items[2], items[3], items[4].rstrip()]
+        if (file not in annotationsByID):
+            annotationsByID[file] = dict()
+        for entity in ([ annotation[0] ] if toDCT else [ annotation[0], annotation[2] ]):
+            if (entity not in annotationsByID[file]):
+                annotationsByID[file][entity] = []
+            annotationsByID[file][entity].append( annotation )
+    f.close()
+    return annotationsByID
+
+def reference_relation_to_dct_annotations(inputFile):
+    return reference_relation_annotation(inputFile, toDCT = True)
+
+# =========================================================================
+#    Benchmark
+# =========================================================================
+
+def getBenchmarkTasks(corpusDir):
+    ''' Returns a list of (layerFile, fastParser, referenceParser), covering
+        all layers of all annotators; '''
+    tasks = [ (data_import.baseAnnotationFile, data_import.load_base_segmentation, \
+               reference_base_segmentation), \
+              (data_import.timexAnnotationDCTFile, data_import.load_dct_annotation, \
+               reference_dct_annotation) ]
+    for (layerFile, fast, reference) in \
+           [ (data_import.eventAnnotationFile, data_import.load_entity_annotation, \
+              reference_entity_annotation), \
+             (data_import.timexAnnotationFile, data_import.load_entity_annotation, \
+              reference_entity_annotation), \
+             (data_import.tlinkEventTimexFile, data_import.load_relation_annotation, \
+              reference_relation_annotation), \
+             (data_import.tlinkEventDCTFile, data_import.load_relation_to_dct_annotations, \
+              reference_relation_to_dct_annotations), \
+             (data_import.tlinkMainEventsFile, data_import.load_relation_annotation, \
+              reference_relation_annotation), \
+             (data_import.tlinkSubEventsFile, data_import.load_relation_annotation, \
+              reference_relation_annotation) ]:
+        for annotatorID in data_import.annotatorSuffixes:
+            tasks.append( (layerFile + data_import.annotatorSuffixes[annotatorID], fast, reference) )
+    return [ (os.path.join(corpusDir, layerFile), fast, reference) for (layerFile, fast, reference) in tasks ]
+
+def timeParser(parser, inputFile, repeats):
+    ''' Returns the best time of the parser. The garbage collector is run
+        before and paused during each run, so that collections triggered by
+        the results of the previous runs are not timed; '''
+    best = None
+    for i in range(repeats):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            parser(inputFile)
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def checkErrorBehaviour():
+    ''' Checks that both parsers raise the same error on a line with a wrong
+        number of columns. '''
+    import tempfile
+    malformed = [ (reference_base_segmentation, data_import.load_base_segmentation, \
+                   "#header\nf1\t1\t1\tx\ty\t1\n"), \
+                  (reference_entity_annotation, data_import.load_entity_annotation, \
+                   "#header\nf1\t1\t1\tx\tEVENT\te1\t\tz\n"), \
+                  (reference_dct_annotation, data_import.load_dct_annotation, \
+                   "#header\nf1\n"), \
+                  (reference_relation_annotation, data_import.load_relation_annotation, \
+                   "#header\nf1\te1\tBEFORE\te2\n"), \
+                  (reference_relation_to_dct_annotations, data_import.load_relation_to_dct_annotations, \
+                   "#header\nf1\te1\tBEFORE\t\t\n") ]
+    for (reference, fast, content) in malformed:
+        (handle, path) = tempfile.mkstemp()
+        with os.fdopen(handle, mode='w', encoding="utf-8") as f:
+            f.write(content)
+        errors = []
+        for parser in [ reference, fast ]:
+            try:
+                parser(path)
+                errors.append( None )
+            except Exception as e:
+                errors.append( str(e) )
+        os.unlink(path)
+        if errors[0] is None or errors[0] != errors[1]:
+            raise Exception(" Different error behaviour of "+fast.__name__+": "+str(errors))
+
+def runBenchmark(corpusDir, repeats = 15):
+    totalFast      = 0.0
+    totalReference = 0.0
+    print ("  {:<36} {:>10} {:>10} {:>8}".format("layer", "reference", "fast", "speedup"))
+    for (inputFile, fast, reference) in getBenchmarkTasks(corpusDir):
+        if fast(inputFile) != reference(inputFile):
+            raise Exception(" Parsers give different results on "+inputFile)
+        fastTime      = timeParser(fast, inputFile, repeats)
+        referenceTime = timeParser(reference, inputFile, repeats)
+        totalFast      += fastTime
+        totalReference += referenceTime
+        print ("  {:<36} {:>9.1f}ms {:>8.1f}ms {:>7.2f}x".format(os.path.basename(inputFile), \
+               referenceTime*1000, fastTime*1000, referenceTime/fastTime))
+    print ("  {:<36} {:>9.1f}ms {:>8.1f}ms {:>7.2f}x".format("total", \
+           totalReference*1000, totalFast*1000, totalReference/totalFast))
+    checkErrorBehaviour()
+    print ("  Results and errors of both parsers are identical.")
+
+
+def main(argv):
+    corpusDir = os.path.join("..", "corpus")
+    repeats   = 15
+    if len(argv) > 1:
+        corpusDir = argv[1]
+    if len(argv) > 2:
+        repeats = int(argv[2])
+    runBenchmark(corpusDir, repeats)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+#
+#    Console entry points of the package (see pyproject.toml):
+#
+#       esttimeml-reader  <corpus_dir>  [--jobs N] [--output FILE]
+#                         [--file FILE [--sentences A-B | --entity ID [--neighbourhood [DEPTH]]]]
+#                         [--page N [--page-size S]]  [--format text|jsonl|html]
+#       esttimeml-entity-agreement  <corpus_dir>
+#       esttimeml-combined-agreement  <corpus_dir>  <experimentID>  [--jobs N | --stream] [--repair-syntax] [--no-cache]
+#       esttimeml-experiment-batch  (event|tlink)  <corpus_dir>
+#
+#   Each command runs the main program of the corresponding script.
+#
+#    Requires Python's version: 3.7 or newer (as the package esttimeml)
+#
+
+import sys
+
+def runScript(moduleName, argv):
+    import importlib
+    importlib.import_module( "esttimeml."+moduleName ).main(argv)
+
+def reader():
+    runScript("reader", sys.argv)
+
+def entityAgreement():
+    runScript("find_entity_annotation_agreements", sys.argv)
+
+def combinedAgreement():
+    runScript("find_combined_annotation_agreements", sys.argv)
+
+def experimentBatch():
+    experiments = { "event" : "execute_filtering_IAA_experiments_event", \
+                    "tlink" : "execute_filtering_IAA_experiments_tlink" }
+    if len(sys.argv) > 1 and sys.argv[1] in experiments:
+        runScript(experiments[sys.argv[1]], [ sys.argv[0] ] + sys.argv[2:])
+    else:
+        print(" Please give arguments: (event|tlink) <corpus_dir> ")
+        print(" Example:\n     "+sys.argv[0]+"  event  corpus ")
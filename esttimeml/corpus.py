@@ -0,0 +1,535 @@
+# -*- coding: utf-8 -*-
+#
+#    A lazy handle over a corpus directory: each layer is parsed on the
+#   first access, and then kept in memory, so a script pays only for the
+#   layers it reads:
+#
+#       corpus = Corpus("corpus")
+#       corpus.base                             # base segmentation
+#       corpus.events['a']                      # (byLoc, byID) of annotator A
+#       corpus.timexes['j']                     # (byLoc, byID) of the judge
+#       corpus.dct                              # fileName -> DCT
+#       corpus.tlinks['tlink-main-events']['b'] # fileName -> entityID -> TLINKs
+#       corpus.metadata                         # fileName -> article metadata
+#
+#   Parsed layers (and the dependency trees) are also cached on disk (see
+#   disk_cache.py), keyed by the content hash of the layer file.
+#    A columnar corpus directory (see corpus_columnar.py) can be given in
+#   place of the corpus directory: the layers are then loaded from the
+#   tables (the article metadata is not available in this case).
+#    The handle tracks the state (modification time, size and content hash)
+#   of each loaded layer file. On refresh(), only the layers that have
+#   changed on disk are parsed again, and only the derived structures
+#   depending on these layers (or on the changed documents of these layers)
+#   are invalidated (annotation-in-progress workflow):
+#
+#       (eventsByLoc, eventsByIds, tmxByLoc, tmxByIds) = corpus.getEntityAnnotations()
+#       ...
+#       # an annotator re-exports tlink-main-events.ann-b:
+#       corpus.refresh()    # -> ['tlink-main-events.ann-b']
+#
+#    Developed and tested under Python's version: 3.4.1
+#
+
+import os
+from collections import namedtuple
+from collections.abc import Mapping
+
+from . import data_import
+from . import disk_cache
+from . import corpus_columnar
+
+#  Parsers of the layers (by the layer name without the annotator suffix)
+layerParsers = { \
+    data_import.baseAnnotationFile     : data_import.parse_base_segmentation, \
+    data_import.timexAnnotationDCTFile : data_import.parse_dct_annotation, \
+    data_import.eventAnnotationFile    : data_import.parse_entity_annotation, \
+    data_import.timexAnnotationFile    : data_import.parse_entity_annotation, \
+    data_import.tlinkEventTimexFile    : data_import.parse_relation_annotation, \
+    data_import.tlinkEventDCTFile      : data_import.parse_relation_to_dct_annotations, \
+    data_import.tlinkMainEventsFile    : data_import.parse_relation_annotation, \
+    data_import.tlinkSubEventsFile     : data_import.parse_relation_annotation, \
+    data_import.articleMetadataFile    : data_import.parse_article_metadata, \
+}
+
+entityLayers = [ data_import.eventAnnotationFile, data_import.timexAnnotationFile ]
+tlinkLayers  = [ data_import.tlinkEventTimexFile, data_import.tlinkEventDCTFile, \
+                 data_import.tlinkMainEventsFile, data_import.tlinkSubEventsFile ]
+
+#  Modules whose code the cached layers and dependency trees depend on
+layerCodeModules = ("data_import", "entity_table", "tlink_store")
+treeCodeModules  = layerCodeModules + ("dependency_trees", "sol_format_tools")
+
+#  An EVENT or TIMEX layer of an annotator
+EntityLayer = namedtuple("EntityLayer", ["byLoc", "byID"])
+
+def getLayerFile(layer, annotator):
+    ''' Returns the name of the layer file of the given annotator; '''
+    return layer + data_import.annotatorSuffixes[annotator]
+
+def getLayerParser(layerFile):
+    ''' Returns the parse_* method of data_import suitable for the layer file; '''
+    if layerFile in layerParsers:
+        return layerParsers[layerFile]
+    for annotator in data_import.annotatorSuffixes:
+        suffix = data_import.annotatorSuffixes[annotator]
+        if suffix and layerFile.endswith(suffix) and layerFile[:-len(suffix)] in layerParsers:
+            return layerParsers[ layerFile[:-len(suffix)] ]
+    raise Exception(" Unknown corpus layer: "+str(layerFile))
+
+def parseLayerFile(inputFile):
+    ''' Parses the layer file with the parser suitable for it (also used in
+        the worker processes of data_import.parseLayers()); '''
+    with data_import.openLayer(inputFile) as f:
+        return getLayerParser( os.path.basename(inputFile) )( f )
+
+def getDocumentParts(data):
+    ''' Splits the parsed layer into parts by documents. Returns a dict:
+        fileName -> the part of the layer concerning the file; '''
+    if isinstance(data, tuple):
+        # EVENT or TIMEX layer: (annotationsByLoc, annotationsByID)
+        (byLoc, byID) = data
+        return dict( (file, (byLoc.get(file), byID.get(file))) \
+                     for file in set(byLoc.keys()) | set(byID.keys()) )
+    return data
+
+def findChangedDocuments(oldData, newData):
+    ''' Returns the set of fileNames whose annotations differ in the two
+        versions of the parsed layer; '''
+    oldParts = getDocumentParts(oldData)
+    newParts = getDocumentParts(newData)
+    changed = set()
+    for file in set(oldParts.keys()) | set(newParts.keys()):
+        if oldParts.get(file) != newParts.get(file):
+            changed.add( file )
+    return changed
+
+
+# =========================================================================
+#    Tracking the state of layer files
+# =========================================================================
+
+class TableState(object):
+    ''' A table of a columnar corpus (see corpus_columnar.py), shared by the
+        layers stored in it: the table file is read and hashed (layer by
+        layer, see corpus_columnar.getLayerDigests()) once, and again only
+        if the file has changed on disk; '''
+
+    def __init__(self, columnarDir, tableName):
+        self.columnarDir = columnarDir
+        self.tableName   = tableName
+        self.path    = corpus_columnar.getTableFile(columnarDir, tableName)
+        self.stamp   = None
+        self.columns = None
+        self.digests = None
+
+    def getStamp(self):
+        return data_import.getLayerStamp(self.path)
+
+    def read(self):
+        ''' (Re)reads the table, if its file has changed; '''
+        stamp = self.getStamp()
+        if stamp != self.stamp:
+            self.columns = corpus_columnar.readTable(self.columnarDir, self.tableName)
+            self.digests = corpus_columnar.getLayerDigests(self.tableName, self.columns)
+            self.stamp   = stamp
+        return self
+
+
+class LayerState(object):
+    ''' A parsed layer, along with the state of the layer file at the time of
+        parsing. If the table (a TableState) is given, the layer is loaded
+        from the table of the columnar corpus; the state of the table file
+        is tracked, and the content hash of the rows of the layer; '''
+
+    def __init__(self, path, cache = None, table = None):
+        self.path   = path
+        self.stamp  = None
+        self.digest = None
+        self.data   = None
+        self.cache  = cache
+        self.table  = table
+        self._hashed = None
+
+    def getStamp(self):
+        if self.table is not None:
+            return self.table.getStamp()
+        return data_import.getLayerStamp(self.path)
+
+    def getLayerFile(self):
+        return os.path.basename(self.path)
+
+    def _hash(self, stamp):
+        ''' Returns the content hash of the layer (computed once per stamp).
+            The file is hashed block by block; the table of a columnar
+            corpus is read and hashed only once for all its layers; '''
+        if self._hashed is None or self._hashed[0] != stamp:
+            if self.table is None:
+                digest = data_import.hashLayer(self.path).hexdigest()
+            else:
+                digest = self.table.read().digests.get(self.getLayerFile(), "")
+            self._hashed = (stamp, digest)
+        return self._hashed[1]
+
+    def _parse(self):
+        ''' Parses the layer (from the line stream of the file, so the content
+            is never held in memory as a whole); '''
+        if self.table is None:
+            return parseLayerFile(self.path)
+        table = self.table.read()
+        return corpus_columnar.loadLayer( table.columnarDir, self.getLayerFile(), table.columns )
+
+    def _getKey(self, digest):
+        codeModules = layerCodeModules if self.table is None else \
+                      layerCodeModules + ("corpus_columnar",)
+        return self.cache.makeKey( [ self.getLayerFile(), digest ], \
+                                   disk_cache.getCodeVersion(*codeModules) )
+
+    def _setData(self, stamp, digest, data):
+        changed = findChangedDocuments(self.data, data) if self.data is not None \
+                  else set(getDocumentParts(data).keys())
+        self.stamp  = stamp
+        self.digest = digest
+        self.data   = data
+        return changed
+
+    def loadCached(self):
+        ''' Loads the layer from the disk cache only. Returns False (and
+            leaves the layer as it was) if the layer is not in the cache; '''
+        if self.cache is None:
+            return False
+        stamp  = self.getStamp()
+        digest = self._hash(stamp)
+        missing = object()
+        data = self.cache.get( "layer", self._getKey(digest), missing )
+        if data is missing:
+            return False
+        self._setData(stamp, digest, data)
+        return True
+
+    def store(self, data):
+        ''' Sets the layer parsed elsewhere (e.g. in a worker process), and
+            stores it in the disk cache; '''
+        stamp  = self.getStamp()
+        digest = self._hash(stamp)
+        if self.cache is not None:
+            self.cache.put( "layer", self._getKey(digest), data )
+        return self._setData(stamp, digest, data)
+
+    def load(self):
+        ''' (Re)loads the layer file. Returns the set of documents that were
+            changed, or None if the content of the file is unchanged; '''
+        stamp  = self.getStamp()
+        digest = self._hash(stamp)
+        self.stamp = stamp
+        if digest == self.digest:
+            return None
+        # The layer is parsed only if the content has changed, and is not in
+        # the disk cache
+        if self.cache is not None:
+            data = self.cache.getOrBuild( "layer", self._getKey(digest), self._parse )
+        else:
+            data = self._parse()
+        return self._setData(stamp, digest, data)
+
+    def isModified(self):
+        ''' Checks the modification time and the size of the file; '''
+        return self.getStamp() != self.stamp
+
+
+
+# =========================================================================
+#    Corpus handle
+# =========================================================================
+
+class AnnotatorLayers(Mapping):
+    ''' A read-only dict: annotator -> layer of the annotator; each layer is
+        loaded from the corpus on the first access; '''
+
+    def __init__(self, corpus, layer, wrapper = None):
+        self._corpus  = corpus
+        self._layer   = layer
+        self._wrapper = wrapper
+
+    def __getitem__(self, annotator):
+        if annotator not in data_import.annotatorSuffixes:
+            raise KeyError(annotator)
+        data = self._corpus.getLayer( getLayerFile(self._layer, annotator) )
+        return self._wrapper(*data) if self._wrapper else data
+
+    def __iter__(self):
+        return iter(data_import.annotatorSuffixes)
+
+    def __len__(self):
+        return len(data_import.annotatorSuffixes)
+
+
+class Corpus(object):
+    ''' A handle over a corpus directory (or bundle). Layers are parsed on 
+        the first access, and then kept in memory; refresh() parses again 
+        only the layers that have changed on disk.
+
+        Derived structures (relation indices, per-document agreement counts
+        etc.) are kept in a cache, each along with its dependencies: a
+        dependency is either a layer file name (e.g. 'tlink-main-events.ann-b'),
+        or a pair (layerFile, fileName), if the structure depends only on a
+        single document of the layer. A structure is dropped from the cache
+        when any of its dependencies changes.
+
+        NB! The parsed layers and the derived structures are shared between
+        the callers: if they are modified in place (e.g. by the filtering 
+        methods), the changes are seen by all later callers, and are not 
+        undone by refresh() (unless the layer changes on disk); use 
+        copy.deepcopy() before modifying, if the handle is to be reused;
+
+        If useCache=True, parsed layers and dependency trees are also cached
+        on disk (see disk_cache.getCorpusCache());
+
+        If jobs > 1 (or jobs is None), layers missing from the disk cache are
+        parsed in parallel, when several layers are requested at once (see
+        loadLayers() and data_import.parseLayers());
+
+        Entities of the EVENT, TIMEX and TLINK annotations returned by the
+        corpus have dense per-document integer IDs, the same in all layers
+        (see data_import.assignEntityIDs());
+    '''
+
+    def __init__(self, corpusDir, useCache = True, jobs = 1):
+        if not data_import.isCorpusLocation(corpusDir):
+            raise Exception(" Corpus directory not found: "+str(corpusDir))
+        self.corpusDir = corpusDir
+        self.layers    = dict()
+        self.derived   = dict()
+        self.cache     = disk_cache.getCorpusCache(corpusDir) if useCache else None
+        self.columnar  = corpus_columnar.isColumnarCorpus(corpusDir)
+        self.tables    = dict()
+        self.jobs      = jobs
+        # fileName -> EntityIDTable, shared by all layers of the document
+        self.entityIDs = dict()
+
+    # =======================================================
+    #    Layers
+    # =======================================================
+
+    @property
+    def base(self):
+        ''' Base segmentation (see data_import.load_base_segmentation()); '''
+        return self.getLayer( data_import.baseAnnotationFile )
+
+    @property
+    def events(self):
+        ''' EVENT layers: annotator -> EntityLayer(byLoc, byID); '''
+        return AnnotatorLayers( self, data_import.eventAnnotationFile, EntityLayer )
+
+    @property
+    def timexes(self):
+        ''' TIMEX layers: annotator -> EntityLayer(byLoc, byID); '''
+        return AnnotatorLayers( self, data_import.timexAnnotationFile, EntityLayer )
+
+    @property
+    def dct(self):
+        ''' Document creation times: fileName -> DCT; '''
+        return self.getLayer( data_import.timexAnnotationDCTFile )
+
+    @property
+    def tlinks(self):
+        ''' TLINK layers: layer (e.g. 'tlink-main-events') -> annotator -> 
+            fileName -> entityID -> list of TLINKs; '''
+        return dict( (layer, AnnotatorLayers(self, layer)) for layer in tlinkLayers )
+
+    @property
+    def metadata(self):
+        ''' Article metadata: fileName -> metadata string; '''
+        return self.getLayer( data_import.articleMetadataFile )
+
+    def getLayer(self, layerFile):
+        ''' Returns the parsed layer (in the same format as returned by the
+            corresponding loader in data_import); parses the layer file on
+            the first access; '''
+        if layerFile not in self.layers:
+            state = self._newLayerState(layerFile)
+            state.load()
+            self.layers[layerFile] = state
+        return self.layers[layerFile].data
+
+    def loadLayers(self, layerFiles):
+        ''' Returns the list of parsed layers (see getLayer()). The layers
+            that are neither loaded nor in the disk cache are parsed at the
+            same time, in a pool of jobs worker processes (if jobs > 1; the
+            tables of a columnar corpus are always read in this process); '''
+        states = dict()
+        for layerFile in layerFiles:
+            if layerFile not in self.layers and layerFile not in states:
+                states[layerFile] = self._newLayerState(layerFile)
+        pending = [ state for state in states.values() if not state.loadCached() ]
+        if self.columnar or (self.jobs is not None and self.jobs < 2):
+            for state in pending:
+                state.load()
+        else:
+            results = data_import.parseLayers( [ (parseLayerFile, state.path) for state in pending ], \
+                                               self.jobs )
+            for (state, data) in zip(pending, results):
+                state.store( data )
+        self.layers.update( states )
+        return [ self.layers[layerFile].data for layerFile in layerFiles ]
+
+    def _newLayerState(self, layerFile):
+        getLayerParser(layerFile)
+        return LayerState( os.path.join(self.corpusDir, layerFile), self.cache, \
+                           self.getTable(layerFile) if self.columnar else None )
+
+    def getTable(self, layerFile):
+        ''' Returns the TableState of the columnar table the layer is stored
+            in (shared by all layers of the table); '''
+        tableName = corpus_columnar.getLayerTable(layerFile)
+        if tableName is None:
+            raise Exception(" Layer "+layerFile+" is not stored in the columnar corpus "+\
+                            str(self.corpusDir))
+        if tableName not in self.tables:
+            self.tables[tableName] = TableState(self.corpusDir, tableName)
+        return self.tables[tableName]
+
+    def getLoadedLayers(self):
+        return sorted( self.layers.keys() )
+
+    def refresh(self):
+        ''' Checks all loaded layers for changes: the layers with modified
+            file stamps (size or modification time) are hashed, and the
+            layers with changed content are parsed again. Derived structures
+            depending on the changed layers (or changed documents) are
+            invalidated.
+            Returns the list of layer files that had changed content;
+        '''
+        changedLayers = []
+        for layerFile in sorted( self.layers.keys() ):
+            state = self.layers[layerFile]
+            if not state.isModified():
+                continue
+            changedFiles = state.load()
+            if changedFiles is not None:
+                changedLayers.append( layerFile )
+                self.invalidate( layerFile, changedFiles )
+        return changedLayers
+
+    # =======================================================
+    #    Derived structures
+    # =======================================================
+
+    def getDerived(self, key, dependencies, builder):
+        ''' Returns the derived structure stored under the key; if the
+            structure is missing (or has been invalidated), it is built by
+            calling builder(), and stored along with the dependencies; '''
+        if key not in self.derived:
+            self.derived[key] = ( list(dependencies), builder() )
+        return self.derived[key][1]
+
+    def invalidate(self, layerFile, changedFiles = None):
+        ''' Drops derived structures depending on the layer file. If the set
+            of changedFiles is given, structures depending on other documents
+            of the layer are kept; '''
+        for key in list( self.derived.keys() ):
+            for dependency in self.derived[key][0]:
+                if isinstance(dependency, tuple):
+                    (depLayer, depFile) = dependency
+                    if depLayer == layerFile and \
+                       (changedFiles is None or depFile in changedFiles):
+                        del self.derived[key]
+                        break
+                elif dependency == layerFile:
+                    del self.derived[key]
+                    break
+
+    # =======================================================
+    #    Layers in the formats of data_import
+    # =======================================================
+
+    def getEntityAnnotations(self):
+        ''' Returns EVENT and TIMEX annotations of all annotators, in the
+            same format as data_import.loadAllEntityAnnotations(); '''
+        layerFiles = [ getLayerFile(layer, annotator) for layer in entityLayers \
+                       for annotator in data_import.annotatorSuffixes ]
+        return self.getDerived( "entityAnnotations", layerFiles, \
+            lambda: data_import._collectEntityAnnotations( self.loadLayers(layerFiles), \
+                                                           self.entityIDs ) )
+
+    def getTLINKAnnotations(self):
+        ''' Returns TLINK annotations of all annotators, in the same format
+            as data_import.loadAllTLINKannotations(); '''
+        layerFiles = [ getLayerFile(layer, annotator) for layer in tlinkLayers \
+                       for annotator in data_import.annotatorSuffixes ]
+        return self.getDerived( "tlinkAnnotations", layerFiles, \
+            lambda: data_import._collectTLINKAnnotations( self.loadLayers(layerFiles), \
+                                                          self.entityIDs ) )
+
+    def getRelationList(self, layer, annotator):
+        ''' Returns TLINKs of the layer (e.g. 'tlink-main-events') of the
+            annotator as a list, in the format of
+            data_import.get_relation_annotations_as_list(); '''
+        layerFile = getLayerFile(layer, annotator)
+        return self.getDerived( ("relationList", layerFile), [ layerFile ], \
+            lambda: data_import.get_relation_annotations_as_list( self.getLayer(layerFile) ) )
+
+    def getDependencyTrees(self, repairSyntax = False):
+        ''' Returns dependency trees (with the clause boundary information)
+            of the base segmentation: fileName -> list of trees of the
+            sentences (see dependency_trees.build_dependency_trees()). If 
+            repairSyntax, the trees are built from the repaired sentences (see
+            dependency_trees.repair_dependency_structure()). The trees are
+            also cached on disk, keyed by the content of the base layer;
+            NB! the trees are shared between the callers; '''
+        return self.getDerived( ("dependencyTrees", repairSyntax), [ data_import.baseAnnotationFile ], \
+                                lambda: self._loadDependencyTrees(repairSyntax) )
+
+    def _loadDependencyTrees(self, repairSyntax):
+        from . import dependency_trees
+        base = self.base
+        def build():
+            trees = dict()
+            for file in base:
+                sentences = base[file]
+                if repairSyntax:
+                    sentences = [ dependency_trees.repair_dependency_structure(sentence)[0] \
+                                  for sentence in sentences ]
+                trees[file] = dependency_trees.build_dependency_trees( sentences )
+                dependency_trees.add_clause_info_to_trees( sentences, trees[file] )
+            return trees
+        if self.cache is None:
+            return build()
+        digest = self.layers[ data_import.baseAnnotationFile ].digest
+        key = self.cache.makeKey( [ data_import.baseAnnotationFile, digest, repairSyntax ], \
+                                  disk_cache.getCodeVersion(*treeCodeModules) )
+        return self.cache.getOrBuild( "trees", key, build )
+
+    def iterateDocuments(self, annotators = None):
+        ''' Streams the corpus document by document (see 
+            data_import.iterateDocuments()), without loading whole layers;
+            for a columnar corpus, the documents are taken from the loaded
+            layers; '''
+        if self.columnar:
+            return self._iterateLoadedDocuments(annotators)
+        return data_import.iterateDocuments(self.corpusDir, annotators = annotators)
+
+    def _iterateLoadedDocuments(self, annotators = None):
+        ''' Yields a data_import.DocumentBundle for each file of the base
+            segmentation, built from the (loaded) layers; '''
+        if annotators is None:
+            annotators = list(data_import.annotatorSuffixes.keys())
+        def getPart(layer, file):
+            return { file : layer[file] } if file in layer else dict()
+        base = self.base
+        dct  = self.dct
+        for file in base:
+            bundle = data_import.DocumentBundle(file)
+            bundle.baseAnnotations = getPart(base, file)
+            bundle.DCTsByFile      = getPart(dct, file)
+            for (attribute, layer, parser) in data_import._documentLayers:
+                for annotatorID in annotators:
+                    annotations = self.getLayer( getLayerFile(layer, annotatorID) )
+                    if attribute in ["event", "tmx"]:
+                        (byLoc, byID) = annotations
+                        getattr(bundle, attribute+"AnnotationsByLoc")[annotatorID] = getPart(byLoc, file)
+                        getattr(bundle, attribute+"AnnotationsByIds")[annotatorID] = getPart(byID, file)
+                    else:
+                        getattr(bundle, attribute)[annotatorID] = getPart(annotations, file)
+            bundle.assignEntityIDs( self.entityIDs )
+            yield bundle
@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+#
+#    Columnar (Apache Arrow / Parquet) export and import of the corpus. All
+#   layers of all annotators are written into four typed tables:
+#
+#      base      :  file, sentence, word, token, morph_syntax, syntactic_id,
+#                   syntactic_head_id
+#      dct       :  file, dct
+#      entities  :  layer ('event' or 'timex'), annotator, file, sentence,
+#                   word, expression, annotation, entity_id
+#      tlinks    :  layer (name of the TLINK layer file without the annotator
+#                   suffix), annotator, file, entityA, relation, entityB,
+#                   comment   (entityB of a relation to DCT is 't0')
+#
+#   Rows keep the order of the layer files. Tables are written into a
+#   directory, either as Parquet files (compressed; default), or as Arrow IPC
+#   files (uncompressed, and memory-mapped on reading). Such a directory can
+#   be given to data_import.loadAllAnnotations() and to corpus.Corpus (and to
+#   the scripts) in place of the corpus directory; single layers are loaded
+#   with loadLayer(), and getLayerDigests() gives content hashes of the
+#   layers stored in a table (so a change in one layer of a shared table can
+#   be told apart from the other layers).
+#
+#   Exporting the corpus:
+#      python  corpus_columnar.py  <corpus_dir>  <output_dir>  [parquet|arrow]
+#
+#   Requires the package pyarrow (pip install pyarrow).
+#
+#    Developed and tested under Python's version: 3.4.1
+#
+
+import sys, os, hashlib
+from sys import intern
+
+from . import data_import
+from .entity_table import EntityTable, EntityLocView, EntityIDView
+
+tableNames = [ "base", "dct", "entities", "tlinks" ]
+formatSuffixes = { "parquet" : ".parquet", "arrow" : ".arrow" }
+
+#  Entity layers are stored with the following layer names, and TLINK layers
+#  with the names of the layer files (without annotator suffixes);
+entityLayerNames = [ ("event", data_import.eventAnnotationFile), \
+                     ("timex", data_import.timexAnnotationFile) ]
+tlinkLayerNames  = [ data_import.tlinkEventTimexFile, data_import.tlinkEventDCTFile, \
+                     data_import.tlinkMainEventsFile, data_import.tlinkSubEventsFile ]
+
+def _importPyArrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise Exception(" Columnar export/import requires the package pyarrow (pip install pyarrow)")
+    return pyarrow
+
+def _getSchemas(pa):
+    string = pa.string()
+    label  = pa.dictionary(pa.int32(), pa.string())
+    return { \
+        "base"     : pa.schema([ ("file", label), ("sentence", pa.int32()), ("word", pa.int32()), \
+                                 ("token", label), ("morph_syntax", label), \
+                                 ("syntactic_id", pa.int32()), ("syntactic_head_id", pa.int32()) ]), \
+        "dct"      : pa.schema([ ("file", string), ("dct", string) ]), \
+        "entities" : pa.schema([ ("layer", label), ("annotator", label), ("file", label), \
+                                 ("sentence", pa.int32()), ("word", pa.int32()), \
+                                 ("expression", label), ("annotation", label), \
+                                 ("entity_id", label) ]), \
+        "tlinks"   : pa.schema([ ("layer", label), ("annotator", label), ("file", label), \
+                                 ("entityA", label), ("relation", label), ("entityB", label), \
+                                 ("comment", label) ]) }
+
+def getTableFile(columnarDir, tableName):
+    ''' Returns the path of the table file in the columnar directory (Parquet
+        or Arrow IPC file, whichever exists), or None; '''
+    for suffix in [ formatSuffixes["parquet"], formatSuffixes["arrow"] ]:
+        path = os.path.join(columnarDir, tableName + suffix)
+        if os.path.isfile(path):
+            return path
+    return None
+
+def isColumnarCorpus(path):
+    ''' Checks whether the path is a directory with columnar corpus tables; '''
+    return os.path.isdir(path) and all( getTableFile(path, name) for name in tableNames )
+
+def hashColumnarCorpus(columnarDir):
+    ''' Computes a content hash over the table files; '''
+    digest = hashlib.sha1()
+    for name in tableNames:
+        path = getTableFile(columnarDir, name)
+        digest.update( os.path.basename(path).encode("utf-8") + b"\0" )
+        data_import.hashLayer( path, digest )
+    return digest.hexdigest()
+
+# =========================================================================
+#    Export
+# =========================================================================
+
+def _toInt(value, items):
+    ''' Converts a sentence/word ID into integer, making sure that the
+        original string can be restored exactly; '''
+    if str(int(value)) != value:
+        raise Exception(" Unexpected sentence or word ID "+repr(value)+" on line: "+str(items))
+    return int(value)
+
+def _collectColumns(rows, columnCount):
+    columns = [ [] for i in range(columnCount) ]
+    for row in rows:
+        for i in range(columnCount):
+            columns[i].append( row[i] )
+    return columns
+
+def exportCorpus(corpusDir, outputDir, format = "parquet"):
+    ''' Exports all layers of all annotators of the corpus (directory or
+        bundle) into columnar tables in outputDir. format is either
+        "parquet" or "arrow" (Arrow IPC); '''
+    if format not in formatSuffixes:
+        raise Exception(" Unknown columnar format: "+str(format))
+    pa = _importPyArrow()
+    schemas = _getSchemas(pa)
+    rows = dict()
+    inputFile = os.path.join(corpusDir, data_import.baseAnnotationFile)
+    rows["base"] = \
+        ( [ items[0], _toInt(items[1], items), _toInt(items[2], items), items[3], items[4], \
+            int(items[5]), int(items[6]) ] for items in data_import.iterateLayerItems(inputFile, 7) )
+    inputFile = os.path.join(corpusDir, data_import.timexAnnotationDCTFile)
+    rows["dct"] = data_import.iterateLayerItems(inputFile, 2)
+    entityRows = []
+    tlinkRows  = []
+    for annotator in data_import.annotatorSuffixes:
+        suffix = data_import.annotatorSuffixes[annotator]
+        for (layerName, layerFile) in entityLayerNames:
+            inputFile = os.path.join(corpusDir, layerFile + suffix)
+            entityRows.extend( [ layerName, annotator, items[0], _toInt(items[1], items), \
+                                 _toInt(items[2], items), items[3], items[4], items[5] ] \
+                               for items in data_import.iterateLayerItems(inputFile, 6) )
+        for layerFile in tlinkLayerNames:
+            inputFile = os.path.join(corpusDir, layerFile + suffix)
+            if layerFile == data_import.tlinkEventDCTFile:
+                tlinkRows.extend( [ layerFile, annotator, items[0], items[1], items[2], "t0", items[3] ] \
+                    for items in data_import.iterateLayerItems(inputFile, 4, stripLine = False) )
+            else:
+                tlinkRows.extend( [ layerFile, annotator ] + items \
+                    for items in data_import.iterateLayerItems(inputFile, 5, stripLine = False) )
+    rows["entities"] = entityRows
+    rows["tlinks"]   = tlinkRows
+    if not os.path.isdir(outputDir):
+        os.makedirs(outputDir)
+    for name in tableNames:
+        schema  = schemas[name]
+        columns = _collectColumns(rows[name], len(schema))
+        table = pa.Table.from_arrays( [ pa.array(columns[i], type=schema[i].type) \
+                                        for i in range(len(schema)) ], schema=schema )
+        path = os.path.join(outputDir, name + formatSuffixes[format])
+        # Remove the table in the other format, so it will not be picked up
+        for other in formatSuffixes.values():
+            if os.path.exists(os.path.join(outputDir, name + other)):
+                os.unlink(os.path.join(outputDir, name + other))
+        if format == "parquet":
+            import pyarrow.parquet
+            pyarrow.parquet.write_table(table, path, compression="zstd")
+        else:
+            import pyarrow.feather
+            pyarrow.feather.write_feather(table, path, compression="uncompressed")
+
+# =========================================================================
+#    Import
+# =========================================================================
+
+def readTable(columnarDir, tableName):
+    ''' Reads the table from the columnar directory. Returns a dict: column
+        name -> list of values. Dictionary-encoded columns are decoded via 
+        their (interned) dictionaries, which is much faster than converting
+        them value by value; '''
+    pa = _importPyArrow()
+    path = getTableFile(columnarDir, tableName)
+    if path is None:
+        raise Exception(" Table "+tableName+" not found in "+str(columnarDir))
+    if path.endswith(formatSuffixes["parquet"]):
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(path)
+    else:
+        import pyarrow.feather
+        table = pyarrow.feather.read_table(path, memory_map=True)
+    columns = dict()
+    for name in table.column_names:
+        column = table.column(name).combine_chunks()
+        if pa.types.is_dictionary(column.type):
+            values = [ intern(value) for value in column.dictionary.to_pylist() ]
+            columns[name] = [ values[i] for i in column.indices.to_pylist() ]
+        else:
+            columns[name] = column.to_pylist()
+    return columns
+
+def loadBaseSegmentation(columnarDir, columns = None):
+    ''' Loads the base segmentation, in the format of
+        data_import.load_base_segmentation(). columns can give the table
+        already read by readTable(); '''
+    if columns is None:
+        columns = readTable(columnarDir, "base")
+    base_segmentation = dict()
+    last_file       = None
+    last_sentenceID = None
+    sentences = None
+    Token = data_import.Token
+    for (file, sentenceID, wordID, token, morphSyntactic, syntacticID, syntacticHeadID) in \
+          zip(columns["file"], columns["sentence"], columns["word"], columns["token"], \
+              columns["morph_syntax"], columns["syntactic_id"], columns["syntactic_head_id"]):
+        if (file != last_file):
+            if (file not in base_segmentation):
+                base_segmentation[file] = []
+            sentences = base_segmentation[file]
+            last_file = file
+        if (sentenceID != last_sentenceID):
+            sentences.append([])
+        sentences[-1].append( Token(sentenceID, wordID, token, morphSyntactic, \
+                                    syntacticID, syntacticHeadID) )
+        last_sentenceID = sentenceID
+    return base_segmentation
+
+def loadDCTs(columnarDir, columns = None):
+    ''' Loads DCTs, in the format of data_import.load_dct_annotation(); '''
+    if columns is None:
+        columns = readTable(columnarDir, "dct")
+    return dict( (intern(file), dct) for (file, dct) in zip(columns["file"], columns["dct"]) )
+
+def loadAllEntityAnnotations(columnarDir, entityIDs = None):
+    ''' Loads EVENT and TIMEX annotations of all annotators, in the format of
+        data_import.loadAllEntityAnnotations() (entities are numbered with
+        data_import.assignEntityIDs()); '''
+    layers = _loadEntityLayers(columnarDir)
+    data_import.assignEntityIDs( list(layers["event"][1].values()) + \
+                                 list(layers["timex"][1].values()), entityIDs )
+    return layers["event"][0], layers["event"][1], layers["timex"][0], layers["timex"][1]
+
+def _loadEntityLayers(columnarDir, selected = None, columns = None):
+    ''' Loads the entity layers: layerName -> (byLoc, byIDs), where byLoc and
+        byIDs map annotators to the layers of the annotators. If selected is
+        given (a list of pairs (layerName, annotator)), only the rows of the
+        selected layers are loaded; '''
+    if columns is None:
+        columns = readTable(columnarDir, "entities")
+    layers = dict()
+    for (layerName, layerFile) in entityLayerNames:
+        byLoc = dict()
+        byIDs = dict()
+        for annotator in data_import.annotatorSuffixes:
+            byLoc[annotator] = dict()
+            byIDs[annotator] = dict()
+        layers[layerName] = (byLoc, byIDs)
+    strings = dict()
+    for (layerName, annotator, file, sentenceID, wordID, expression, annotation, entityID) in \
+          zip(columns["layer"], columns["annotator"], columns["file"], columns["sentence"], \
+              columns["word"], columns["expression"], columns["annotation"], columns["entity_id"]):
+        if selected is not None and (layerName, annotator) not in selected:
+            continue
+        annotationsByLoc = layers[layerName][0][annotator]
+        annotationsByID  = layers[layerName][1][annotator]
+        if (file not in annotationsByLoc):
+            table = EntityTable()
+            annotationsByLoc[file] = EntityLocView(table)
+            annotationsByID[file]  = EntityIDView(table)
+        # Sentence/word IDs are restored as (interned) strings
+        if sentenceID not in strings:
+            strings[sentenceID] = intern(str(sentenceID))
+        if wordID not in strings:
+            strings[wordID] = intern(str(wordID))
+        annotationsByLoc[file].table.addRow( strings[sentenceID], strings[wordID], \
+                                             expression, annotation, entityID )
+    return layers
+
+def loadAllTLINKannotations(columnarDir, entityIDs = None):
+    ''' Loads TLINK annotations of all annotators, in the format of
+        data_import.loadAllTLINKannotations() (entities are numbered with
+        data_import.assignEntityIDs()); '''
+    layers = _loadTLINKLayers(columnarDir)
+    links  = tuple( layers[layerFile] for layerFile in tlinkLayerNames )
+    data_import.assignEntityIDs( [ layer[annotator] for layer in links for annotator in layer ], \
+                                 entityIDs )
+    return links
+
+def _loadTLINKLayers(columnarDir, selected = None, columns = None):
+    ''' Loads the TLINK layers: layerFile -> annotator -> layer of the
+        annotator. If selected is given (a list of pairs (layerFile,
+        annotator)), only the rows of the selected layers are loaded; '''
+    if columns is None:
+        columns = readTable(columnarDir, "tlinks")
+    layers = dict()
+    for layerFile in tlinkLayerNames:
+        layers[layerFile] = dict( (annotator, dict()) for annotator in data_import.annotatorSuffixes )
+    for (layerFile, annotator, file, entityA, relation, entityB, comment) in \
+          zip(columns["layer"], columns["annotator"], columns["file"], columns["entityA"], \
+              columns["relation"], columns["entityB"], columns["comment"]):
+        if selected is not None and (layerFile, annotator) not in selected:
+            continue
+        annotationsByID = layers[layerFile][annotator]
+        if (file not in annotationsByID):
+            # Relations to DCT are listed only under the event
+            annotationsByID[file] = data_import.TLINKView( \
+                data_import.TLINKGraph(toDCT = (layerFile == data_import.tlinkEventDCTFile)) )
+        annotationsByID[file].graph.addEdge( entityA, relation, entityB, comment )
+    return layers
+
+def getLayerTable(layerFile):
+    ''' Returns the name of the table the layer file (e.g. "event-annotation.ann-a")
+        is stored in, or None, if the layer is not stored in the tables; '''
+    if layerFile == data_import.baseAnnotationFile:
+        return "base"
+    if layerFile == data_import.timexAnnotationDCTFile:
+        return "dct"
+    for suffix in data_import.annotatorSuffixes.values():
+        if any( layerFile == entityFile + suffix for (layerName, entityFile) in entityLayerNames ):
+            return "entities"
+        if any( layerFile == tlinkFile + suffix for tlinkFile in tlinkLayerNames ):
+            return "tlinks"
+    return None
+
+def getLayerDigests(tableName, columns):
+    ''' Computes content hashes of the layers stored in the table (as read
+        by readTable()): returns a dict layerFile -> hex digest of the rows
+        of the layer. A layer without rows is missing from the dict; '''
+    if tableName in [ "entities", "tlinks" ]:
+        entityFiles = dict(entityLayerNames)
+        layerFiles  = [ entityFiles.get(layer, layer) + data_import.annotatorSuffixes[annotator] \
+                        for (layer, annotator) in zip(columns["layer"], columns["annotator"]) ]
+    else:
+        layerFile  = data_import.baseAnnotationFile if tableName == "base" else \
+                     data_import.timexAnnotationDCTFile
+        layerFiles = [ layerFile ] * len(columns["file"])
+    digests = dict()
+    names = sorted( columns.keys() )
+    for (layerFile, row) in zip(layerFiles, zip(*[ columns[name] for name in names ])):
+        if layerFile not in digests:
+            digests[layerFile] = hashlib.sha1()
+        digests[layerFile].update( ("\t".join( str(value) for value in row )+"\n").encode("utf-8") )
+    return dict( (layerFile, digests[layerFile].hexdigest()) for layerFile in digests )
+
+def loadLayer(columnarDir, layerFile, columns = None):
+    ''' Loads a single layer file (e.g. "event-annotation.ann-a") from the
+        tables, in the format of the corresponding parser of data_import.
+        columns can give the table of the layer already read by readTable(); '''
+    if layerFile == data_import.baseAnnotationFile:
+        return loadBaseSegmentation(columnarDir, columns)
+    if layerFile == data_import.timexAnnotationDCTFile:
+        return loadDCTs(columnarDir, columns)
+    for annotator in data_import.annotatorSuffixes:
+        suffix = data_import.annotatorSuffixes[annotator]
+        for (layerName, entityFile) in entityLayerNames:
+            if layerFile == entityFile + suffix:
+                (byLoc, byIDs) = _loadEntityLayers(columnarDir, [ (layerName, annotator) ], \
+                                                   columns)[layerName]
+                return (byLoc[annotator], byIDs[annotator])
+        for tlinkFile in tlinkLayerNames:
+            if layerFile == tlinkFile + suffix:
+                return _loadTLINKLayers(columnarDir, [ (tlinkFile, annotator) ], \
+                                        columns)[tlinkFile][annotator]
+    raise Exception(" Layer "+layerFile+" is not stored in the columnar corpus "+str(columnarDir))
+
+def loadAllAnnotations(columnarDir):
+    ''' Loads the corpus from the columnar tables, in the format of
+        data_import.loadAllAnnotations(); '''
+    entityIDs = dict()
+    return ( loadBaseSegmentation(columnarDir), loadAllEntityAnnotations(columnarDir, entityIDs), \
+             loadAllTLINKannotations(columnarDir, entityIDs) )
+
+
+def main(argv):
+    if len(argv) > 2 and data_import.isCorpusLocation(argv[1]):
+        exportCorpus(argv[1], argv[2], argv[3] if len(argv) > 3 else "parquet")
+    else:
+        print(" Please give arguments: <corpus_dir> <output_dir> [parquet|arrow]")
+        print(" Example:\n     python  "+argv[0]+"  corpus  corpus-parquet")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
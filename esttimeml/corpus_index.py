@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+#
+#    Random access to the base segmentation layer: the layer file is
+#   memory-mapped, and a persisted byte-offset index (keyed by fileName
+#   and sentence_ID) allows to decode a single document or a single
+#   sentence without reading the rest of the file. The indices are stored
+#   in the on-disk cache of the corpus (see disk_cache.py).
+#    The other layers are accessed in the same way, by a byte-offset index
+#   keyed by fileName (see MappedLayer and MappedCorpus). Layers stored in
+#   a compressed form (or in a corpus bundle) cannot be memory-mapped: 
+#   these are scanned up to the requested document instead.
+#
+#    Developed and tested under Python's version: 3.4.1
+#
+
+import os, io, mmap
+from array import array
+
+from . import data_import
+from . import disk_cache
+
+# =========================================================================
+#    Building and persisting the byte-offset index
+# =========================================================================
+
+def build_base_segmentation_index(inputFile):
+    ''' Scans the base segmentation layer and builds the byte-offset index.
+        Returns a dict, mapping each fileName to a tuple:
+            (sentenceIDs, offsets)
+        where sentenceIDs is the list of sentence_ID-s of the file (in the
+        order of appearance), and offsets is an array of len(sentenceIDs)+1
+        byte offsets: the i-th sentence spans bytes offsets[i]:offsets[i+1];
+    '''
+    documents = dict()
+    lastFile       = None
+    lastSentenceID = None
+    with open(inputFile, mode='rb') as f:
+        position = 0
+        for line in f:
+            start = position
+            position += len(line)
+            # Skip the comment line
+            if line.startswith(b"#") and len(line) > 1 and line[1:2] != b"\n":
+                continue
+            items = line.split(b"\t", 2)
+            if len(items) < 3:
+                raise Exception(" Unexpected number of items on line: '"+str(line)+"'")
+            file       = items[0].decode("utf-8")
+            sentenceID = items[1].decode("utf-8")
+            if file != lastFile:
+                if file in documents:
+                    raise Exception(" Lines of the file "+file+" are not contiguous in "+inputFile)
+                if lastFile is not None:
+                    documents[lastFile][1].append( start )
+                documents[file] = ( [], array('Q') )
+                lastSentenceID = None
+            if sentenceID != lastSentenceID:
+                documents[file][0].append( sentenceID )
+                documents[file][1].append( start )
+            lastFile       = file
+            lastSentenceID = sentenceID
+        if lastFile is not None:
+            documents[lastFile][1].append( position )
+    return documents
+
+
+def build_layer_index(inputFile):
+    ''' Scans the layer file and builds the byte-offset index of its 
+        documents. Returns a dict, mapping each fileName to a tuple 
+        (start, end): the lines of the file span bytes start:end;
+    '''
+    documents = dict()
+    lastFile  = None
+    with open(inputFile, mode='rb') as f:
+        position = 0
+        for line in f:
+            start = position
+            position += len(line)
+            # Skip the comment line
+            if line.startswith(b"#") and len(line) > 1 and line[1:2] != b"\n":
+                continue
+            file = line.split(b"\t", 1)[0].decode("utf-8")
+            if file != lastFile:
+                if file in documents:
+                    raise Exception(" Lines of the file "+file+" are not contiguous in "+inputFile)
+                if lastFile is not None:
+                    documents[lastFile] = (documents[lastFile][0], start)
+                documents[file] = (start, None)
+                lastFile = file
+        if lastFile is not None:
+            documents[lastFile] = (documents[lastFile][0], position)
+    return documents
+
+
+def _getSourceStamp(inputFile):
+    stat = os.stat(inputFile)
+    return (stat.st_size, stat.st_mtime_ns)
+
+#  Content hashes of the layer files hashed by this process: 
+#  path -> (stamp, digest); a file is hashed again only if its stamp 
+#  (the size or the modification time) has changed
+_sourceDigests = dict()
+
+def _getSourceDigest(inputFile):
+    path  = os.path.abspath(inputFile)
+    stamp = _getSourceStamp(inputFile)
+    if path not in _sourceDigests or _sourceDigests[path][0] != stamp:
+        _sourceDigests[path] = (stamp, data_import.hashLayer(inputFile).hexdigest())
+    return _sourceDigests[path][1]
+
+
+def load_base_segmentation_index(inputFile, cache = None):
+    ''' Loads the byte-offset index of the base segmentation layer from the
+        namespace "index" of the cache (by default: the DiskCache returned by
+        disk_cache.getCorpusCache()). The index is keyed by the content hash
+        of the layer file (and the version of the code), so the cache can be
+        shared between machines; if the index is missing, it is rebuilt and
+        stored. '''
+    return _loadIndex(inputFile, cache, build_base_segmentation_index)
+
+
+def load_layer_index(inputFile, cache = None):
+    ''' Loads the byte-offset index of the layer (see build_layer_index()), 
+        in the same way as load_base_segmentation_index(); '''
+    return _loadIndex(inputFile, cache, build_layer_index)
+
+
+def _loadIndex(inputFile, cache, builder):
+    if cache is None:
+        cache = disk_cache.getCorpusCache()
+    # (if the cache is not writable, e.g. next to a read-only corpus, the
+    # index is only used in memory)
+    key = cache.makeKey( [ builder.__name__, _getSourceDigest(inputFile) ], \
+                         disk_cache.getCodeVersion("corpus_index") )
+    return cache.getOrBuild( "index", key, lambda: builder(inputFile) )
+
+# =========================================================================
+#    Memory-mapped base segmentation
+# =========================================================================
+
+class MappedBaseSegmentation(object):
+    ''' Memory-mapped base segmentation layer. Documents and sentences are
+        decoded on demand, and are returned in the same format as in the
+        output of data_import.load_base_segmentation().
+    '''
+
+    def __init__(self, inputFile, cache = None):
+        self.inputFile = inputFile
+        self.index     = load_base_segmentation_index(inputFile, cache)
+        self._file     = open(inputFile, mode='rb')
+        self._map      = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._sentencePositions = dict()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def getFileNames(self):
+        ''' Returns names of all files (in the order of the layer file). '''
+        return list(self.index.keys())
+
+    def __contains__(self, file):
+        return file in self.index
+
+    def getSentenceIDs(self, file):
+        return list(self.index[file][0])
+
+    def getSentenceCount(self, file):
+        return len(self.index[file][0])
+
+    def _decode(self, start, end):
+        text = self._map[start:end].decode("utf-8")
+        return data_import.parse_base_segmentation( io.StringIO(text, newline=None) )
+
+    def getDocument(self, file):
+        ''' Decodes and returns all sentences of the given file. '''
+        if file not in self.index:
+            raise Exception(" Unknown file: "+str(file))
+        offsets = self.index[file][1]
+        return self._decode(offsets[0], offsets[-1])[file]
+
+    def getSentence(self, file, sentenceID):
+        ''' Decodes and returns the sentence with given sentence_ID from the file. '''
+        if file not in self.index:
+            raise Exception(" Unknown file: "+str(file))
+        if file not in self._sentencePositions:
+            sentenceIDs = self.index[file][0]
+            self._sentencePositions[file] = \
+                dict( (sentenceIDs[i], i) for i in range(len(sentenceIDs)) )
+        sentenceID = str(sentenceID)
+        if sentenceID not in self._sentencePositions[file]:
+            raise Exception(" Unknown sentence "+sentenceID+" in the file "+str(file))
+        i = self._sentencePositions[file][sentenceID]
+        offsets = self.index[file][1]
+        return self._decode(offsets[i], offsets[i+1])[file][0]
+
+    def getSentenceLines(self, file, first, last):
+        ''' Returns the (unparsed) lines of the sentences of the file from 
+            the position first to the position last (inclusive); '''
+        if file not in self.index:
+            raise Exception(" Unknown file: "+str(file))
+        offsets = self.index[file][1]
+        text = self._map[offsets[first]:offsets[last+1]].decode("utf-8")
+        return io.StringIO(text, newline=None).readlines()
+
+# =========================================================================
+#    Memory-mapped layers
+# =========================================================================
+
+class MappedLayer(object):
+    ''' Random access to the lines of the documents of a layer: the layer
+        file is memory-mapped, and documents are located by the byte-offset
+        index (see load_layer_index()). A compressed layer (or a layer in a
+        corpus bundle) is scanned up to the requested document instead; '''
+
+    def __init__(self, inputFile, cache = None):
+        self.inputFile = inputFile
+        self.index = None
+        (path, member) = data_import.findLayerSource(inputFile)
+        if member is None and path == inputFile:
+            self.index = load_layer_index(inputFile, cache)
+            self._file = open(inputFile, mode='rb')
+            # (an empty file cannot be mapped)
+            self._map  = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) \
+                         if os.path.getsize(inputFile) > 0 else b""
+
+    def close(self):
+        if self.index is not None:
+            if self._map:
+                self._map.close()
+            self._file.close()
+
+    def getLines(self, file):
+        ''' Returns the (unparsed) lines of the given file, or an empty
+            list, if the layer does not contain the file; '''
+        if self.index is None:
+            # Scan the (sorted) layer up to the file
+            for (layerFile, lines) in data_import.iterateLayerGroups(self.inputFile):
+                if layerFile == file:
+                    return lines
+                if layerFile > file:
+                    break
+            return []
+        if file not in self.index:
+            return []
+        (start, end) = self.index[file]
+        text = self._map[start:end].decode("utf-8")
+        return io.StringIO(text, newline=None).readlines()
+
+
+class MappedCorpus(object):
+    ''' Random access to the documents of a corpus: all layers of the given
+        annotators (by default: the judge) are accessed through byte-offset
+        indices, so that only the lines of the requested document are 
+        decoded:
+
+            with MappedCorpus("corpus") as corpus:
+                bundle = corpus.getDocument( fileName )
+                bundle = corpus.getDocument( fileName, positions = [10, 11, 12] ) # sentences 10..12
+    '''
+
+    def __init__(self, corpusDir, annotators = [ 'j' ]):
+        self.corpusDir  = corpusDir
+        self.annotators = list(annotators)
+        cache = disk_cache.getCorpusCache(corpusDir)
+        baseFile = os.path.join(corpusDir, data_import.baseAnnotationFile)
+        (path, member) = data_import.findLayerSource(baseFile)
+        self.base  = MappedBaseSegmentation(baseFile, cache) if member is None and path == baseFile else None
+        self.baseLayer = MappedLayer(baseFile, cache) if self.base is None else None
+        self.dct    = MappedLayer( os.path.join(corpusDir, data_import.timexAnnotationDCTFile), cache )
+        self.layers = [ (attribute, annotatorID, \
+                         MappedLayer( os.path.join(corpusDir, layerFile + data_import.annotatorSuffixes[annotatorID]), \
+                                      cache )) \
+                        for (attribute, layerFile, parser) in data_import._documentLayers \
+                        for annotatorID in self.annotators ]
+
+    def close(self):
+        for layer in [ self.base, self.baseLayer, self.dct ] + [ item[2] for item in self.layers ]:
+            if layer is not None:
+                layer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def getFileNames(self):
+        ''' Returns names of all files of the base segmentation; '''
+        if self.base is not None:
+            return self.base.getFileNames()
+        return [ file for (file, lines) in data_import.iterateLayerGroups(self.baseLayer.inputFile) ]
+
+    def __contains__(self, file):
+        if self.base is not None:
+            return file in self.base
+        return len(self.baseLayer.getLines(file)) > 0
+
+    def getSentenceCount(self, file):
+        if self.base is not None:
+            return self.base.getSentenceCount(file)
+        return len( self.getSentences(file) )
+
+    def getSentenceIDs(self, file):
+        ''' Returns sentence_ID-s of the file (in the order of the layer); '''
+        if self.base is not None:
+            return self.base.getSentenceIDs(file)
+        return [ str(sentence[0].sentenceID) for sentence in self.getSentences(file) ]
+
+    def getSentences(self, file, positions = None):
+        ''' Returns the sentences of the file (lists of Token-s) at the given
+            positions (by default: all sentences); '''
+        if self.base is not None:
+            if positions is None:
+                return self.base.getDocument(file)
+            lines = []
+            for position in positions:
+                lines.extend( self.base.getSentenceLines(file, position, position) )
+        else:
+            lines = self.baseLayer.getLines(file)
+        sentences = data_import.parse_base_segmentation(lines).get(file, [])
+        if self.base is None and positions is not None:
+            sentences = [ sentences[position] for position in positions ]
+        return sentences
+
+    def getDocument(self, file, positions = None):
+        ''' Returns a DocumentBundle of the file (see data_import.py). If 
+            positions are given, the base segmentation contains only the
+            sentences at these positions (in the given order); '''
+        if file not in self:
+            raise Exception(" Unknown file: "+str(file))
+        layerLines = [ (attribute, annotatorID, layer.getLines(file)) \
+                       for (attribute, annotatorID, layer) in self.layers ]
+        bundle = data_import.parseRawDocument( (file, [], self.dct.getLines(file), layerLines) )
+        bundle.baseAnnotations = { file : self.getSentences(file, positions) }
+        return bundle
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+#
+#    Cross-layer integrity checker of the corpus. Reads each layer once, and
+#   checks (by set joins over the keys collected from the other layers):
+#
+#     *) every EVENT and TIMEX token of every annotator is located on an
+#        existing token (fileName, sentence_ID, word_ID) of the base
+#        segmentation;
+#     *) both endpoints of every TLINK in the four TLINK layers of every
+#        annotator refer to an existing EVENT or TIMEX of the judge (the DCT
+#        endpoint of the event-DCT relations is implicit): the TLINKs of all
+#        the annotators are based on the EVENT and TIMEX annotations
+#        corrected by the judge (see readme.txt in the root of the corpus),
+#        so events missing from the EVENT layer of annotator A, B or C can
+#        still be endpoints of the TLINKs of that annotator;
+#     *) every file of the base segmentation has a DCT and a metadata row;
+#     *) optionally (--syntax), the dependency structure of every sentence
+#        of the base segmentation is valid (no duplicate IDs, self-loops,
+#        orphans, cycles or multiple roots; see dependency_trees.py);
+#
+#   Also reports lines with an unexpected number of items. All problems are
+#   reported at once. A columnar corpus (see corpus_columnar.py) is checked
+#   in the same way, with problems reported by table rows; the metadata is
+#   not stored in the tables, and is not checked.
+#
+#   Usage:
+#      python  corpus_integrity.py  <corpus_dir>  [annotators]  [--syntax]
+#
+#   where annotators restricts the checks to the layers of the given
+#   annotators (e.g. 'j' or 'abc'; by default, all annotators; the EVENT and
+#   TIMEX layers of the judge are always read, as TLINK endpoints are
+#   checked against these). Exits with status 1 if problems were found, so
+#   it can be used for gating the experiment runs (see
+#   execute_filtering_IAA_experiments_*.py).
+#
+#    Developed and tested under Python's version: 3.4.1
+#
+
+import sys, os, time
+
+from . import data_import
+from . import dependency_trees
+from . import corpus_columnar
+
+# =========================================================================
+#    Reading the layers
+# =========================================================================
+
+def iterateLayerLines(inputFile, columnCount, problems, stripLast = False, stripChars = None):
+    ''' Yields pairs (lineNumber, items) for each line of the layer file.
+        Lines are split as in the parsers of data_import (if stripLast=True,
+        only the last item is stripped, as in the TLINK layers); lines with
+        an unexpected number of items are recorded into problems; '''
+    layerName = os.path.basename(inputFile)
+    with data_import.openLayer(inputFile) as f:
+        lineNumber = 0
+        for line in f:
+            lineNumber += 1
+            # Skip the comment line
+            if line[:1] == "#" and data_import.isCommentLine(line):
+                continue
+            if stripLast:
+                items = line.split("\t")
+                items[-1] = items[-1].rstrip()
+            else:
+                items = line.rstrip(stripChars).split("\t")
+            if len(items) != columnCount:
+                problems.append( (layerName, lineNumber, \
+                                  "unexpected number of items ("+str(len(items))+")") )
+                continue
+            yield (layerName, lineNumber, items)
+
+def readColumnarLayers(columnarDir):
+    ''' Reads the tables of the columnar corpus. Returns a dict: layer file
+        -> list of (tableFile, rowNumber, items), where items are the
+        columns of the row in the layout of the layer file, and rowNumber
+        is the number of the row in the table (starting from 1); '''
+    layers = dict()
+    def addRow(layerFile, tableFile, rowNumber, items):
+        if layerFile not in layers:
+            layers[layerFile] = []
+        layers[layerFile].append( (tableFile, rowNumber, items) )
+    entityLayerFiles = dict( corpus_columnar.entityLayerNames )
+    for tableName in corpus_columnar.tableNames:
+        tableFile = os.path.basename( corpus_columnar.getTableFile(columnarDir, tableName) )
+        columns = corpus_columnar.readTable(columnarDir, tableName)
+        if tableName == "base":
+            rows = zip(columns["file"], columns["sentence"], columns["word"], columns["token"], \
+                       columns["morph_syntax"], columns["syntactic_id"], columns["syntactic_head_id"])
+            for (i, (file, sentenceID, wordID, token, morphSyntactic, syntacticID, syntacticHeadID)) in enumerate(rows):
+                addRow(data_import.baseAnnotationFile, tableFile, i+1, \
+                       [ file, str(sentenceID), str(wordID), token, morphSyntactic, \
+                         str(syntacticID), str(syntacticHeadID) ])
+        elif tableName == "dct":
+            for (i, (file, dct)) in enumerate( zip(columns["file"], columns["dct"]) ):
+                addRow(data_import.timexAnnotationDCTFile, tableFile, i+1, [ file, dct ])
+        elif tableName == "entities":
+            rows = zip(columns["layer"], columns["annotator"], columns["file"], columns["sentence"], \
+                       columns["word"], columns["expression"], columns["annotation"], columns["entity_id"])
+            for (i, (layer, annotator, file, sentenceID, wordID, expression, annotation, entityID)) in enumerate(rows):
+                layerFile = entityLayerFiles[layer] + data_import.annotatorSuffixes[annotator]
+                addRow(layerFile, tableFile, i+1, \
+                       [ file, str(sentenceID), str(wordID), expression, annotation, entityID ])
+        else:
+            rows = zip(columns["layer"], columns["annotator"], columns["file"], columns["entityA"], \
+                       columns["relation"], columns["entityB"], columns["comment"])
+            for (i, (layer, annotator, file, entityA, relation, entityB, comment)) in enumerate(rows):
+                layerFile = layer + data_import.annotatorSuffixes[annotator]
+                if layer == data_import.tlinkEventDCTFile:
+                    addRow(layerFile, tableFile, i+1, [ file, entityA, relation, comment ])
+                else:
+                    addRow(layerFile, tableFile, i+1, [ file, entityA, relation, entityB, comment ])
+    return layers
+
+# =========================================================================
+#    Checking
+# =========================================================================
+
+def checkSentenceSyntax(file, sentence, layerName, lineNumber, problems):
+    ''' Records problems of the dependency structure of the sentence (a list
+        of Token-s; lineNumber is the line of its first token); '''
+    for (kind, labels) in dependency_trees.validate_dependency_structure( sentence ):
+        problems.append( (layerName, lineNumber, kind+" in "+file+\
+                          " (s"+str(sentence[0][0])+"): "+", ".join(str(l) for l in labels)) )
+
+def checkCorpusIntegrity(corpusDir, annotators = None, checkSyntax = False):
+    ''' Checks the layers of the corpus in corpusDir (a corpus directory or
+        bundle, or a columnar corpus). Returns a list of problems, each a
+        tuple (layerFile, lineNumber, description), where lineNumber is None
+        for problems concerning a whole file; for a columnar corpus,
+        layerFile is the table file, and lineNumber the row of the table; '''
+    if annotators is None:
+        annotators = sorted( data_import.annotatorSuffixes )
+    columnar = corpus_columnar.isColumnarCorpus(corpusDir)
+    if columnar:
+        columnarLayers = readColumnarLayers(corpusDir)
+        def readLayer(layerFile, columnCount, problems, stripLast = False, stripChars = None):
+            return columnarLayers.get(layerFile, [])
+    else:
+        def readLayer(layerFile, columnCount, problems, stripLast = False, stripChars = None):
+            return iterateLayerLines(os.path.join(corpusDir, layerFile), columnCount, problems, \
+                                     stripLast = stripLast, stripChars = stripChars)
+    problems = []
+    # 1) Base segmentation: all token locations (and the dependency 
+    #    structures of the sentences)
+    baseFiles = dict()
+    locations = set()
+    sentence  = []
+    (sentenceKey, sentenceStart) = (None, None)
+    for (layerName, lineNumber, items) in readLayer(data_import.baseAnnotationFile, 7, problems):
+        locations.add( (items[0], items[1], items[2]) )
+        baseFiles[ items[0] ] = lineNumber
+        if checkSyntax:
+            if sentenceKey != (items[0], items[1]):
+                if sentence:
+                    checkSentenceSyntax(sentenceKey[0], sentence, layerName, sentenceStart, problems)
+                sentence = []
+                (sentenceKey, sentenceStart) = ((items[0], items[1]), lineNumber)
+            try:
+                sentence.append( data_import.Token(int(items[1]), int(items[2]), items[3], items[4], \
+                                                   int(items[5]), int(items[6])) )
+            except ValueError:
+                problems.append( (layerName, lineNumber, "non-numeric ID") )
+    if sentence:
+        checkSentenceSyntax(sentenceKey[0], sentence, layerName, sentenceStart, problems)
+    # 2) EVENT and TIMEX layers: locations must exist; collect entity IDs of
+    #    the judge (the layers of the judge are read even if not checked)
+    judge = "j"
+    entityKeys = set()
+    for layerFile in [ data_import.eventAnnotationFile, data_import.timexAnnotationFile ]:
+        for annotator in sorted( set(annotators) | set([ judge ]) ):
+            layerProblems = problems if annotator in annotators else []
+            for (layerName, lineNumber, items) in \
+                    readLayer(layerFile + data_import.annotatorSuffixes[annotator], 6, layerProblems):
+                (file, sentenceID, wordID, expression, annotation, entityID) = items
+                if (file, sentenceID, wordID) not in locations:
+                    layerProblems.append( (layerName, lineNumber, "entity "+entityID+" of "+file+\
+                                           " is located on a missing token (s"+sentenceID+", w"+wordID+")") )
+                if annotator == judge:
+                    entityKeys.add( (file, entityID) )
+    # 3) TLINK layers: endpoints must be entities of the judge
+    for layerFile in [ data_import.tlinkEventTimexFile, data_import.tlinkEventDCTFile, \
+                       data_import.tlinkMainEventsFile, data_import.tlinkSubEventsFile ]:
+        toDCT = (layerFile == data_import.tlinkEventDCTFile)
+        for annotator in annotators:
+            for (layerName, lineNumber, items) in \
+                    readLayer(layerFile + data_import.annotatorSuffixes[annotator], \
+                              4 if toDCT else 5, problems, stripLast = True):
+                file = items[0]
+                for entityID in ([ items[1] ] if toDCT else [ items[1], items[3] ]):
+                    if (file, entityID) not in entityKeys:
+                        problems.append( (layerName, lineNumber, "relation endpoint "+entityID+\
+                                          " of "+file+" is not an EVENT or TIMEX of the judge") )
+    # 4) Every file must have a DCT and a metadata row (the metadata is not
+    #    stored in columnar corpora)
+    for (layerFile, stripChars, description) in \
+            [ (data_import.timexAnnotationDCTFile, None,   "DCT"), \
+              (data_import.articleMetadataFile,    "\r\n", "metadata row") ]:
+        if columnar and layerFile == data_import.articleMetadataFile:
+            continue
+        files = set( items[0] for (layerName, lineNumber, items) in \
+                     readLayer(layerFile, 2, problems, stripChars = stripChars) )
+        for file in baseFiles:
+            if file not in files:
+                problems.append( (layerFile, None, "file "+file+" has no "+description) )
+    return problems
+
+def formatProblem(problem):
+    (layerFile, lineNumber, description) = problem
+    if lineNumber is None:
+        return " "+layerFile+": "+description
+    return " "+layerFile+":"+str(lineNumber)+": "+description
+
+
+def main(argv):
+    if len(argv) > 1 and data_import.isCorpusLocation(argv[1]):
+        checkSyntax = "--syntax" in argv
+        arguments = [ argument for argument in argv if argument != "--syntax" ]
+        annotators = list(arguments[2]) if len(arguments) > 2 else None
+        start = time.perf_counter()
+        problems = checkCorpusIntegrity(argv[1], annotators = annotators, checkSyntax = checkSyntax)
+        elapsed = time.perf_counter() - start
+        for problem in problems:
+            print( formatProblem(problem) )
+        print(" Found "+str(len(problems))+" problem(s) in {:.2f}s.".format(elapsed))
+        sys.exit(1 if problems else 0)
+    else:
+        print(" Please give arguments: <corpus_dir> [annotators] [--syntax]")
+        print(" Example:\n     python  "+argv[0]+"  corpus  j")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
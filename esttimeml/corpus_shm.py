@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+#
+#    Packed corpus arrays in shared memory. The loaded corpus -- the base
+#   segmentation, the entity tables and the TLINK edge arrays of all the
+#   annotators -- is packed into flat int32 columns (strings are replaced by
+#   indices into a single UTF-8 string table) and published in a single
+#   multiprocessing.shared_memory segment. Worker processes attach to the
+#   segment read-only, and unpack the annotations of one document at a
+#   time, so the corpus is neither copied nor deserialized per worker:
+#
+#       shared = corpus_shm.publishCorpus( baseAnnotations, \
+#                   {'event': eventAnnotationsByLoc, 'timex': tmxAnnotationsByLoc}, \
+#                   {data_import.tlinkMainEventsFile: mainEventLinks} )
+#       executor = ProcessPoolExecutor(jobs, initializer=corpus_shm.attachWorker, \
+#                                      initargs=(shared.descriptor,))
+#       # in a worker:
+#       sentences = corpus_shm.getAttachedCorpus().getSentences( file )
+#       ...
+#       shared.unlink()
+#
+#   Layout of the segment (each array is a CSR-style pair: packed rows of
+#   all documents, and per-document offsets into the rows):
+#
+#       strings, stringOffsets   :  UTF-8 string table
+#       files                    :  file names (indices into the string table)
+#       base.tokens              :  sentenceID, wordID, token, morphSyntactic,
+#                                   syntacticID, syntacticHeadID
+#       base.rows                :  end offsets of sentences in base.tokens
+#       <entity>.<annotator>.rows:  sentenceID, wordID, expression, annotation,
+#                                   entityID  (rows of the EntityTable)
+#       <tlink>.<annotator>.rows :  entityA, relation, entityB, comment
+#                                   (edges of the TLINKGraph)
+#
+#   Each *.rows array has a companion *.docs array (offsets of the documents
+#   in *.rows) and a *.present array (whether the document is present in the
+#   layer at all).
+#    Layers must be packed right after loading: entity rows and TLINK edges
+#   are packed as they were loaded (deletions are not packed).
+#
+#    Requires Python's version: 3.8 or newer (multiprocessing.shared_memory)
+#
+
+import sys
+from array import array
+
+from .data_import import Token
+from .entity_table import EntityIDTable, EntityTable, EntityLocView, EntityIDView
+from .tlink_store import TLINKGraph, TLINKView
+
+# =========================================================================
+#    Packing
+# =========================================================================
+
+class _StringTable(object):
+    def __init__(self):
+        self.index   = dict()
+        self.strings = []
+
+    def get(self, string):
+        i = self.index.get(string)
+        if i is None:
+            i = len(self.strings)
+            self.index[string] = i
+            self.strings.append( string )
+        return i
+
+    def pack(self):
+        encoded = [ s.encode("utf-8") for s in self.strings ]
+        offsets = array('q', [0]) * (len(encoded) + 1)
+        for i in range(len(encoded)):
+            offsets[i + 1] = offsets[i] + len(encoded[i])
+        return array('B', b"".join(encoded)), offsets
+
+
+def _packLayer(arrays, name, files, layer, packRows):
+    ''' Packs rows of all documents of the layer (fileName -> annotations of
+        the document) into the arrays name.rows, name.docs, name.present; '''
+    rows    = array('i')
+    docs    = array('i', [0]) * (len(files) + 1)
+    present = array('B', [0]) * len(files)
+    for i in range(len(files)):
+        if files[i] in layer:
+            present[i] = 1
+            packRows(rows, layer[files[i]])
+        docs[i + 1] = len(rows)
+    arrays[name+".rows"]    = rows
+    arrays[name+".docs"]    = docs
+    arrays[name+".present"] = present
+
+def _packArrays(baseAnnotations, entityLayers, tlinkLayers):
+    ''' Returns (arrays, layers): a dict of packed arrays, and a dict
+        describing the packed layers; '''
+    strings = _StringTable()
+    arrays  = dict()
+    files = set( baseAnnotations )
+    for layers in [ entityLayers, tlinkLayers ]:
+        for name in layers:
+            for annotator in layers[name]:
+                files.update( layers[name][annotator] )
+    files = sorted( files )
+    arrays["files"] = array('i', [ strings.get(file) for file in files ])
+    # Base segmentation
+    tokens = array('i')
+    def packSentences(rows, fileSentences):
+        for sentence in fileSentences:
+            for token in sentence:
+                tokens.extend( (token[0], token[1], strings.get(token[2]), strings.get(token[3]), \
+                                token[4], token[5]) )
+            rows.append( len(tokens) // 6 )
+    _packLayer(arrays, "base", files, baseAnnotations, packSentences)
+    arrays["base.tokens"] = tokens
+    # Entity tables
+    def packEntityRows(rows, view):
+        for row in view.table.rows:
+            rows.extend( [ strings.get(item) for item in row ] )
+    layers = { "entity" : dict(), "tlink" : dict() }
+    for name in entityLayers:
+        layers["entity"][name] = list( entityLayers[name].keys() )
+        for annotator in entityLayers[name]:
+            _packLayer(arrays, name+"."+annotator, files, entityLayers[name][annotator], packEntityRows)
+    # TLINK edge arrays
+    def packEdges(rows, view):
+        for edge in view.graph.edges:
+            rows.extend( [ strings.get(item) for item in edge ] )
+    for name in tlinkLayers:
+        toDCT = None
+        for annotator in tlinkLayers[name]:
+            for file in tlinkLayers[name][annotator]:
+                toDCT = tlinkLayers[name][annotator][file].graph.toDCT
+                break
+            _packLayer(arrays, name+"."+annotator, files, tlinkLayers[name][annotator], packEdges)
+        layers["tlink"][name] = ( list( tlinkLayers[name].keys() ), bool(toDCT) )
+    (arrays["strings"], arrays["stringOffsets"]) = strings.pack()
+    return arrays, layers
+
+def publishCorpus(baseAnnotations, entityLayers, tlinkLayers):
+    ''' Packs the corpus into a new shared memory segment. entityLayers maps
+        names of entity layers (e.g. 'event', 'timex') to annotator ->
+        fileName -> EntityLocView (or EntityIDView), and tlinkLayers maps
+        names of TLINK layers to annotator -> fileName -> TLINKView.
+        Returns a SharedCorpus owning the segment; call its unlink() after
+        the workers are done; '''
+    from multiprocessing import shared_memory
+    (arrays, layers) = _packArrays(baseAnnotations, entityLayers, tlinkLayers)
+    directory = dict()
+    size = 0
+    for name in sorted(arrays):
+        # Align all arrays to 8 bytes
+        size += (-size) % 8
+        directory[name] = (size, arrays[name].typecode, len(arrays[name]))
+        size += len(arrays[name]) * arrays[name].itemsize
+    segment = shared_memory.SharedMemory(create = True, size = max(size, 1))
+    for name in arrays:
+        (offset, typecode, length) = directory[name]
+        data = memoryview(arrays[name]).cast('B')
+        segment.buf[offset : offset + len(data)] = data
+        data.release()
+    return SharedCorpus( (segment.name, directory, layers), segment = segment )
+
+# =========================================================================
+#    Reading
+# =========================================================================
+
+class SharedCorpus(object):
+    ''' Read-only access to the packed corpus in a shared memory segment.
+        Annotations of a document are unpacked on request, in the same
+        shapes as the loaders of data_import return (entities of all the
+        unpacked layers of a document share an EntityIDTable); '''
+
+    def __init__(self, descriptor, segment = None):
+        (segmentName, directory, layers) = descriptor
+        self.descriptor = descriptor
+        self.layers = layers
+        self._owner = segment is not None
+        if segment is None:
+            from multiprocessing import shared_memory
+            if sys.version_info >= (3, 13):
+                segment = shared_memory.SharedMemory(name = segmentName, track = False)
+            else:
+                segment = shared_memory.SharedMemory(name = segmentName)
+        self._segment = segment
+        self._arrays  = dict()
+        self._slices  = []
+        for name in directory:
+            (offset, typecode, length) = directory[name]
+            itemsize = array(typecode).itemsize
+            self._slices.append( segment.buf[offset : offset + length * itemsize] )
+            self._arrays[name] = self._slices[-1].cast(typecode)
+        self._strings = dict()
+        self.files = [ self.getString(i) for i in self._arrays["files"] ]
+        self._fileIndex = dict( (self.files[i], i) for i in range(len(self.files)) )
+        self._entityIDs = dict()
+
+    def getString(self, i):
+        string = self._strings.get(i)
+        if string is None:
+            offsets = self._arrays["stringOffsets"]
+            string = sys.intern( bytes(self._arrays["strings"][offsets[i] : offsets[i+1]]).decode("utf-8") )
+            self._strings[i] = string
+        return string
+
+    def getEntityIDs(self, file):
+        ''' Returns the EntityIDTable of the document; '''
+        if file not in self._entityIDs:
+            self._entityIDs[file] = EntityIDTable()
+        return self._entityIDs[file]
+
+    def _getRows(self, name, file, width):
+        ''' Returns packed rows of the document in the layer (as a list of
+            tuples), or None, if the document is not present in the layer; '''
+        i = self._fileIndex.get(file)
+        if i is None or not self._arrays[name+".present"][i]:
+            return None
+        docs = self._arrays[name+".docs"]
+        rows = self._arrays[name+".rows"][ docs[i] : docs[i+1] ].tolist()
+        return [ tuple(rows[j : j+width]) for j in range(0, len(rows), width) ]
+
+    def getSentences(self, file):
+        ''' Returns the base segmentation of the document: a list of
+            sentences, each a list of Token-s; '''
+        i = self._fileIndex.get(file)
+        if i is None or not self._arrays["base.present"][i]:
+            raise KeyError(file)
+        docs      = self._arrays["base.docs"]
+        ends      = self._arrays["base.rows"]
+        tokens    = self._arrays["base.tokens"]
+        getString = self.getString
+        sentences = []
+        for s in range(docs[i], docs[i+1]):
+            start = ends[s-1] if s > 0 else 0
+            rows = tokens[ start*6 : ends[s]*6 ].tolist()
+            sentences.append( [ Token(rows[j], rows[j+1], getString(rows[j+2]), getString(rows[j+3]), \
+                                      rows[j+4], rows[j+5]) for j in range(0, len(rows), 6) ] )
+        return sentences
+
+    def getEntityLayer(self, name, annotator, file):
+        ''' Returns a tuple (EntityLocView, EntityIDView) of the document, or
+            None, if the annotator has not annotated the document; '''
+        rows = self._getRows(name+"."+annotator, file, 5)
+        if rows is None:
+            return None
+        getString = self.getString
+        table = EntityTable()
+        table.ids = self.getEntityIDs(file)
+        for row in rows:
+            table.addRow( *[ getString(item) for item in row ] )
+        return (EntityLocView(table), EntityIDView(table))
+
+    def getTLINKLayer(self, name, annotator, file):
+        ''' Returns a TLINKView of the document, or None, if the annotator
+            has no TLINKs in the document; '''
+        rows = self._getRows(name+"."+annotator, file, 4)
+        if rows is None:
+            return None
+        getString = self.getString
+        graph = TLINKGraph(toDCT = self.layers["tlink"][name][1])
+        graph.ids = self.getEntityIDs(file)
+        for row in rows:
+            graph.addEdge( *[ getString(item) for item in row ] )
+        return TLINKView(graph)
+
+    def getDocumentEntityLayers(self, name, file):
+        ''' Returns a tuple (annotationsByLoc, annotationsByID) restricted to
+            the document: annotator -> fileName -> view; '''
+        annotationsByLoc = dict()
+        annotationsByID  = dict()
+        for annotator in self.layers["entity"][name]:
+            annotationsByLoc[annotator] = dict()
+            annotationsByID[annotator]  = dict()
+            views = self.getEntityLayer(name, annotator, file)
+            if views is not None:
+                (annotationsByLoc[annotator][file], annotationsByID[annotator][file]) = views
+        return annotationsByLoc, annotationsByID
+
+    def close(self):
+        # All views of the buffer must be released before closing it
+        for name in self._arrays:
+            self._arrays[name].release()
+        for view in self._slices:
+            view.release()
+        self._arrays = dict()
+        self._slices = []
+        self._segment.close()
+
+    def unlink(self):
+        ''' Closes and removes the segment (only by the process which
+            published it); '''
+        self.close()
+        if self._owner:
+            self._segment.unlink()
+
+# =========================================================================
+#    Workers
+# =========================================================================
+
+_attachedCorpus = None
+
+def attachWorker(descriptor):
+    ''' Initializer of worker processes: attaches to the published corpus; '''
+    global _attachedCorpus
+    _attachedCorpus = SharedCorpus(descriptor)
+
+def getAttachedCorpus():
+    if _attachedCorpus is None:
+        raise Exception(" No shared corpus attached to this process.")
+    return _attachedCorpus
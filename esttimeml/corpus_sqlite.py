@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+#
+#    SQLite-backed corpus store: all layers of all annotators are imported
+#   into a single SQLite database file, which can be queried directly (see
+#   the schema below), or accessed through SQLiteCorpus, which serves the
+#   annotations lazily in the same shapes as the loaders of data_import
+#   (annotationsByLoc / annotationsByID dicts).
+#    The database file can be shared by several processes.
+#
+#   Importing the corpus:
+#      python  corpus_sqlite.py  <corpus_dir>  <database_file>
+#
+#   Example of an ad-hoc query (all I_STATE events of the annotator B which
+#   have an AFTER relation to DCT):
+#
+#      store = SQLiteCorpus("corpus.sqlite")
+#      store.query("SELECT DISTINCT e.file, e.entity_id, e.expression "+\
+#                  "FROM entities e JOIN tlinks t ON t.file = e.file AND "+\
+#                  "     t.annotator = e.annotator AND t.entityA = e.entity_id "+\
+#                  "WHERE e.annotator = 'b' AND e.layer = 'event' AND "+\
+#                  "      e.annotation LIKE 'EVENT I_STATE%' AND "+\
+#                  "      t.layer = 'tlink-event-dct' AND t.relation = 'AFTER'")
+#
+#    Developed and tested under Python's version: 3.4.1
+#
+
+import sys, os, sqlite3
+from collections.abc import Mapping
+
+from . import data_import
+
+databaseFormatVersion = 1
+
+#  Entity layers are stored in the table 'entities' with the following
+#  layer names, and TLINK layers in the table 'tlinks' with the names of
+#  the layer files (without annotator suffixes);
+entityLayerNames = [ ("event", data_import.eventAnnotationFile), \
+                     ("timex", data_import.timexAnnotationFile) ]
+tlinkLayerNames  = [ data_import.tlinkEventTimexFile, data_import.tlinkEventDCTFile, \
+                     data_import.tlinkMainEventsFile, data_import.tlinkSubEventsFile ]
+
+schema = '''
+CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE base (seq INTEGER PRIMARY KEY, file TEXT, sentence INTEGER, word INTEGER,
+                   token TEXT, morph_syntax TEXT, syntactic_id INTEGER, syntactic_head_id INTEGER);
+CREATE TABLE dct (file TEXT PRIMARY KEY, dct TEXT);
+CREATE TABLE entities (seq INTEGER PRIMARY KEY, layer TEXT, annotator TEXT, file TEXT,
+                       sentence INTEGER, word INTEGER, expression TEXT, annotation TEXT,
+                       entity_id TEXT);
+CREATE TABLE tlinks (seq INTEGER PRIMARY KEY, layer TEXT, annotator TEXT, file TEXT,
+                     entityA TEXT, relation TEXT, entityB TEXT, comment TEXT);
+'''
+
+indices = '''
+CREATE INDEX base_loc ON base (file, sentence, word);
+CREATE INDEX entities_loc ON entities (file, sentence, word);
+CREATE INDEX entities_id ON entities (file, entity_id);
+CREATE INDEX tlinks_entities ON tlinks (file, entityA, entityB);
+'''
+
+# =========================================================================
+#    Importing the corpus
+# =========================================================================
+
+def _toInt(value, items):
+    ''' Converts a sentence/word ID into integer, making sure that the 
+        original string can be restored exactly; '''
+    if str(int(value)) != value:
+        raise Exception(" Unexpected sentence or word ID "+repr(value)+" on line: "+str(items))
+    return int(value)
+
+def importCorpus(corpusDir, databaseFile):
+    ''' Imports all layers of all annotators from the corpus directory (or
+        bundle) into a new SQLite database file (an existing file is 
+        replaced). The database is written into a temporary file, which is 
+        then renamed, so that other processes never see a partially imported
+        database;
+    '''
+    tmpFile = databaseFile+"."+str(os.getpid())+".tmp"
+    if os.path.exists(tmpFile):
+        os.unlink(tmpFile)
+    connection = sqlite3.connect(tmpFile)
+    try:
+        connection.executescript(schema)
+        # Base segmentation
+        inputFile = os.path.join(corpusDir, data_import.baseAnnotationFile)
+        connection.executemany("INSERT INTO base VALUES (NULL, ?, ?, ?, ?, ?, ?, ?)", \
+            ( (items[0], int(items[1]), int(items[2]), items[3], items[4], int(items[5]), int(items[6])) \
+              for items in data_import.iterateLayerItems(inputFile, 7) ) )
+        # Document creation times
+        inputFile = os.path.join(corpusDir, data_import.timexAnnotationDCTFile)
+        connection.executemany("INSERT OR REPLACE INTO dct VALUES (?, ?)", \
+            ( (items[0], items[1]) for items in data_import.iterateLayerItems(inputFile, 2) ) )
+        for annotator in data_import.annotatorSuffixes:
+            suffix = data_import.annotatorSuffixes[annotator]
+            # EVENT and TIMEX layers
+            for (layerName, layerFile) in entityLayerNames:
+                inputFile = os.path.join(corpusDir, layerFile + suffix)
+                connection.executemany("INSERT INTO entities VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?)", \
+                    ( (layerName, annotator, items[0], _toInt(items[1], items), _toInt(items[2], items), \
+                       items[3], items[4], items[5]) for items in data_import.iterateLayerItems(inputFile, 6) ) )
+            # TLINK layers
+            for layerFile in tlinkLayerNames:
+                inputFile = os.path.join(corpusDir, layerFile + suffix)
+                if layerFile == data_import.tlinkEventDCTFile:
+                    rows = ( (layerFile, annotator, items[0], items[1], items[2], "t0", items[3]) \
+                             for items in data_import.iterateLayerItems(inputFile, 4, stripLine = False) )
+                else:
+                    rows = ( tuple([layerFile, annotator] + items) \
+                             for items in data_import.iterateLayerItems(inputFile, 5, stripLine = False) )
+                connection.executemany("INSERT INTO tlinks VALUES (NULL, ?, ?, ?, ?, ?, ?, ?)", rows)
+        connection.executescript(indices)
+        connection.executemany("INSERT INTO info VALUES (?, ?)", \
+            [ ("format_version", str(databaseFormatVersion)), \
+              ("corpus_hash", data_import.hashCorpusLayers(corpusDir)) ] )
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmpFile, databaseFile)
+
+def openCorpusDatabase(corpusDir, databaseFile):
+    ''' Opens the SQLite store of the corpus; if the database file is 
+        missing, or it was imported from a different version of the corpus
+        (or in a different format), the corpus is imported again;
+        Returns SQLiteCorpus;
+    '''
+    if os.path.exists(databaseFile):
+        store = SQLiteCorpus(databaseFile, checkVersion = False)
+        if store.getInfo("format_version") == str(databaseFormatVersion) and \
+           store.getInfo("corpus_hash") == data_import.hashCorpusLayers(corpusDir):
+            return store
+        store.close()
+    importCorpus(corpusDir, databaseFile)
+    return SQLiteCorpus(databaseFile)
+
+# =========================================================================
+#    Lazy access in the shapes of data_import
+# =========================================================================
+
+class LazyFileMapping(Mapping):
+    ''' A read-only dict: fileName -> annotations of the file. Annotations 
+        of a file are loaded (by calling loader(fileName)) on the first 
+        access, and then cached; '''
+
+    def __init__(self, files, loader):
+        self._files   = files
+        self._fileSet = set(files)
+        self._loader  = loader
+        self._cache   = dict()
+
+    def __getitem__(self, file):
+        if file not in self._cache:
+            if file not in self._fileSet:
+                raise KeyError(file)
+            self._cache[file] = self._loader(file)
+        return self._cache[file]
+
+    def __contains__(self, file):
+        return file in self._fileSet
+
+    def __iter__(self):
+        return iter(self._files)
+
+    def __len__(self):
+        return len(self._files)
+
+
+class SQLiteCorpus(object):
+    ''' Read-only access to the SQLite store of the corpus. Annotations are 
+        served in the same shapes as the loaders of data_import return, but 
+        each document is fetched from the database only when it is accessed
+        (and its entities are numbered with the EntityIDTable of the
+        document, see data_import.assignEntityIDs());
+    '''
+
+    def __init__(self, databaseFile, checkVersion = True):
+        if not os.path.exists(databaseFile):
+            raise Exception(" Corpus database not found: "+str(databaseFile))
+        from urllib.request import pathname2url
+        self.databaseFile = databaseFile
+        self.entityIDs    = dict()
+        self.connection = sqlite3.connect("file:"+pathname2url(os.path.abspath(databaseFile))+"?mode=ro", uri=True)
+        if checkVersion and self.getInfo("format_version") != str(databaseFormatVersion):
+            raise Exception(" Unexpected format of the corpus database: "+str(databaseFile))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def query(self, sql, parameters = ()):
+        ''' Executes an SQL query on the store, and returns the list of rows; '''
+        return self.connection.execute(sql, parameters).fetchall()
+
+    def getInfo(self, key):
+        try:
+            rows = self.query("SELECT value FROM info WHERE key = ?", (key,))
+        except sqlite3.DatabaseError:
+            return None
+        return rows[0][0] if rows else None
+
+    def _getFiles(self, table, layer, annotator = None):
+        ''' Files of the layer, in the order of the layer file; '''
+        if annotator is None:
+            rows = self.query("SELECT file FROM "+table+" GROUP BY file ORDER BY MIN(seq)")
+        else:
+            rows = self.query("SELECT file FROM "+table+" WHERE layer = ? AND annotator = ? "+\
+                              "GROUP BY file ORDER BY MIN(seq)", (layer, annotator))
+        return [ row[0] for row in rows ]
+
+    def getBaseSegmentation(self):
+        ''' Returns a lazy dict in the format of data_import.load_base_segmentation(); '''
+        def loadFile(file):
+            rows = self.query("SELECT file, sentence, word, token, morph_syntax, syntactic_id, "+\
+                              "syntactic_head_id FROM base WHERE file = ? ORDER BY seq", (file,))
+            return data_import.parse_base_segmentation( \
+                       "\t".join( [ str(value) for value in row ] ) for row in rows )[file]
+        return LazyFileMapping( self._getFiles("base", None), loadFile )
+
+    def getDCTs(self):
+        ''' Returns a dict in the format of data_import.load_dct_annotation(); '''
+        return dict( self.query("SELECT file, dct FROM dct") )
+
+    def _getEntityLayer(self, layerName, annotator):
+        parsed = dict()
+        def loadFile(file):
+            if file not in parsed:
+                rows = self.query("SELECT file, sentence, word, expression, annotation, entity_id "+\
+                                  "FROM entities WHERE layer = ? AND annotator = ? AND file = ? "+\
+                                  "ORDER BY seq", (layerName, annotator, file))
+                (byLoc, byID) = data_import.parse_entity_annotation( \
+                                    "\t".join( [ str(value) for value in row ] ) for row in rows )
+                data_import.assignEntityIDs( [ byID ], self.entityIDs )
+                parsed[file] = (byLoc[file], byID[file])
+            return parsed[file]
+        files = self._getFiles("entities", layerName, annotator)
+        return ( LazyFileMapping(files, lambda file: loadFile(file)[0]), \
+                 LazyFileMapping(files, lambda file: loadFile(file)[1]) )
+
+    def getEntityAnnotations(self):
+        ''' Returns EVENT and TIMEX annotations of all annotators, in the same
+            format as data_import.loadAllEntityAnnotations(), but with lazy
+            dicts of files; '''
+        layers = []
+        for (layerName, layerFile) in entityLayerNames:
+            byLoc = dict()
+            byIDs = dict()
+            for annotator in data_import.annotatorSuffixes:
+                (byLoc[annotator], byIDs[annotator]) = self._getEntityLayer(layerName, annotator)
+            layers.extend( [byLoc, byIDs] )
+        return tuple(layers)
+
+    def _getTLINKLayer(self, layerFile, annotator):
+        def loadFile(file):
+            rows = self.query("SELECT file, entityA, relation, entityB, comment FROM tlinks "+\
+                              "WHERE layer = ? AND annotator = ? AND file = ? ORDER BY seq", \
+                              (layerFile, annotator, file))
+            if layerFile == data_import.tlinkEventDCTFile:
+                links = data_import.parse_relation_to_dct_annotations( \
+                            "\t".join( [row[0], row[1], row[2], row[4]] ) for row in rows )
+            else:
+                links = data_import.parse_relation_annotation( "\t".join(row) for row in rows )
+            data_import.assignEntityIDs( [ links ], self.entityIDs )
+            return links[file]
+        return LazyFileMapping( self._getFiles("tlinks", layerFile, annotator), loadFile )
+
+    def getTLINKAnnotations(self):
+        ''' Returns TLINK annotations of all annotators, in the same format as
+            data_import.loadAllTLINKannotations(), but with lazy dicts of 
+            files; '''
+        layers = []
+        for layerFile in tlinkLayerNames:
+            links = dict()
+            for annotator in data_import.annotatorSuffixes:
+                links[annotator] = self._getTLINKLayer(layerFile, annotator)
+            layers.append( links )
+        return tuple(layers)
+
+
+def main(argv):
+    if len(argv) > 2 and data_import.isCorpusLocation(argv[1]):
+        importCorpus(argv[1], argv[2])
+    else:
+        print(" Please give arguments: <corpus_dir> <database_file>")
+        print(" Example:\n     python  "+argv[0]+"  corpus  corpus.sqlite")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,754 @@
+# -*- coding: utf-8 -*- 
+#
+#   Methods for importing data from the corpus files.
+#
+#   Developed and tested under Python's version: 3.4.1
+#
+
+import sys, os, io
+from collections import namedtuple
+from sys import intern
+
+from .entity_table import EntityIDTable, EntityTable, EntityLocView, EntityIDView
+from .tlink_store import TLINKGraph, TLINKView
+
+baseAnnotationFile     = "base-segmentation-morph-syntax"
+eventAnnotationFile    = "event-annotation"
+timexAnnotationFile    = "timex-annotation"
+timexAnnotationDCTFile = "timex-annotation-dct"
+tlinkEventTimexFile    = "tlink-event-timex"
+tlinkEventDCTFile      = "tlink-event-dct"
+tlinkMainEventsFile    = "tlink-main-events"
+tlinkSubEventsFile     = "tlink-subordinate-events"
+articleMetadataFile    = "article-metadata"
+
+annotatorSuffixes      = { "a" : ".ann-a", "b" : ".ann-b", "c" : ".ann-c", "j" : "" }
+
+# =========================================================================
+#    Opening layer files (compressed layers, corpus bundles)
+# =========================================================================
+
+#  Each layer file can also be stored compressed (e.g. "event-annotation.gz"),
+#  and the whole corpus directory can be packed into a single tar or zip
+#  bundle (e.g. "corpus.tar.gz"), which is then used in place of the corpus
+#  directory. Content is decompressed on the fly while reading;
+compressionSuffixes = [ ".gz", ".zst", ".xz" ]
+
+_openBundles = dict()
+
+def isCorpusBundle(path):
+    ''' Checks whether the path is a tar or zip bundle of the corpus; '''
+    import tarfile, zipfile
+    return os.path.isfile(path) and (zipfile.is_zipfile(path) or tarfile.is_tarfile(path))
+
+def isCorpusLocation(path):
+    ''' Checks whether the path is a corpus directory or a corpus bundle; '''
+    return os.path.isdir(path) or isCorpusBundle(path)
+
+def _getBundle(bundlePath):
+    ''' Opens the bundle (once per process), and finds its members. Returns
+        a tuple (archive, members), where members maps base names of the
+        files in the bundle to their full names (to their TarInfo-s, if the
+        bundle is a tar file); '''
+    stat = os.stat(bundlePath)
+    key  = (bundlePath, os.getpid())
+    if key not in _openBundles or _openBundles[key][0] != (stat.st_size, stat.st_mtime_ns):
+        import tarfile, zipfile
+        if zipfile.is_zipfile(bundlePath):
+            archive = zipfile.ZipFile(bundlePath)
+            names = [ info.filename for info in archive.infolist() if not info.is_dir() ]
+        else:
+            archive = tarfile.open(bundlePath, mode='r:*')
+            names = [ info.name for info in archive.getmembers() if info.isfile() ]
+        members = dict()
+        # If a name occurs several times, prefer the least nested file
+        for name in sorted(names, key=lambda n: (n.count("/"), n)):
+            baseName = name.rsplit("/", 1)[-1]
+            if baseName not in members:
+                members[baseName] = name if isinstance(archive, zipfile.ZipFile) \
+                                    else archive.getmember(name)
+        _openBundles[key] = ( (stat.st_size, stat.st_mtime_ns), archive, members )
+    return _openBundles[key][1:]
+
+def findLayerSource(inputFile):
+    ''' Finds where the layer file is stored: either as it is, or in a 
+        compressed form (inputFile + one of the compressionSuffixes), or as
+        a member of a corpus bundle (if the directory part of inputFile is
+        a bundle). Returns a tuple (path, member), where path is the file on
+        disk, and member is the name of the layer in the bundle (or None);
+        If the layer cannot be found, returns (inputFile, None);
+    '''
+    for suffix in [ "" ] + compressionSuffixes:
+        if os.path.isfile(inputFile + suffix):
+            return (inputFile + suffix, None)
+    (bundlePath, layerName) = os.path.split(inputFile)
+    if bundlePath and isCorpusBundle(bundlePath):
+        (archive, members) = _getBundle(bundlePath)
+        for suffix in [ "" ] + compressionSuffixes:
+            if layerName + suffix in members:
+                member = members[layerName + suffix]
+                return (bundlePath, member if isinstance(member, str) else member.name)
+    return (inputFile, None)
+
+def getLayerStamp(inputFile):
+    ''' Returns (size, modification time) of the file on disk where the 
+        layer is stored; '''
+    stat = os.stat( findLayerSource(inputFile)[0] )
+    return (stat.st_size, stat.st_mtime_ns)
+
+def hashLayer(inputFile, digest = None):
+    ''' Feeds the (decompressed) content of the layer file into the digest
+        (by default, a new sha1), reading the file in fixed-size blocks; 
+        returns the digest; '''
+    if digest is None:
+        import hashlib
+        digest = hashlib.sha1()
+    with openLayer(inputFile, binary=True) as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update( block )
+    return digest
+
+def _decompress(name, rawFile):
+    ''' Wraps the binary stream rawFile into a decompressing stream, 
+        according to the suffix of the name; '''
+    if name.endswith(".gz"):
+        import gzip
+        return gzip.GzipFile(fileobj=rawFile, mode='rb')
+    if name.endswith(".xz"):
+        import lzma
+        return lzma.LZMAFile(rawFile, mode='rb')
+    if name.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise Exception(" Reading '"+name+"' requires the package zstandard (pip install zstandard)")
+        return io.BufferedReader( zstandard.ZstdDecompressor().stream_reader(rawFile, closefd=True) )
+    return rawFile
+
+class _TarMemberReader(io.RawIOBase):
+    ''' Reads a member of a tar file (given by its TarInfo) through the 
+        given archive handle; closes the handle on closing; '''
+
+    def __init__(self, archive, info):
+        self.archive = archive
+        self.file    = archive.extractfile(info)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.file.read( len(buffer) )
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self.file.close()
+            self.archive.close()
+        super().close()
+
+def openLayer(inputFile, binary = False):
+    ''' Opens the layer file for reading (see findLayerSource() for possible
+        locations of the file). Compressed content is decompressed while 
+        reading. Returns a text stream (or, if binary=True, a binary stream);
+    '''
+    (path, member) = findLayerSource(inputFile)
+    if member is None:
+        if not binary and path == inputFile:
+            return open(path, mode='r', encoding="utf-8")
+        stream = _decompress(path, open(path, mode='rb'))
+    else:
+        (archive, members) = _getBundle(path)
+        if hasattr(archive, "extractfile"):
+            # Each member is read through an archive handle of its own: 
+            # members of a compressed tar share a single decompressed stream,
+            # and reading several members of it at a time (as the streaming
+            # readers do) would restart the decompression on every backward
+            # seek
+            import tarfile
+            rawFile = io.BufferedReader( _TarMemberReader( tarfile.open(path, mode='r:*'), \
+                                         members[member.rsplit("/", 1)[-1]] ) )
+        else:
+            rawFile = archive.open(member)
+        stream = _decompress(member, rawFile)
+    if binary:
+        return stream
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+# =========================================================================
+#    Loading corpus files
+# =========================================================================
+
+#  A token of the base segmentation. Sentence/word IDs and syntactic IDs
+#  are converted to integers at load time;
+Token = namedtuple("Token", ["sentenceID", "wordID", "token", "morphSyntactic", \
+                             "syntacticID", "syntacticHeadID"])
+
+#  All the parsers below take a list (or any iterable) of lines. The layer
+#  files are streamed through buffered readers (see openLayer()), and the 
+#  header comment is detected without a regex: isCommentLine(line) is 
+#  equivalent to re.match("^#.+$", line);
+
+def isCommentLine(line):
+    return line[:1] == "#" and line[1:2] not in ("", "\n")
+
+def load_base_segmentation(inputFile):
+    with openLayer(inputFile) as f:
+        return parse_base_segmentation(f)
+
+def parse_base_segmentation(lines):
+    ''' Parses lines of the base segmentation layer. Returns a dict, mapping 
+        each fileName to the list of sentences of the file, and each sentence
+        is a list of Token-s; '''
+    base_segmentation = dict()
+    last_file       = None
+    last_sentenceID = ""
+    sentences = None
+    # ID strings are converted to integers once (the IDs repeat a lot), and 
+    # Token-s are built directly from tuples
+    ints = dict()
+    newToken = tuple.__new__
+    for line in lines:
+        # Skip the comment line
+        if line[:1] == "#" and isCommentLine(line):
+            continue
+        items = (line.rstrip()).split("\t")
+        if (len(items) != 7):
+            raise Exception(" Unexpected number of items on line: '"+str(line)+"'")
+        # fileName	sentence_ID	word_ID_in_sentence	token	morphological_and_syntactic_annotations	syntactic_ID	syntactic_ID_of_head
+        (file, sentenceID, wordID, token, morphSyntactic, syntacticID, syntacticHeadID) = items
+        if (file != last_file):
+            file = intern(file)
+            if (file not in base_segmentation):
+                base_segmentation[file] = []
+            sentences = base_segmentation[file]
+            last_file = file
+        if (sentenceID != last_sentenceID):
+            sentences.append([])
+        try:
+            values = (ints[sentenceID], ints[wordID], intern(token), intern(morphSyntactic), \
+                      ints[syntacticID], ints[syntacticHeadID])
+        except KeyError:
+            for value in (sentenceID, wordID, syntacticID, syntacticHeadID):
+                ints[value] = int(value)
+            values = (ints[sentenceID], ints[wordID], intern(token), intern(morphSyntactic), \
+                      ints[syntacticID], ints[syntacticHeadID])
+        sentences[-1].append( newToken(Token, values) )
+        last_sentenceID = sentenceID
+    return base_segmentation
+    
+def load_entity_annotation(inputFile):
+    with openLayer(inputFile) as f:
+        return parse_entity_annotation(f)
+
+def parse_entity_annotation(lines):
+    ''' Parses lines of an EVENT or TIMEX layer. Returns a tuple
+        (annotationsByLoc, annotationsByID), where annotationsByLoc maps
+        each fileName to an EntityLocView and annotationsByID maps it to an
+        EntityIDView; both views of a file share a single EntityTable (see
+        entity_table.py); '''
+    annotationsByLoc = dict()
+    annotationsByID  = dict()
+    last_file = None
+    table = None
+    for line in lines:
+        # Skip the comment line
+        if line[:1] == "#" and isCommentLine(line):
+            continue
+        items = (line.rstrip()).split("\t")
+        # fileName	sentence_ID	word_ID_in_sentence	expression	event_annotation	event_ID
+        # fileName	sentence_ID	word_ID_in_sentence	expression	timex_annotation	timex_ID
+        if (len(items) != 6):
+            raise Exception(" Unexpected number of items on line: '"+str(line)+"'")
+        (file, sentenceID, wordID, expression, annotation, entityID) = items
+        if (file != last_file):
+            file = intern(file)
+            if (file not in annotationsByLoc):
+                table = EntityTable()
+                annotationsByLoc[file] = EntityLocView(table)
+                annotationsByID[file]  = EntityIDView(table)
+            table = annotationsByLoc[file].table
+            last_file = file
+        # Record annotation, indexed by its location in text and by its 
+        # unique ID in text
+        table.addRow( intern(sentenceID), intern(wordID), intern(expression), \
+                      intern(annotation), intern(entityID) )
+    return (annotationsByLoc, annotationsByID)
+
+def load_dct_annotation(inputFile):
+    with openLayer(inputFile) as f:
+        return parse_dct_annotation(f)
+
+def parse_dct_annotation(lines):
+    ''' Parses lines of the DCT layer. Returns a dict: fileName -> DCT; '''
+    DCTsByFile = dict()
+    for line in lines:
+        # Skip the comment line
+        if line[:1] == "#" and isCommentLine(line):
+            continue
+        items = (line.rstrip()).split("\t")
+        # fileName	document_creation_time
+        if (len(items) != 2):
+            raise Exception(" Unexpected number of items on line: '"+str(line)+"'")
+        DCTsByFile[ intern(items[0]) ] = items[1]
+    return DCTsByFile
+
+def load_relation_annotation(inputFile):
+    with openLayer(inputFile) as f:
+        return parse_relation_annotation(f)
+
+def parse_relation_annotation(lines):
+    ''' Parses lines of a TLINK layer. Returns a dict: fileName -> 
+        entityID -> list of relations involving the entity, where each
+        file is a TLINKView of the TLINKGraph of the file (see 
+        tlink_store.py); '''
+    annotationsByID  = dict()
+    last_file = None
+    graph = None
+    for line in lines:
+        # Skip the comment line
+        if line[:1] == "#" and isCommentLine(line):
+            continue
+        items = line.split("\t")
+        # old format: fileName	entityID_A	relation	entityID_B	comment	expression_A	expression_B
+        # new format: fileName	entityID_A	relation	entityID_B	comment	
+        if (len(items) != 5):
+            raise Exception(" Unexpected number of items on line: '"+str(line)+"'")
+        (file, entityA, relation, entityB, comment) = items
+        if (file != last_file):
+            file = intern(file)
+            if (file not in annotationsByID):
+                annotationsByID[file] = TLINKView( TLINKGraph() )
+            graph = annotationsByID[file].graph
+            last_file = file
+        graph.addEdge( intern(entityA), intern(relation), intern(entityB), \
+                       intern(comment.rstrip()) )
+    return annotationsByID
+
+def load_relation_to_dct_annotations(inputFile):
+    with openLayer(inputFile) as f:
+        return parse_relation_to_dct_annotations(f)
+
+def parse_relation_to_dct_annotations(lines):
+    ''' Parses lines of the TLINK event-DCT layer. Returns a dict: 
+        fileName -> entityID -> list of relations of the entity (a 
+        TLINKView, as in parse_relation_annotation); '''
+    annotationsByID  = dict()
+    last_file = None
+    graph = None
+    for line in lines:
+        # Skip the comment line
+        if line[:1] == "#" and isCommentLine(line):
+            continue
+        items = line.split("\t")
+        # old format: fileName	entityID_A	relation_to_DCT	comment	expression_A
+        # new format: fileName	entityID_A	relation_to_DCT	comment
+        if (len(items) != 4):
+            raise Exception(" Unexpected number of items on line: '"+str(line)+"'")
+        (file, entityA, relationToDCT, comment) = items
+        if (file != last_file):
+            file = intern(file)
+            if (file not in annotationsByID):
+                annotationsByID[file] = TLINKView( TLINKGraph(toDCT = True) )
+            graph = annotationsByID[file].graph
+            last_file = file
+        graph.addEdge( intern(entityA), intern(relationToDCT), "t0", \
+                       intern(comment.rstrip()) )
+    return annotationsByID
+
+def load_article_metadata(inputFile):
+    with openLayer(inputFile) as f:
+        return parse_article_metadata(f)
+
+def parse_article_metadata(lines):
+    ''' Parses lines of the article metadata layer. Returns a dict: 
+        fileName -> metadata string (e.g. " | autor: ... | ajalehenumber: ... | "); '''
+    metadataByFile = dict()
+    for line in lines:
+        # Skip the comment line
+        if line[:1] == "#" and isCommentLine(line):
+            continue
+        items = line.rstrip("\r\n").split("\t")
+        # fileName	article metadata
+        if (len(items) != 2):
+            raise Exception(" Unexpected number of items on line: '"+str(line)+"'")
+        metadataByFile[ intern(items[0]) ] = items[1]
+    return metadataByFile
+
+def iterateLayerItems(inputFile, columnCount, stripLine = True):
+    ''' Yields the items of each line of the layer file, in the order of the
+        file. Lines are split and checked in the same way as in the parsers
+        above: if stripLine=False, only the last item is stripped (as in 
+        TLINK layers, where the last item, comment, can be empty); '''
+    with openLayer(inputFile) as f:
+        for line in f:
+            # Skip the comment line
+            if isCommentLine(line):
+                continue
+            items = (line.rstrip() if stripLine else line).split("\t")
+            if (len(items) != columnCount):
+                raise Exception(" Unexpected number of items on line: '"+str(line)+"'")
+            if not stripLine:
+                items[-1] = items[-1].rstrip()
+            yield items
+
+
+# =========================================================================
+#    Integer entity IDs
+# =========================================================================
+
+def assignEntityIDs(layers, entityIDs = None):
+    ''' Gives the entities of the loaded layers dense per-document integer
+        IDs. Each layer is a dict fileName -> view of an EntityTable or of a
+        TLINKGraph (e.g. eventAnnotationsByIds['a'], or mainEventLinks['j']);
+        all layers of a document are renumbered with the same EntityIDTable,
+        so the same entity has the same integer ID in all layers of all the
+        annotators. entityIDs (fileName -> EntityIDTable) holds the tables
+        of the documents, and is extended with the new documents;
+        Returns entityIDs;
+    '''
+    if entityIDs is None:
+        entityIDs = dict()
+    for layer in layers:
+        for file in layer:
+            if file not in entityIDs:
+                entityIDs[file] = EntityIDTable()
+            view = layer[file]
+            store = view.graph if isinstance(view, TLINKView) else view.table
+            store.setEntityIDs( entityIDs[file] )
+    return entityIDs
+
+
+# =========================================================================
+#    Restructuring TLINK annotations
+# =========================================================================
+
+def get_relation_annotations_as_list(annotationsByID):
+    annotationsList = []
+    for file in annotationsByID:
+        for annotation in annotationsByID[file].graph.getRelationsByEntities():
+            annotationsList.append( [file] + annotation )
+    return annotationsList
+
+# =========================================================================
+#    Loading all annotations at once
+# =========================================================================
+
+def parseLayers(tasks, jobs = 1):
+    ''' Parses corpus layers given as a list of tasks (loaderFunction, inputFile), 
+        and returns the list of parsing results (in the same order as tasks).
+        If jobs > 1, layers are parsed at the same time in a pool of jobs 
+        worker processes; if jobs is None, the pool uses all available CPUs;
+        Otherwise, layers are parsed one after another;
+    '''
+    if (jobs is not None and jobs < 2) or len(tasks) < 2:
+        return [ loader(inputFile) for (loader, inputFile) in tasks ]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [ executor.submit(loader, inputFile) for (loader, inputFile) in tasks ]
+        return [ future.result() for future in futures ]
+
+def _getEntityLayerTasks(corpusDir):
+    tasks = []
+    for layerFile in [ eventAnnotationFile, timexAnnotationFile ]:
+        for annotatorID in annotatorSuffixes:
+            suffix = annotatorSuffixes[annotatorID]
+            tasks.append( (load_entity_annotation, os.path.join(corpusDir, layerFile + suffix)) )
+    return tasks
+
+def _collectEntityAnnotations(results, entityIDs = None):
+    eventAnnotationsByLoc = dict()
+    eventAnnotationsByIds = dict()
+    tmxAnnotationsByLoc   = dict()
+    tmxAnnotationsByIds   = dict()
+    i = 0
+    for (annotationsByLoc, annotationsByIds) in [ (eventAnnotationsByLoc, eventAnnotationsByIds), \
+                                                  (tmxAnnotationsByLoc, tmxAnnotationsByIds) ]:
+        for annotatorID in annotatorSuffixes:
+            (byLoc, byID) = results[i]
+            annotationsByLoc[annotatorID] = byLoc
+            annotationsByIds[annotatorID] = byID
+            i += 1
+    assignEntityIDs( [ byID for (byLoc, byID) in results ], entityIDs )
+    return eventAnnotationsByLoc, eventAnnotationsByIds, \
+           tmxAnnotationsByLoc, tmxAnnotationsByIds
+
+def _getTLINKLayerTasks(corpusDir):
+    tasks = []
+    for (layerFile, loader) in [ (tlinkEventTimexFile, load_relation_annotation), \
+                                 (tlinkEventDCTFile,   load_relation_to_dct_annotations), \
+                                 (tlinkMainEventsFile, load_relation_annotation), \
+                                 (tlinkSubEventsFile,  load_relation_annotation) ]:
+        for annotatorID in annotatorSuffixes:
+            suffix = annotatorSuffixes[annotatorID]
+            tasks.append( (loader, os.path.join(corpusDir, layerFile + suffix)) )
+    return tasks
+
+def _collectTLINKAnnotations(results, entityIDs = None):
+    eventTimexLinks = dict()
+    eventDCTLinks   = dict()
+    mainEventLinks  = dict()
+    subEventLinks   = dict()
+    i = 0
+    for links in [ eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks ]:
+        for annotatorID in annotatorSuffixes:
+            links[ annotatorID ] = results[i]
+            i += 1
+    assignEntityIDs( results, entityIDs )
+    return eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks
+
+def loadAllEntityAnnotations(corpusDir, jobs = 1, entityIDs = None):
+    ''' Loads EVENT and TIMEX annotations of all annotators (annotators A, B, C 
+        and the judge J).
+        If jobs > 1 (or jobs is None), layers are parsed in parallel (see 
+        parseLayers() for details);
+        Entities get dense per-document integer IDs (see assignEntityIDs();
+        pass the same entityIDs to loadAllTLINKannotations() to number the
+        TLINKs in the same way);
+        corpusDir can also be a directory of columnar tables (see 
+        corpus_columnar.py);
+    '''
+    from . import corpus_columnar
+    if corpus_columnar.isColumnarCorpus(corpusDir):
+        return corpus_columnar.loadAllEntityAnnotations(corpusDir, entityIDs)
+    results = parseLayers( _getEntityLayerTasks(corpusDir), jobs )
+    return _collectEntityAnnotations(results, entityIDs)
+
+def loadAllTLINKannotations(corpusDir, jobs = 1, entityIDs = None):
+    ''' Loads TLINK annotations of all annotators (annotators A, B, C and 
+        the judge J).
+        If jobs > 1 (or jobs is None), layers are parsed in parallel (see 
+        parseLayers() for details);
+        Entities get dense per-document integer IDs, as in 
+        loadAllEntityAnnotations();
+        corpusDir can also be a directory of columnar tables (see 
+        corpus_columnar.py);
+    '''
+    from . import corpus_columnar
+    if corpus_columnar.isColumnarCorpus(corpusDir):
+        return corpus_columnar.loadAllTLINKannotations(corpusDir, entityIDs)
+    results = parseLayers( _getTLINKLayerTasks(corpusDir), jobs )
+    return _collectTLINKAnnotations(results, entityIDs)
+
+
+# =========================================================================
+#    Streaming the corpus document by document
+# =========================================================================
+
+class DocumentBundle(object):
+    ''' All annotations of a single document (file). The annotation dicts have
+        the same structure as the ones returned by the loaders (e.g. 
+        eventAnnotationsByLoc[annotator][file]), but they contain only the 
+        given file. If an annotator has not annotated the file, the file is 
+        missing from the annotator's dict, just like in the loaders' output;
+    '''
+
+    def __init__(self, file):
+        self.file = file
+        self.baseAnnotations       = dict()
+        self.DCTsByFile            = dict()
+        self.eventAnnotationsByLoc = dict()
+        self.eventAnnotationsByIds = dict()
+        self.tmxAnnotationsByLoc   = dict()
+        self.tmxAnnotationsByIds   = dict()
+        self.eventTimexLinks = dict()
+        self.eventDCTLinks   = dict()
+        self.mainEventLinks  = dict()
+        self.subEventLinks   = dict()
+
+    def getEntityAnnotations(self):
+        return self.eventAnnotationsByLoc, self.eventAnnotationsByIds, \
+               self.tmxAnnotationsByLoc, self.tmxAnnotationsByIds
+
+    def getTLINKAnnotations(self):
+        return self.eventTimexLinks, self.eventDCTLinks, \
+               self.mainEventLinks, self.subEventLinks
+
+    def assignEntityIDs(self, entityIDs = None):
+        ''' Gives the entities of all layers of the document dense integer
+            IDs (see assignEntityIDs()); '''
+        layers = []
+        for annotations in [ self.eventAnnotationsByIds, self.tmxAnnotationsByIds, \
+                             self.eventTimexLinks, self.eventDCTLinks, \
+                             self.mainEventLinks, self.subEventLinks ]:
+            layers.extend( annotations.values() )
+        return assignEntityIDs( layers, entityIDs )
+
+
+def iterateLayerGroups(inputFile):
+    ''' Reads the layer file line by line, and yields pairs (file, lines), 
+        where lines are the consecutive lines of the file; '''
+    with openLayer(inputFile) as f:
+        currentFile = None
+        lines = []
+        for line in f:
+            # Skip the comment line
+            if line[:1] == "#" and isCommentLine(line):
+                continue
+            file = line.split("\t", 1)[0]
+            if file != currentFile:
+                if currentFile is not None:
+                    yield (currentFile, lines)
+                currentFile = file
+                lines = []
+            lines.append(line)
+        if currentFile is not None:
+            yield (currentFile, lines)
+
+
+class _LayerCursor(object):
+    ''' Walks over the file groups of a layer sorted by fileName. '''
+
+    def __init__(self, inputFile, parser):
+        self.inputFile = inputFile
+        self.parser    = parser
+        self.groups    = iterateLayerGroups(inputFile)
+        self.current   = next(self.groups, None)
+
+    def take(self, file):
+        ''' Parses and returns annotations of the given file; If the layer 
+            does not contain the file, returns the parsing result of an empty 
+            layer; '''
+        return self.parser( self.takeLines(file) )
+
+    def takeLines(self, file):
+        ''' Returns the (unparsed) lines of the given file; If the layer does
+            not contain the file, returns an empty list; '''
+        if self.current is not None and self.current[0] < file:
+            raise Exception(" Unexpected file "+self.current[0]+" in "+self.inputFile+\
+                            ": missing from the base segmentation or files are not sorted")
+        if self.current is None or self.current[0] != file:
+            return []
+        lines = self.current[1]
+        self.current = next(self.groups, None)
+        if self.current is not None and self.current[0] <= file:
+            raise Exception(" Files are not sorted in "+self.inputFile+": "+\
+                            self.current[0]+" after "+file)
+        return lines
+
+    def close(self):
+        if self.current is not None:
+            raise Exception(" Unexpected file "+self.current[0]+" in "+self.inputFile+\
+                            ": missing from the base segmentation or files are not sorted")
+        self.groups.close()
+
+
+#  (bundle attribute, layer file, parser) of the annotator layers of a 
+#  DocumentBundle
+_documentLayers = [ ("event",           eventAnnotationFile, parse_entity_annotation), \
+                    ("tmx",             timexAnnotationFile, parse_entity_annotation), \
+                    ("eventTimexLinks", tlinkEventTimexFile, parse_relation_annotation), \
+                    ("eventDCTLinks",   tlinkEventDCTFile,   parse_relation_to_dct_annotations), \
+                    ("mainEventLinks",  tlinkMainEventsFile, parse_relation_annotation), \
+                    ("subEventLinks",   tlinkSubEventsFile,  parse_relation_annotation) ]
+
+def iterateDocuments(corpusDir, annotators = None):
+    ''' Walks the base segmentation, EVENT, TIMEX, DCT and TLINK layers of 
+        given annotators (by default: annotators A, B, C and the judge J) in 
+        lockstep, and yields a DocumentBundle for each file of the base 
+        segmentation (in the order of the base segmentation layer).
+        Only annotations of a single document are kept in memory at a time.
+        Assumes that lines of all layers are sorted by fileName;
+    '''
+    for rawDocument in iterateRawDocuments(corpusDir, annotators):
+        yield parseRawDocument(rawDocument)
+
+def iterateRawDocuments(corpusDir, annotators = None):
+    ''' Same as iterateDocuments(), but yields the unparsed lines of each 
+        document: tuples (file, baseLines, dctLines, layerLines), where 
+        layerLines is a list of (attribute, annotator, lines) for each 
+        annotator layer; parseRawDocument() turns these into DocumentBundle-s
+        (e.g. in worker processes); '''
+    if annotators is None:
+        annotators = list(annotatorSuffixes.keys())
+    # (bundle attribute, annotator, cursor)
+    cursors = []
+    for (attribute, layerFile, parser) in _documentLayers:
+        for annotatorID in annotators:
+            inputFile = os.path.join(corpusDir, layerFile + annotatorSuffixes[annotatorID])
+            cursors.append( (attribute, annotatorID, _LayerCursor(inputFile, parser)) )
+    dctCursor = \
+        _LayerCursor(os.path.join(corpusDir, timexAnnotationDCTFile), parse_dct_annotation)
+    lastFile = None
+    for (file, lines) in iterateLayerGroups( os.path.join(corpusDir, baseAnnotationFile) ):
+        if lastFile is not None and file <= lastFile:
+            raise Exception(" Files are not sorted in the base segmentation: "+\
+                            file+" after "+lastFile)
+        layerLines = [ (attribute, annotatorID, cursor.takeLines(file)) \
+                       for (attribute, annotatorID, cursor) in cursors ]
+        yield (file, lines, dctCursor.takeLines(file), layerLines)
+        lastFile = file
+    dctCursor.close()
+    for (attribute, annotatorID, cursor) in cursors:
+        cursor.close()
+
+def parseRawDocument(rawDocument):
+    ''' Parses the lines of a document (as yielded by iterateRawDocuments())
+        into a DocumentBundle; '''
+    (file, baseLines, dctLines, layerLines) = rawDocument
+    parsers = dict( (attribute, parser) for (attribute, layerFile, parser) in _documentLayers )
+    bundle = DocumentBundle(file)
+    bundle.baseAnnotations = parse_base_segmentation(baseLines)
+    bundle.DCTsByFile      = parse_dct_annotation(dctLines)
+    for (attribute, annotatorID, lines) in layerLines:
+        annotations = parsers[attribute]( lines )
+        if attribute in ["event", "tmx"]:
+            (byLoc, byID) = annotations
+            getattr(bundle, attribute+"AnnotationsByLoc")[annotatorID] = byLoc
+            getattr(bundle, attribute+"AnnotationsByIds")[annotatorID] = byID
+        else:
+            getattr(bundle, attribute)[annotatorID] = annotations
+    bundle.assignEntityIDs()
+    return bundle
+
+
+# =========================================================================
+#    Content hash of the corpus, and loading all the layers
+# =========================================================================
+
+def getCorpusLayerFiles():
+    ''' Returns names of all corpus layer files the parsed corpus is built 
+        from: the base segmentation, the DCT layer, and EVENT, TIMEX and 
+        TLINK layers of all annotators (annotators A, B, C and the judge J).
+    '''
+    layerFiles = [ baseAnnotationFile, timexAnnotationDCTFile ]
+    for layer in [ eventAnnotationFile, timexAnnotationFile, tlinkEventTimexFile, \
+                   tlinkEventDCTFile, tlinkMainEventsFile, tlinkSubEventsFile ]:
+        for annotator in sorted( annotatorSuffixes ):
+            layerFiles.append( layer + annotatorSuffixes[annotator] )
+    return layerFiles
+
+def hashCorpusLayers(corpusDir):
+    ''' Computes a content hash over all corpus layer files. '''
+    from . import corpus_columnar
+    if corpus_columnar.isColumnarCorpus(corpusDir):
+        return corpus_columnar.hashColumnarCorpus(corpusDir)
+    import hashlib
+    digest = hashlib.sha1()
+    for layerFile in getCorpusLayerFiles():
+        digest.update( layerFile.encode("utf-8") + b"\0" )
+        hashLayer( os.path.join(corpusDir, layerFile), digest )
+    return digest.hexdigest()
+
+def loadAllAnnotations(corpusDir, jobs = 1):
+    ''' Loads base segmentation, and EVENT, TIMEX and TLINK annotations of 
+        all annotators. Returns a tuple:
+            (baseAnnotations, entityAnnotations, tlinkAnnotations)
+        where entityAnnotations and tlinkAnnotations are the tuples returned 
+        by loadAllEntityAnnotations() and loadAllTLINKannotations();
+        If jobs > 1 (or jobs is None), all layers are parsed in parallel;
+        corpusDir can also be a directory of columnar tables (see 
+        corpus_columnar.py);
+    '''
+    from . import corpus_columnar
+    if corpus_columnar.isColumnarCorpus(corpusDir):
+        return corpus_columnar.loadAllAnnotations(corpusDir)
+    entityTasks = _getEntityLayerTasks(corpusDir)
+    tlinkTasks  = _getTLINKLayerTasks(corpusDir)
+    baseTask    = (load_base_segmentation, os.path.join(corpusDir, baseAnnotationFile))
+    results = parseLayers( [ baseTask ] + entityTasks + tlinkTasks, jobs )
+    baseAnnotations   = results[0]
+    entityIDs         = dict()
+    entityAnnotations = _collectEntityAnnotations( results[1:1+len(entityTasks)], entityIDs )
+    tlinkAnnotations  = _collectTLINKAnnotations( results[1+len(entityTasks):], entityIDs )
+    return (baseAnnotations, entityAnnotations, tlinkAnnotations)
@@ -8,7 +8,7 @@
 
 import re
 
-import sol_format_tools
+from . import sol_format_tools
 
 # ================================================================
 #    Dependency tree data structure
@@ -35,7 +35,7 @@ class Tree(object):
                 child.addChildToSubTree(nodeLabel, tree)
 
     def printTree(self, spacing):
-        print(spacing + " " + self.label + " "+self.data[0])
+        print(spacing + " " + str(self.label) + " "+self.data[0])
         if (self.children):
             spacing = spacing + " "
             for child in self.children:
@@ -63,7 +63,7 @@ class Tree(object):
         if (self.children and (depthLimit > 0 or depthLimit < 0) ):
             headerTag = re.compile('^(EVENT|TIMEX)\s+([A-Z_]+)\s*')
             for child in self.children:
-                childAnnotations = [ a for a in sentAnnotations if a[2]==int(child.wordID) ]
+                childAnnotations = [ a for a in sentAnnotations if a[2]==child.wordID ]
                 if childAnnotations:
                     for [ annotator, sentenceID, wordID, eID, expr, ann ] in childAnnotations:
                         if onlyHeaderMatch and not headerTag.match(ann):
@@ -85,7 +85,7 @@ class Tree(object):
         subtrees = []
         if (self.parent and (heightLimit > 0 or heightLimit < 0) ):
             headerTag = re.compile('^(EVENT|TIMEX)\s+([A-Z_]+)\s*')
-            parentAnnotations = [ a for a in sentAnnotations if a[2]==int(self.parent.wordID) ]
+            parentAnnotations = [ a for a in sentAnnotations if a[2]==self.parent.wordID ]
             if parentAnnotations:
                 for [ annotator, sentenceID, wordID, eID, expr, ann ] in parentAnnotations:
                     if onlyHeaderMatch and not headerTag.match(ann):
@@ -110,7 +110,7 @@ class Tree(object):
                 if (len(childsResults) > 0):
                     subtrees.extend(childsResults)
         # Sort trees based on their syntactic labels
-        return sorted(subtrees, key=lambda x: int(x.label))
+        return sorted(subtrees, key=lambda x: x.label)
 
     def getTreeDepth( self ):
         if (self.children):
@@ -129,20 +129,21 @@ class Tree(object):
 
 #  Builds sentence trees from dependency syntactic annotations;
 #  Assumes that the input 'sentences' is a list of sentences,
-#  each sentence consisting of word-describing tuples:
-#    [sentenceID, wordID, token, morphSyntactic, syntacticID, syntacticHeadID]
+#  each sentence consisting of word-describing tuples (data_import.Token):
+#    (sentenceID, wordID, token, morphSyntactic, syntacticID, syntacticHeadID)
+#  where IDs are integers;
 def build_dependency_trees( sentences ):
     allSentenceTrees = []  # Lausepuude j2rjend
     for sent in sentences:
         trees_of_a_sentence = []
-        nodes = [ "0" ]
+        nodes = [ 0 ]
         while(len(nodes) > 0):
             node = nodes.pop(0)
             #for (t, ms, label, parent, annotations) in lause:
             for [sentenceID, wordID, token, morphSyntactic, label, parent] in sent:
                 if (parent == node and label != parent):
                     tree1 = Tree( label, wordID, (token, morphSyntactic, label, parent, []) )
-                    if (parent == "0"):
+                    if (parent == 0):
                         # Add the root node
                         trees_of_a_sentence.append(tree1)
                     else:
@@ -154,6 +155,101 @@ def build_dependency_trees( sentences ):
     return allSentenceTrees
 
 
+# ================================================================
+#    Validating dependency structures
+# ================================================================
+
+#  Kinds of problems found by validate_dependency_structure()
+DUPLICATE_ID   = "duplicate-id"
+SELF_LOOP      = "self-loop"
+ORPHAN         = "orphan"
+CYCLE          = "cycle"
+MULTIPLE_ROOTS = "multiple-roots"
+
+#  Validates the dependency structure of a sentence (a list of 
+#  data_import.Token-s) in linear time. Returns a list of problems, each a
+#  tuple (kind, labels), where labels is a list of syntactic IDs of the
+#  tokens involved:
+#     DUPLICATE_ID   -- several tokens have the same syntactic ID;
+#     SELF_LOOP      -- the token is its own head;
+#     ORPHAN         -- the head of the token is missing from the sentence;
+#     CYCLE          -- the tokens form a cycle of heads (in the order of 
+#                       the cycle);
+#     MULTIPLE_ROOTS -- the sentence has several tokens with the head 0;
+#  Tokens of all these problems (and their descendants) are left out of 
+#  the trees by build_dependency_trees(). 
+#  In the corpus, punctuation is detached from the trees by attaching it
+#  to itself, so (if allowDetachedPunctuation) self-loops of punctuation 
+#  are not reported;
+def validate_dependency_structure( sentence, allowDetachedPunctuation = True ):
+    problems = []
+    heads = dict()
+    duplicates = []
+    for token in sentence:
+        label = token[4]
+        if label in heads:
+            duplicates.append( label )
+        heads[label] = token[5]
+    if duplicates:
+        problems.append( (DUPLICATE_ID, duplicates) )
+    punctuation = re.compile('^\\s*"(.|[^"]+)"\\s+Z\\s')
+    roots = []
+    for token in sentence:
+        (label, parent) = (token[4], token[5])
+        if parent == 0:
+            roots.append( label )
+        elif parent == label:
+            if not (allowDetachedPunctuation and punctuation.match(token[3])):
+                problems.append( (SELF_LOOP, [ label ]) )
+        elif parent not in heads:
+            problems.append( (ORPHAN, [ label ]) )
+    if len(roots) > 1:
+        problems.append( (MULTIPLE_ROOTS, roots) )
+    # Find cycles: follow the heads from each token, until reaching a 
+    # token already visited; each token is visited only once
+    state = dict()   # label -> 1 (on the current path), 2 (done)
+    for token in sentence:
+        path = []
+        label = token[4]
+        while label in heads and label not in state:
+            state[label] = 1
+            path.append( label )
+            parent = heads[label]
+            if parent == label:
+                break
+            label = parent
+        if state.get(label) == 1 and label in path and heads[label] != label:
+            problems.append( (CYCLE, path[ path.index(label): ]) )
+        for label in path:
+            state[label] = 2
+    return problems
+
+#  Repairs the dependency structure of a sentence: attaches orphans, 
+#  tokens with (reported) self-loops, and the first token of each cycle 
+#  to the root of the sentence (the first token with the head 0; if there
+#  is none, the tokens become roots). Returns a tuple (repaired sentence, 
+#  problems), where problems are the problems found before the repair;
+def repair_dependency_structure( sentence, allowDetachedPunctuation = True ):
+    problems = validate_dependency_structure( sentence, allowDetachedPunctuation )
+    toRepair = set()
+    for (kind, labels) in problems:
+        if kind in (ORPHAN, SELF_LOOP, CYCLE):
+            toRepair.add( labels[0] )
+    if not toRepair:
+        return sentence, problems
+    root = 0
+    for token in sentence:
+        if token[5] == 0:
+            root = token[4]
+            break
+    repaired = []
+    for token in sentence:
+        if token[4] in toRepair and token[4] != root:
+            token = token._replace(syntacticHeadID = root)
+        repaired.append( token )
+    return repaired, problems
+
+
 # ================================================================
 #    Adding clause boundary information to the trees
 # ================================================================
@@ -228,8 +324,8 @@ def getEventArgStructInSentence(sentence, sentenceTrees, sentAnnotations, \
     eventHeader = re.compile('^EVENT\s+([A-Z_]+)')
     for i in range(len(sentence)):
         [sentenceID, wordID, token, morphSyntactic, label, parent] = sentence[i]
-        if int(wordID) in wordToAnnotation:
-            for [ annotator, sentenceID_int, wordID_int, eID, expr, ann ] in wordToAnnotation[int(wordID)]:
+        if wordID in wordToAnnotation:
+            for [ annotator, sentenceID_int, wordID_int, eID, expr, ann ] in wordToAnnotation[wordID]:
                 if eventHeader.match( ann ):
                     headerParts = ann.split()
                     eClass = headerParts[1]
@@ -330,7 +426,7 @@ def fixMWEventArgStruct(sentence, sentenceTrees, sentAnnotations, eventsWithArgu
         # Gather all multiword EVENT annotations associated with the main tree
         mwEventAnns = []
         for [ annotator, sentID_int, wordID_int, eID, expr, ann ] in sentAnnotations:
-            if int(mainTree.wordID) == wordID_int and eventHeader.match(ann) and \
+            if mainTree.wordID == wordID_int and eventHeader.match(ann) and \
                expr and expr.find(" ") > -1:
                 mwEventAnns.append( [wordID_int, eID, expr, ann] )
         if mwEventAnns:
@@ -343,8 +439,8 @@ def fixMWEventArgStruct(sentence, sentenceTrees, sentAnnotations, eventsWithArgu
                         otherParts.append( [wordID_int_2, eID_2, expr_2, ann_2] )
                         for l in range( len(sentence) ):
                             [sID, wID, tok, morphSynt, label, parent] = sentence[l]
-                            if int(wID) == wordID_int_2:
-                                otherPartsLabels.append( str(label) )
+                            if wID == wordID_int_2:
+                                otherPartsLabels.append( label )
                 if not otherParts or len(otherParts) != len(otherPartsLabels):
                     raise Exception(' Unable to find correct other parts of the EVENT annotation:',\
                           [eID, expr, ann],' ', otherParts, otherPartsLabels)
@@ -365,7 +461,7 @@ def fixMWEventArgStruct(sentence, sentenceTrees, sentAnnotations, eventsWithArgu
                         if (subTree):
                             tree = subTree
                     if (not tree):
-                        raise Exception(" Could not find subtree with label "+label)
+                        raise Exception(" Could not find subtree with label "+str(label))
                     else:
                         subTrees = tree.findTaggedSubTrees(sentAnnotations, "EVENT", -1, onlyHeaderMatch = True)
                         if (len(subTrees) > 0):
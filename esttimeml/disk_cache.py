@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+#
+#    Size-bounded on-disk cache of derived data (parsed layers, byte-offset
+#   indices, dependency trees, filtered annotation sets and experiment
+#   counters), shared by all the scripts:
+#
+#       cache = disk_cache.getCorpusCache( corpusDir )
+#       key   = cache.makeKey( [ layerFile, layerDigest ], \
+#                              disk_cache.getCodeVersion("data_import") )
+#       data  = cache.getOrBuild( "layer", key, lambda: parseLayer(...) )
+#
+#   Entries are keyed by a content hash of their inputs and by the version
+#   of the code that builds them (a hash of the source files of the given
+#   modules), so entries built by an older version of the code are never
+#   used. Each entry is a pickle file in a subdirectory (namespace) of the
+#   cache directory. The last use of an entry is recorded in the
+#   modification time of its file, and when the total size of the entries
+#   exceeds the size cap, the least recently used entries are evicted.
+#    Entries are written into temporary files, and moved into place (and
+#   the cache is trimmed) under an exclusive lock of the file .lock of the
+#   cache directory, so concurrent processes can share the cache; readers
+#   never see a partially written entry. Two processes missing the same
+#   entry may both build it (the last one wins).
+#
+#   The cache directory is "esttimeml" in the cache directory of the user
+#   ($XDG_CACHE_HOME or ~/.cache; %LOCALAPPDATA% on Windows), unless given
+#   in the environment variable ESTTIMEML_CACHE_DIR; the corpus directory
+#   itself is never written into. As the entries are keyed by the content
+#   of their inputs, a single cache serves all corpora. The size cap (in
+#   megabytes) can be given in the environment variable ESTTIMEML_CACHE_SIZE
+#   (default: 1024).
+#
+#   Usage (prints the entries of the cache, or trims it to the size cap):
+#      python  disk_cache.py  [<cache_dir>]  [--trim MB | --clear]
+#
+#    Developed and tested under Python's version: 3.4.1
+#
+
+import sys, os
+
+cacheDirName       = "esttimeml"
+cacheFormatVersion = 1
+defaultMaxSize     = 1024 * 1024 * 1024
+
+#  Number of attempts to lock the cache on Windows (each attempt waits for
+#  10 seconds), and the pause between the attempts (in seconds)
+lockAttempts = 6
+lockPause    = 1.0
+
+_entryHeader = b"ESTTIMEML-CACHE "
+
+# =========================================================================
+#    Keys
+# =========================================================================
+
+_codeVersions = dict()
+
+def getCodeVersion(*moduleNames):
+    ''' Returns a hash of the source files of the given modules (of the
+        package esttimeml), along with the format version of the cache; '''
+    if moduleNames not in _codeVersions:
+        import hashlib
+        digest = hashlib.sha1( str(cacheFormatVersion).encode("ascii") )
+        moduleDir = os.path.dirname( os.path.abspath(__file__) )
+        for moduleName in sorted( moduleNames ):
+            digest.update( b"\0" + moduleName.encode("utf-8") + b"\0" )
+            with open(os.path.join(moduleDir, moduleName+".py"), mode='rb') as f:
+                digest.update( f.read() )
+        _codeVersions[moduleNames] = digest.hexdigest()
+    return _codeVersions[moduleNames]
+
+# =========================================================================
+#    Locking
+# =========================================================================
+
+class _FileLock(object):
+    ''' An exclusive lock of a file, held across processes (fcntl.flock on
+        POSIX, msvcrt.locking on Windows); '''
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, mode='a+b')
+        if os.name == 'nt':
+            import msvcrt
+            self.file.seek(0)
+            # LK_LOCK retries for 10 seconds before failing
+            for attempt in range(lockAttempts):
+                try:
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    if attempt + 1 == lockAttempts:
+                        self.file.close()
+                        self.file = None
+                        raise
+                    import time
+                    time.sleep( lockPause )
+        else:
+            import fcntl
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if os.name == 'nt':
+            import msvcrt
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        self.file.close()
+        self.file = None
+        return False
+
+# =========================================================================
+#    Cache
+# =========================================================================
+
+class DiskCache(object):
+    ''' Size-bounded on-disk cache of pickled values: namespace -> key ->
+        value (see the comments at the beginning of the module); '''
+
+    def __init__(self, cacheDir, maxSize = None):
+        self.cacheDir = cacheDir
+        self.maxSize  = maxSize if maxSize is not None else defaultMaxSize
+
+    def makeKey(self, inputs, codeVersion = ""):
+        ''' Returns the key of an entry built from the given inputs (strings,
+            bytes or numbers, e.g. content hashes of input files and build
+            parameters) by the code of the given version; '''
+        import hashlib
+        digest = hashlib.sha1( codeVersion.encode("ascii") )
+        for item in inputs:
+            if not isinstance(item, bytes):
+                item = str(item).encode("utf-8")
+            digest.update( str(len(item)).encode("ascii") + b":" + item )
+        return digest.hexdigest()
+
+    def getEntryPath(self, namespace, key):
+        return os.path.join(self.cacheDir, namespace, key)
+
+    def get(self, namespace, key, default = None):
+        ''' Returns the value of the entry, or default, if the entry is
+            missing (or damaged); marks the entry as recently used; '''
+        path = self.getEntryPath(namespace, key)
+        header = _entryHeader + key.encode("ascii") + b"\n"
+        try:
+            with open(path, mode='rb') as f:
+                data = f.read()
+            if not data.startswith(header):
+                return default
+            import pickle
+            value = pickle.loads( memoryview(data)[len(header):] )
+            os.utime(path)
+            return value
+        except Exception:
+            # A missing, evicted or damaged entry
+            return default
+
+    def put(self, namespace, key, value):
+        ''' Stores the value in the cache, and evicts the least recently used
+            entries, if the cache exceeds its size cap. If the cache directory
+            is not writable, the value is silently not stored; '''
+        import pickle
+        path = self.getEntryPath(namespace, key)
+        tmpPath = path+"."+str(os.getpid())+".tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmpPath, mode='wb') as f:
+                f.write( _entryHeader + key.encode("ascii") + b"\n" )
+                pickle.dump( value, f, protocol=pickle.HIGHEST_PROTOCOL )
+            with _FileLock( os.path.join(self.cacheDir, ".lock") ):
+                os.replace(tmpPath, path)
+                self._evict( self.maxSize )
+        except OSError:
+            pass
+        finally:
+            # (also if pickling fails, or the process is interrupted)
+            if os.path.exists(tmpPath):
+                os.unlink(tmpPath)
+
+    def getOrBuild(self, namespace, key, builder):
+        ''' Returns the value of the entry; if the entry is missing, it is
+            built by calling builder(), and stored; '''
+        missing = object()
+        value = self.get(namespace, key, missing)
+        if value is missing:
+            value = builder()
+            self.put(namespace, key, value)
+        return value
+
+    def getEntries(self):
+        ''' Returns a list of entries (lastUse, size, path), sorted from the
+            least recently used; '''
+        entries = []
+        if not os.path.isdir(self.cacheDir):
+            return entries
+        for namespace in os.listdir(self.cacheDir):
+            namespaceDir = os.path.join(self.cacheDir, namespace)
+            if not os.path.isdir(namespaceDir):
+                continue
+            for name in os.listdir(namespaceDir):
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(namespaceDir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append( (stat.st_mtime, stat.st_size, path) )
+        entries.sort()
+        return entries
+
+    def _evict(self, maxSize):
+        entries = self.getEntries()
+        totalSize = sum( size for (lastUse, size, path) in entries )
+        for (lastUse, size, path) in entries:
+            if totalSize <= maxSize:
+                break
+            try:
+                os.unlink(path)
+                totalSize -= size
+            except OSError:
+                pass
+        return totalSize
+
+    def trim(self, maxSize = None):
+        ''' Evicts the least recently used entries until the cache fits into
+            maxSize (by default, the size cap of the cache); returns the size
+            of the remaining entries; '''
+        os.makedirs(self.cacheDir, exist_ok=True)
+        with _FileLock( os.path.join(self.cacheDir, ".lock") ):
+            return self._evict( self.maxSize if maxSize is None else maxSize )
+
+
+def getCacheDir():
+    ''' The cache directory: ESTTIMEML_CACHE_DIR, or the directory esttimeml
+        of the cache directory of the user ($XDG_CACHE_HOME or ~/.cache;
+        %LOCALAPPDATA% on Windows); '''
+    if os.environ.get("ESTTIMEML_CACHE_DIR"):
+        return os.environ["ESTTIMEML_CACHE_DIR"]
+    if os.name == 'nt':
+        userCacheDir = os.environ.get("LOCALAPPDATA") or \
+                       os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    else:
+        userCacheDir = os.environ.get("XDG_CACHE_HOME") or \
+                       os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(userCacheDir, cacheDirName)
+
+def getCorpusCache(corpusDir = None):
+    ''' Returns the DiskCache for the corpus (see getCacheDir(); entries of
+        all corpora are kept in the same cache), with the size cap from
+        ESTTIMEML_CACHE_SIZE; '''
+    maxSize = None
+    if os.environ.get("ESTTIMEML_CACHE_SIZE"):
+        maxSize = int( float(os.environ["ESTTIMEML_CACHE_SIZE"]) * 1024 * 1024 )
+    return DiskCache( getCacheDir(), maxSize = maxSize )
+
+
+def main(argv):
+    options = argv[1:]
+    if options and not options[0].startswith("--"):
+        cacheDir = options.pop(0)
+    else:
+        cacheDir = getCacheDir()
+    if os.path.isdir(cacheDir):
+        cache = DiskCache(cacheDir)
+        if len(options) > 1 and options[0] == "--trim":
+            size = cache.trim( int( float(options[1]) * 1024 * 1024 ) )
+            print(" Trimmed the cache to {:.1f} MB".format(size / (1024.0 * 1024.0)))
+        elif options and options[0] == "--clear":
+            cache.trim( 0 )
+            print(" Cleared the cache")
+        else:
+            import time
+            entries = cache.getEntries()
+            for (lastUse, size, path) in entries:
+                print(" {}  {:>10}  {}".format(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(lastUse)), \
+                                               size, os.path.relpath(path, cacheDir)))
+            print(" {} entries, {:.1f} MB".format(len(entries), \
+                  sum( size for (lastUse, size, path) in entries ) / (1024.0 * 1024.0)))
+    else:
+        print(" Cache directory not found: "+cacheDir)
+        print(" Please give arguments: [<cache_dir>] [--trim MB | --clear]")
+        print(" Example:\n     python  "+argv[0]+"  --trim 256")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
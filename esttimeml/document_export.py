@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+#
+#    Machine-readable and browsable export of the annotations of documents,
+#   built on the same document index as the plain-text output of the reader
+#   (see document_index.py and exported_corpus_reader.py):
+#
+#     *) JSON Lines: one JSON object per sentence, with the tokens of the
+#        sentence (along with their morphological and syntactic annotations),
+#        the EVENTs and TIMEXes of the sentence (IDs of their tokens, the
+#        expressions and the attributes) and the TLINKs of the EVENTs of the
+#        sentence;
+#     *) HTML: a static page per document, with the entities highlighted in
+#        the text and a table of TLINKs after each sentence; an index page
+#        lists the documents;
+#
+#   Documents are rendered one at a time, so the writers (JSONLinesWriter,
+#   HTMLDirectoryWriter) only keep a single rendered document in memory:
+#
+#       index = DocumentIndex( ... )
+#       text  = renderJSONLines(index, base[file], DCTsByFile[file])
+#       JSONLinesWriter(out).writeDocument(file, text)
+#
+#    Developed and tested under Python's version: 3.4.1
+#
+
+import os, re, json
+from html import escape
+
+from . import data_import
+from .document_index import getCleanExpression
+
+exportFormats = [ "text", "jsonl", "html" ]
+
+def getEntityAttributes(annotation):
+    ''' Parses the annotation of an entity token (e.g. 'EVENT OCCURRENCE
+        polarity="NEG"' or 'TIMEX DATE 2004-05 multiword="true"') into a
+        dict of attributes: the class of an EVENT, the type and the value of
+        a TIMEX, and the attributes given as name="value"; '''
+    attributePattern = re.compile('([A-Za-z_]+)="([^"]*)"')
+    attributes = dict()
+    for (name, value) in attributePattern.findall(annotation):
+        attributes[name] = value
+    items = attributePattern.sub("", annotation).split()
+    names = [ "class" ] if items[:1] == [ "EVENT" ] else [ "type", "value" ]
+    for (name, value) in zip(names, items[1:]):
+        attributes[name] = value
+    return attributes
+
+
+def getSentenceEntities(index, sentenceID, eventIDs, timexIDs):
+    ''' Returns a list of dicts describing the entities of the sentence
+        (IDs of the entities as listed by DocumentIndex.sentences); '''
+    entities = []
+    for (entityIDs, entitiesByID, entityType) in [ (eventIDs, index.eventsByID, "EVENT"), \
+                                                   (timexIDs, index.timexesByID, "TIMEX") ]:
+        for entityID in entityIDs:
+            wordIDs    = []
+            attributes = dict()
+            # [sentenceID, wordID, expression, annotation]
+            for item in entitiesByID[entityID]:
+                if item[0] == sentenceID:
+                    wordIDs.append( int(item[1]) )
+                attributes.update( getEntityAttributes(item[3]) )
+            expression = index.getExpression(entityID, isTimex = (entityType == "TIMEX"))
+            entities.append( { "id" : entityID, "type" : entityType, "wordIDs" : wordIDs, \
+                               "expression" : getCleanExpression(expression), \
+                               "attributes" : attributes } )
+    return entities
+
+# =========================================================================
+#    JSON Lines
+# =========================================================================
+
+def renderJSONLines(index, sentences, DCT, positions = None):
+    ''' Renders the sentences of the DocumentIndex as JSON Lines: one JSON
+        object per sentence. sentences are the sentences of the base
+        segmentation the index was built on (lists of Token-s), and
+        positions are their positions in the document (by default: 0, 1,
+        ...). Returns the rendered text; '''
+    if positions is None:
+        positions = range(len(sentences))
+    lines = []
+    for (position, sentence, (tokens, eventIDs, timexIDs)) in \
+            zip(positions, sentences, index.sentences):
+        sentenceID = str(sentence[0].sentenceID)
+        links = []
+        for eventID in eventIDs:
+            for (layer, entityA, relation, entityB, comment) in index.getLinks(eventID):
+                links.append( { "layer" : layer, "entityA" : entityA, "relation" : relation, \
+                                "entityB" : entityB, "comment" : comment } )
+        record = { "file" : index.file, "DCT" : DCT, "sentence" : position, \
+                   "sentenceID" : sentence[0].sentenceID, \
+                   "tokens" : [ { "wordID" : token.wordID, "token" : token.token, \
+                                  "morphSyntactic" : token.morphSyntactic, \
+                                  "syntacticID" : token.syntacticID, \
+                                  "syntacticHeadID" : token.syntacticHeadID } \
+                                for token in sentence ], \
+                   "entities" : getSentenceEntities(index, sentenceID, eventIDs, timexIDs), \
+                   "tlinks" : links }
+        lines.append( json.dumps(record, ensure_ascii=False) )
+    return "".join( line+"\n" for line in lines )
+
+
+class JSONLinesWriter(object):
+    ''' Writes rendered documents (see renderJSONLines()) into out; '''
+
+    def __init__(self, out):
+        self.out = out
+
+    def writeDocument(self, file, text):
+        self.out.write( text )
+
+    def close(self):
+        pass
+
+# =========================================================================
+#    HTML
+# =========================================================================
+
+_pageStyle = """
+body { font-family: sans-serif; margin: 2em; }
+p.sentence { line-height: 1.8; }
+span.label { color: #888; font-size: small; }
+span.EVENT { background: #ffe9a8; }
+span.TIMEX { background: #bfe3ff; }
+span.EVENT span.TIMEX, span.TIMEX span.EVENT { border-bottom: 2px solid #888; }
+table.tlinks { border-collapse: collapse; margin: 0 0 1.5em 2em; font-size: small; }
+table.tlinks td { border: 1px solid #ccc; padding: 2px 6px; }
+"""
+
+def renderHTMLPage(index, DCT, positions = None):
+    ''' Renders the sentences of the DocumentIndex as an HTML page: entities
+        are highlighted in the text (an entity of multiple tokens gets a tag
+        per token, as in the plain-text output), and TLINKs of the EVENTs of
+        each sentence are listed in a table after the sentence. positions
+        are the positions of the sentences in the document (by default: 0,
+        1, ...). Returns the rendered page; '''
+    if positions is None:
+        positions = range(len(index.sentences))
+    entityTypes = dict()
+    parts = [ "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n", \
+              "<title>"+escape(index.file)+"</title>\n<style>"+_pageStyle+"</style>\n</head>\n<body>\n", \
+              "<h1>"+escape(index.file)+"</h1>\n<p>DCT: "+escape(DCT)+"</p>\n" ]
+    for (position, (tokens, eventIDs, timexIDs)) in zip(positions, index.sentences):
+        for entityID in eventIDs:
+            entityTypes[entityID] = "EVENT"
+        for entityID in timexIDs:
+            entityTypes[entityID] = "TIMEX"
+        # Sentence with highlighted entities
+        parts.append( "<p class=\"sentence\" id=\"s"+str(position)+"\"><span class=\"label\">s"+\
+                      str(position)+"</span> " )
+        openCount = 0
+        for (token, openedIDs, closedCount) in tokens:
+            for entityID in openedIDs:
+                parts.append( "<span class=\""+entityTypes[entityID]+"\" title=\""+\
+                              escape(entityID)+"\">" )
+            openCount += len(openedIDs)
+            parts.append( escape(token) )
+            closedCount = min(closedCount, openCount)
+            parts.append( "</span>"*closedCount+" " )
+            openCount -= closedCount
+        parts.append( "</span>"*openCount+"</p>\n" )
+        # Table of TLINKs
+        rows = []
+        for eventID in eventIDs:
+            for (layer, entityA, relation, entityB, comment) in index.getLinks(eventID):
+                if layer == data_import.tlinkEventDCTFile:
+                    exprB = "DCT"
+                else:
+                    exprB = entityB+" "+index.getExpression(entityB, \
+                                             isTimex = (layer == data_import.tlinkEventTimexFile))
+                cells = [ entityA+" "+index.getExpression(entityA), relation, exprB, comment ]
+                rows.append( "<tr>"+"".join( "<td>"+escape(cell)+"</td>" for cell in cells )+"</tr>\n" )
+        if rows:
+            parts.append( "<table class=\"tlinks\">\n"+"".join(rows)+"</table>\n" )
+    parts.append( "</body>\n</html>\n" )
+    return "".join(parts)
+
+
+class HTMLDirectoryWriter(object):
+    ''' Writes rendered pages (see renderHTMLPage()) into the outputDir, a
+        page per document (fileName+".html"), and an index page of the
+        documents (index.html) on closing; '''
+
+    def __init__(self, outputDir):
+        self.outputDir = outputDir
+        self.files = []
+        os.makedirs(outputDir, exist_ok=True)
+
+    def writeDocument(self, file, text):
+        with open(os.path.join(self.outputDir, file+".html"), mode='w', encoding="utf-8") as f:
+            f.write( text )
+        self.files.append( file )
+
+    def close(self):
+        items = [ "<li><a href=\""+escape(file)+".html\">"+escape(file)+"</a></li>\n" \
+                  for file in self.files ]
+        with open(os.path.join(self.outputDir, "index.html"), mode='w', encoding="utf-8") as f:
+            f.write( "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"+\
+                     "<title>Estonian TimeML corpus</title>\n</head>\n<body>\n"+\
+                     "<h1>Estonian TimeML corpus</h1>\n<ul>\n"+"".join(items)+"</ul>\n</body>\n</html>\n" )
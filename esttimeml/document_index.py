@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+#
+#    Document index for rendering the annotations of a single document (of
+#   a single annotator), built once per document:
+#
+#     *) entity spans of each sentence: for each token, the entity tags
+#        starting and ending at the token, and IDs of the EVENTs and TIMEXes
+#        of the sentence in the order of their first tokens;
+#     *) TLINKs of each EVENT of the document (in the order of the layers:
+#        event-timex, event-DCT, subordinate events, main events);
+#     *) expressions of the entities, memoized;
+#
+#   so that rendering a document (see exported_corpus_reader.py) is linear
+#   in the size of the output:
+#
+#       index = DocumentIndex(file, base, eventsByLoc, timexesByLoc, eventsByID, \
+#                             timexesByID, eventTimexLinks, eventDCTLinks, \
+#                             mainEventLinks, subEventLinks)
+#       for (tokens, eventIDs, timexIDs) in index.sentences:
+#           for eventID in eventIDs:
+#               for (layer, entityA, relation, entityB, comment) in index.getLinks(eventID):
+#                   ...
+#
+#   Layers are given in the formats of the loaders of data_import (fileName
+#   -> annotations of the document).
+#
+#    Developed and tested under Python's version: 3.4.1
+#
+
+from . import data_import
+
+#  TLINK layers, in the order in which links of an EVENT are listed
+linkLayers = [ data_import.tlinkEventTimexFile, data_import.tlinkEventDCTFile, \
+               data_import.tlinkSubEventsFile, data_import.tlinkMainEventsFile ]
+
+def getCleanExpression(expression):
+    ''' Removes the quotes around the expression of an entity; '''
+    if len(expression) > 2 and expression[0] == '"' and expression[-1] == '"':
+        return expression[1:-1]
+    raise Exception(" Unexpected entity expression: "+str(expression))
+
+#  Computes entity spans of all sentences of the file. Returns a list with
+#  an item for each sentence:
+#      ( tokens, eventIDs, timexIDs )
+#  where tokens is a list of ( token, openedIDs, closedCount ) for each
+#  token of the sentence: IDs of the entities whose tag starts at the token
+#  (TIMEXes first, then EVENTs), and the number of tags ending at the token;
+#  eventIDs and timexIDs are IDs of the entities of the sentence, in the
+#  order of their first tokens.
+#  A TIMEX tag spans over all tokens of a multiword TIMEX: it starts at the
+#  token the expression of the TIMEX starts with, and ends at the token the
+#  expression ends with; each token of an EVENT gets its own tag;
+def getEntitySpans(file, base, eventsByLoc, timexesByLoc):
+    fileEvents  = eventsByLoc.get(file)
+    fileTimexes = timexesByLoc.get(file)
+    expressions = dict()   # entityID -> (clean expression, multiword)
+    sentences = []
+    for sentence in base[file]:
+        tokens  = []
+        events  = []
+        timexes = []
+        seenIDs = set()
+        for [sID, wID, token, morphSyntactic, syntacticID, syntacticHeadID] in sentence:
+            key = (str(sID), str(wID))
+            openedIDs   = []
+            closedCount = 0
+            if fileTimexes is not None and key in fileTimexes:
+                for [entityID, expression, annotation] in fileTimexes[key]:
+                    if entityID not in expressions:
+                        expressions[entityID] = ( getCleanExpression(expression), \
+                                                  "multiword=\"true\"" in annotation )
+                    (expressionClean, multiWord) = expressions[entityID]
+                    if not multiWord or expressionClean.startswith(token):
+                        openedIDs.append( entityID )
+                    if not multiWord or expressionClean.endswith(token):
+                        closedCount += 1
+                    if entityID not in seenIDs:
+                        timexes.append( entityID )
+                        seenIDs.add( entityID )
+            if fileEvents is not None and key in fileEvents:
+                for [entityID, expression, annotation] in fileEvents[key]:
+                    openedIDs.append( entityID )
+                    closedCount += 1
+                    if entityID not in seenIDs:
+                        events.append( entityID )
+                        seenIDs.add( entityID )
+            tokens.append( (token, openedIDs, closedCount) )
+        sentences.append( (tokens, events, timexes) )
+    return sentences
+
+
+class DocumentIndex(object):
+    ''' Entity spans of the sentences, TLINKs of the EVENTs and memoized
+        expressions of the entities of a single document; '''
+
+    def __init__(self, file, base, eventsByLoc, timexesByLoc, eventsByID, timexesByID, \
+                 eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks):
+        self.file = file
+        self.sentences = getEntitySpans(file, base, eventsByLoc, timexesByLoc)
+        self.eventsByID  = eventsByID.get(file)
+        self.timexesByID = timexesByID.get(file)
+        self.expressions = dict()
+        # eventID -> list of (layer, entityA, relation, entityB, comment)
+        self.links = dict()
+        layerLinks = { data_import.tlinkEventTimexFile : eventTimexLinks.get(file), \
+                       data_import.tlinkEventDCTFile   : eventDCTLinks.get(file), \
+                       data_import.tlinkSubEventsFile  : subEventLinks.get(file), \
+                       data_import.tlinkMainEventsFile : mainEventLinks.get(file) }
+        for (tokens, eventIDs, timexIDs) in self.sentences:
+            for eventID in eventIDs:
+                if eventID in self.links:
+                    continue
+                links = []
+                for layer in linkLayers:
+                    fileLinks = layerLinks[layer]
+                    if fileLinks is not None and eventID in fileLinks:
+                        for [entityA, relation, entityB, comment] in fileLinks[eventID]:
+                            # Links are listed under both entities: take only
+                            # the ones starting from the event
+                            if (eventID == entityA):
+                                links.append( (layer, entityA, relation, entityB, comment) )
+                self.links[eventID] = links
+
+    def getLinks(self, eventID):
+        ''' Returns TLINKs of the event: a list of (layer, entityA, relation,
+            entityB, comment); '''
+        return self.links.get(eventID, [])
+
+    def getExpression(self, entityID, isTimex = False):
+        ''' Returns the expression of the EVENT (or TIMEX, if isTimex) with
+            the given ID; '''
+        key = (entityID, isTimex)
+        expression = self.expressions.get(key)
+        if expression is None:
+            entitiesByID = self.timexesByID if isTimex else self.eventsByID
+            if entitiesByID is None or entityID not in entitiesByID:
+                raise Exception(" Unable to the retrieve expression for the entity "+entityID)
+            # Collect entity expressions
+            expressions = set()
+            for item in entitiesByID[entityID]:
+                # [sentenceID, wordID, expression, annotation]
+                expressions.add( item[2] )
+            if (len(expressions) != 1):
+                raise Exception(" Unexpected number of expressions for "+entityID+": "+str(expressions))
+            expression = expressions.pop()
+            self.expressions[key] = expression
+        return expression
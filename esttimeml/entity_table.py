@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+#
+#    Entity table: EVENT or TIMEX annotations of a single document (of a
+#   single annotator), stored once as rows of entity tokens:
+#
+#       (sentenceID, wordID, expression, annotation, entityID)
+#
+#   along with secondary indices pointing to the rows: by location
+#   (sentenceID, wordID), by the integer ID of the entity, and by sentence
+#   number. The table is exposed through two views, which provide the same
+#   mapping interfaces as the dicts that the loaders used to build:
+#
+#       EntityLocView :  (sentenceID, wordID) -> [[entityID, expression, annotation], ...]
+#       EntityIDView  :  entityID -> [[sentenceID, wordID, expression, annotation], ...]
+#
+#   Entity IDs are mapped to dense integers by an EntityIDTable, which is
+#   shared by all layers of the document (see data_import.assignEntityIDs()),
+#   so the same entity has the same integer ID in the layers of all the
+#   annotators; the views map the integers back to the entity IDs.
+#
+#   Deletion only removes row numbers from the indices (the rows themselves
+#   are kept), so deleting a token costs O(1) plus the length of the index
+#   list it is removed from.
+#
+#    Developed and tested under Python's version: 3.4.1
+#
+
+import re
+from array import array
+from collections.abc import Mapping
+
+timexIDPattern = re.compile('^t[0-9]+$')
+
+class EntityIDTable(object):
+    ''' Maps entity IDs of a single document (e.g. 'e12', 't3', 't0') to
+        dense integers 0..n-1, in the order in which the IDs are added, and
+        integers back to the entity IDs;
+    '''
+
+    def __init__(self):
+        self.strings = []
+        self.ints    = dict()
+        self.timexes = bytearray()
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __contains__(self, entityID):
+        return entityID in self.ints
+
+    def add(self, entityID):
+        ''' Returns the integer ID of the entity; an entity missing from the
+            table gets the next integer; '''
+        intID = self.ints.get(entityID)
+        if intID is None:
+            intID = len(self.strings)
+            self.ints[entityID] = intID
+            self.strings.append( entityID )
+            self.timexes.append( 1 if timexIDPattern.match(entityID) else 0 )
+        return intID
+
+    def toInt(self, entityID):
+        ''' Returns the integer ID of the entity, or None, if the entity is
+            not in the table; '''
+        return self.ints.get(entityID)
+
+    def toString(self, intID):
+        return self.strings[intID]
+
+    def isTimex(self, intID):
+        ''' Whether the entity is a TIMEX (its ID is 't' followed by digits,
+            e.g. the DCT 't0'); '''
+        return self.timexes[intID] == 1
+
+
+class EntityTable(object):
+    ''' Entity tokens of a single document, with indices by location, by the
+        integer ID of the entity, and by sentence number; '''
+
+    def __init__(self):
+        self.rows     = []
+        # Integer IDs of the entities of the rows (see EntityIDTable)
+        self.ids      = EntityIDTable()
+        self.rowIDs   = array('i')
+        self.locIndex = dict()
+        self.idIndex  = dict()
+        # sentence number -> [(word number, (sentenceID, wordID)), ...]
+        self.sentIndex = dict()
+
+    def addRow(self, sentenceID, wordID, expression, annotation, entityID):
+        i = len(self.rows)
+        intID = self.ids.add(entityID)
+        self.rows.append( (sentenceID, wordID, expression, annotation, entityID) )
+        self.rowIDs.append( intID )
+        locKey = (sentenceID, wordID)
+        rows = self.locIndex.get(locKey)
+        if rows is None:
+            self.locIndex[locKey] = [ i ]
+            sentence = self.sentIndex.get(int(sentenceID))
+            if sentence is None:
+                self.sentIndex[int(sentenceID)] = [ (int(wordID), locKey) ]
+            else:
+                sentence.append( (int(wordID), locKey) )
+        else:
+            rows.append( i )
+        rows = self.idIndex.get(intID)
+        if rows is None:
+            self.idIndex[intID] = [ i ]
+        else:
+            rows.append( i )
+
+    def setEntityIDs(self, ids):
+        ''' Renumbers the entities with the integer IDs of the given
+            EntityIDTable (the table shared by all layers of the document); '''
+        if ids is self.ids:
+            return
+        remap = [ ids.add(entityID) for entityID in self.ids.strings ]
+        self.rowIDs  = array('i', [ remap[intID] for intID in self.rowIDs ])
+        self.idIndex = dict( (remap[intID], rows) for (intID, rows) in self.idIndex.items() )
+        self.ids     = ids
+
+    def getRowsAtLocation(self, locKey):
+        return [ self.rows[i] for i in self.locIndex[locKey] ]
+
+    def getRowsOfEntity(self, intID):
+        return [ self.rows[i] for i in self.idIndex[intID] ]
+
+    def getLocationsOfSentence(self, sentenceNr):
+        ''' Returns the (non-deleted) locations of the sentence as a list of
+            (word number, (sentenceID, wordID)), in the order of the rows; '''
+        return [ (wordNr, locKey) for (wordNr, locKey) in self.sentIndex.get(sentenceNr, []) \
+                 if locKey in self.locIndex ]
+
+    def findLocation(self, sentenceNr, wordNr):
+        ''' Returns the location (sentenceID, wordID) of the given sentence
+            and word number, or None, if there are no annotations at the
+            location; '''
+        for (locWordNr, locKey) in self.getLocationsOfSentence(sentenceNr):
+            if locWordNr == wordNr:
+                return locKey
+        return None
+
+    # =======================================================
+    #    Deletion
+    # =======================================================
+
+    def deleteLocation(self, locKey):
+        ''' Removes the location (with all its annotations) from the location
+            index; '''
+        del self.locIndex[locKey]
+
+    def deleteEntity(self, intID):
+        ''' Removes the entity (with all its tokens) from the entity index; '''
+        del self.idIndex[intID]
+
+    def deleteEntityAtLocation(self, intID, locKey):
+        ''' Removes annotations of the entity from the location in the location
+            index; if no annotations remain at the location, the location is
+            removed; '''
+        if locKey in self.locIndex:
+            rows = [ i for i in self.locIndex[locKey] if self.rowIDs[i] != intID ]
+            if rows:
+                self.locIndex[locKey] = rows
+            else:
+                del self.locIndex[locKey]
+
+    def deleteLocationOfEntity(self, intID, locKey):
+        ''' Removes the (first) token of the entity at the location from the
+            entity index; '''
+        rows = self.idIndex[intID]
+        for j in range(len(rows)):
+            row = self.rows[ rows[j] ]
+            if row[0] == locKey[0] and row[1] == locKey[1]:
+                del rows[j]
+                break
+
+
+class EntityLocView(Mapping):
+    ''' Location view of the table: (sentenceID, wordID) -> list of
+        [entityID, expression, annotation]; '''
+
+    def __init__(self, table):
+        self.table = table
+
+    def __getitem__(self, locKey):
+        rows = self.table.rows
+        return [ [rows[i][4], rows[i][2], rows[i][3]] for i in self.table.locIndex[locKey] ]
+
+    def __delitem__(self, locKey):
+        self.table.deleteLocation(locKey)
+
+    def __contains__(self, locKey):
+        return locKey in self.table.locIndex
+
+    def __iter__(self):
+        return iter(self.table.locIndex)
+
+    def __len__(self):
+        return len(self.table.locIndex)
+
+    def __repr__(self):
+        return repr( dict(self.items()) )
+
+
+class EntityIDView(Mapping):
+    ''' EntityID view of the table: entityID -> list of
+        [sentenceID, wordID, expression, annotation]; '''
+
+    def __init__(self, table):
+        self.table = table
+
+    def _getIntID(self, entityID):
+        intID = self.table.ids.toInt(entityID)
+        if intID is None or intID not in self.table.idIndex:
+            raise KeyError(entityID)
+        return intID
+
+    def __getitem__(self, entityID):
+        rows = self.table.rows
+        return [ [rows[i][0], rows[i][1], rows[i][2], rows[i][3]] \
+                 for i in self.table.idIndex[ self._getIntID(entityID) ] ]
+
+    def __delitem__(self, entityID):
+        self.table.deleteEntity( self._getIntID(entityID) )
+
+    def __contains__(self, entityID):
+        intID = self.table.ids.toInt(entityID)
+        return intID is not None and intID in self.table.idIndex
+
+    def __iter__(self):
+        toString = self.table.ids.toString
+        return iter( [ toString(intID) for intID in self.table.idIndex ] )
+
+    def __len__(self):
+        return len(self.table.idIndex)
+
+    def __repr__(self):
+        return repr( dict(self.items()) )
@@ -9,24 +9,34 @@
 
 import re
 
-import sol_format_tools
-import dependency_trees
+from . import sol_format_tools
+from . import dependency_trees
 
 # =========================================================================
 #    Various useful utils
 # =========================================================================
 
 def gatherAllAnnotationsOfTheSentence( file, annotators, targetSentID, eventAnnotationsByLoc, tmxAnnotationsByLoc ):
-    ''' Gathers all entity annotations of the sentence. '''
+    ''' Gathers all entity annotations of the sentence (from the sentence 
+        index of the entity tables, see entity_table.py). Entities are given 
+        by their integer IDs, which are shared by all entity tables of the
+        file; '''
     annotations = []
+    ids = None
     for annotator in annotators:
         for dataDict in [eventAnnotationsByLoc, tmxAnnotationsByLoc]:
             if annotator in dataDict:
                 if file in dataDict[annotator]:
-                    for (sentenceID, wordID) in dataDict[annotator][file]:
-                        if int(sentenceID) == int(targetSentID):
-                            for [eID, expr, ann] in dataDict[annotator][file][(sentenceID, wordID)]:
-                                annotations.append( [ annotator, int(sentenceID), int(wordID), eID, expr, ann ] )
+                    table = dataDict[annotator][file].table
+                    if ids is None:
+                        ids = table.ids
+                    elif table.ids is not ids:
+                        raise Exception(" Entity tables of "+file+" do not share the entity ID table.")
+                    rows = table.rows
+                    for (wordID, locKey) in table.getLocationsOfSentence(targetSentID):
+                        for i in table.locIndex[locKey]:
+                            annotations.append( [ annotator, targetSentID, wordID, table.rowIDs[i], \
+                                                  rows[i][2], rows[i][3] ] )
             else:
                 raise Exception(' Missing data for annotator: ', annotator)
     return annotations
@@ -51,14 +61,14 @@ def getSubordinatedTimexes(sentence, labels, clbFinLabels, allSentenceAnnotation
     timexAnnotationsIDs = []
     timexHeader = re.compile('^\s*TIMEX3?\s(DATE|TIME|SET|DURATION|UNK)')
     if (len(labels) > 0):
-        sentLabels = [ int(sentence[j][4]) for j in range(len(sentence)) ]
+        sentLabels = [ sentence[j][4] for j in range(len(sentence)) ]
         for i in range(len(sentence)):
             [ sentenceID, wordID, token, morphSynt, label, parentLabel ] = sentence[i]
             #(token2, morphSynt2, label2, parentLabel2, anno2) = sentence[i]
             if (parentLabel in labels):
                 if (not sol_format_tools.in_different_clauses(sentence, labels[0], label, clbFinLabels = clbFinLabels)):
                     for [ annotator, sentenceID_int, wordID_int, eID, expr, ann ] in allSentenceAnnotations:
-                        if (sentLabels[wordID_int] == int(label) and annotator == focusAnnotator and (ann.strip()).startswith('TIMEX')):
+                        if (sentLabels[wordID_int] == label and annotator == focusAnnotator and (ann.strip()).startswith('TIMEX')):
                             if timexHeader.match(ann):
                                 timexAnnotations.append( ann )
                                 timexAnnotationsIDs.append( eID )
@@ -689,7 +699,7 @@ def filterEventsAccordingToKey(filterKey, annotation, tokenStruct, sentence, sen
                         for wid in widSeq:
                             eClass = "---"
                             for a in judgeAnnotations:
-                                if int(wid) == int(a[2]) and eventHeader.match( a[5] ):
+                                if wid == a[2] and eventHeader.match( a[5] ):
                                     eClass = ((a[5]).split())[1]
                                     break
                             classSeq.append( eClass )
@@ -764,116 +774,87 @@ def deleteEventAnnotation(annotator, file, sentID, wordID, eventAnnotationsByLoc
     if annotator not in eventAnnotationsByIDs or file not in eventAnnotationsByIDs[annotator]:
         return
     headerTag = re.compile('^(EVENT|TIMEX)\s+([A-Z_]+)\s*')
-    sentID = str(sentID)
-    wordID = str(wordID)
-    if (sentID, wordID) in eventAnnotationsByLoc[annotator][file]:
+    #  Both views (by locations and by IDs) of the file share the same 
+    #  entity table (see entity_table.py), so deletions are made only on 
+    #  the indices of the table (entities are given by their integer IDs);
+    table = eventAnnotationsByLoc[annotator][file].table
+    if eventAnnotationsByIDs[annotator][file].table is not table:
+        raise Exception(" Location and ID views of "+file+" do not share the entity table.")
+    locKey = table.findLocation(sentID, wordID)
+    if locKey is not None:
+        (sentID, wordID) = locKey
         idsToFullyDelete     = []
         idsToPartiallyDelete = []
-        for ann in eventAnnotationsByLoc[annotator][file][(sentID, wordID)]:
-            [entityID, expression, annotation] = ann
-            if headerTag.match(annotation):
+        for i in table.locIndex[locKey]:
+            if headerTag.match(table.rows[i][3]):
                 # If the header event gets deleted, it must be deleted at 
                 # full span. Record the ID for this
-                idsToFullyDelete.append( entityID )
+                idsToFullyDelete.append( table.rowIDs[i] )
                 deletedAnnoLocalStats["_del_IDs"] += 1
             else:
-                idsToPartiallyDelete.append( entityID )
+                idsToPartiallyDelete.append( table.rowIDs[i] )
             deletedAnnoLocalStats["_del_tokens"] += 1
         # Delete all annotations from given location
-        del eventAnnotationsByLoc[annotator][file][(sentID, wordID)]
+        table.deleteLocation( locKey )
         # Delete all annotations covered by deleted header events
         if idsToFullyDelete:
             locsToDelete = []
             for eid in idsToFullyDelete:
                 # Find additional locations of the event span
-                for ann in eventAnnotationsByIDs[annotator][file][eid]:
-                    [sID, wID, expression, annotation] = ann
+                for (sID, wID, expression, annotation, entityID) in table.getRowsOfEntity(eid):
                     if sentID != sID or wordID != wID:
                         locsToDelete.append( [sID, wID, eid])
                         deletedAnnoLocalStats["_del_tokens"] += 1
-                del eventAnnotationsByIDs[annotator][file][eid]
+                table.deleteEntity( eid )
             # Delete events from all additional locations
-            if locsToDelete:
-                for [sID, wID, eid] in locsToDelete:
-                    if (sID, wID) in eventAnnotationsByLoc[annotator][file]:
-                        locations = len(eventAnnotationsByLoc[annotator][file][(sID, wID)])
-                        indexesToDelete = []
-                        for i in range(locations):
-                            ann = eventAnnotationsByLoc[annotator][file][(sID, wID)][i]
-                            [entityID, expression, annotation] = ann
-                            if entityID == eid:
-                                indexesToDelete.append(i)
-                        for r in sorted(indexesToDelete, reverse=True):
-                            del eventAnnotationsByLoc[annotator][file][(sID, wID)][r]
-                        if len(eventAnnotationsByLoc[annotator][file][(sID, wID)]) == 0:
-                            del eventAnnotationsByLoc[annotator][file][(sID, wID)]
+            for [sID, wID, eid] in locsToDelete:
+                table.deleteEntityAtLocation( eid, (sID, wID) )
         # Delete locations (sentID, wordID) from eventsByIDs;
-        if idsToPartiallyDelete:
-            for eid in idsToPartiallyDelete:
-                anns = eventAnnotationsByIDs[annotator][file][eid]
-                j = -1
-                for i in range(len(anns)):
-                    if anns[i][0] == sentID and anns[i][1] == wordID:
-                        j = i
-                        break
-                if j > -1:
-                    del eventAnnotationsByIDs[annotator][file][eid][j]
+        for eid in idsToPartiallyDelete:
+            table.deleteLocationOfEntity( eid, (sentID, wordID) )
 
 #
-#   Deletes all relations that are associated with the event (given by eventID)
-#   from the collection of tlinks (the collection is indexed by event ids):
-#   *) Deletes the entry indexed by the eventID from the collection;
-#   *) Looks through all the other entries and if they contain relation
-#      annotations involving the event, also deletes these annotations;
+#   Deletes all relations that are associated with the event (given by its 
+#   integer ID) from the collection of tlinks (the collection is indexed by 
+#   event ids):
+#   *) Deletes the entry indexed by the event from the collection;
+#   *) Deletes all relation annotations involving the event (found via the
+#      adjacency of the event in the TLINKGraph, see tlink_store.py);
 #
 def deleteAllRelationsAssociatedWithEvent( file, annotator, eventID, tlinks ):
     if annotator not in tlinks or file not in tlinks[annotator]:
         return
-    if eventID in tlinks[annotator][file]:
-        #debugRelsDeleted += len(tlinks[annotator][file][eventID])
-        del tlinks[annotator][file][eventID]
-    for eID in tlinks[annotator][file]:
-        toDelete = []
-        for i in range(len(tlinks[annotator][file][eID])):
-            [entityA, relation, entityB, comment] = \
-                tlinks[annotator][file][eID][i]
-            if entityA == eventID or entityB == eventID:
-                toDelete.append( tlinks[annotator][file][eID][i] )
-        if toDelete:
-            #debugRelsDeleted += len(toDelete)
-            for annotation in toDelete:
-                tlinks[annotator][file][eID].remove(annotation)
+    tlinks[annotator][file].graph.deleteEntity( eventID )
 
 #
 #    Filters all collections of relations, and deletes the relations associated
 #   with events not present in eventAnnotationsByIds (events annotated by the judge);
+#   Events are compared by their integer IDs (the TLINK layers of a file must 
+#   share the EntityIDTable of the file, as the loaders do; the events of the
+#   judge are renumbered with it, if these were loaded separately, e.g. 
+#   filtered in a worker process);
 #
 def filterOutDeletedRelations(eventTimexLinks, eventDCTLinks, mainEventLinks, \
                               subEventLinks, eventAnnotationsByIds, judge, debug=True):
-    timexIndex = re.compile('^t[0-9]+$')
     eventsRemovedTotal = 0
     for file in sorted( eventAnnotationsByIds[judge] ):
         debugRelsDeleted = 0
-        existingEvents = eventAnnotationsByIds[judge][file]
+        existingEvents = eventAnnotationsByIds[judge][file].table
         for annotator in ['a', 'b', 'c', 'j']:
             # 1) Gather all eventIDs that refer to events to be deleted from given file
             toDelete = {}
-            if annotator in eventTimexLinks and file in eventTimexLinks[annotator]:
-                for index in eventTimexLinks[annotator][file]:
-                    if index not in existingEvents and not timexIndex.match(index):
-                        toDelete[ index ] = 1
-            if annotator in eventDCTLinks and file in eventDCTLinks[annotator]:
-                for index in eventDCTLinks[annotator][file]:
-                    if index not in existingEvents and not timexIndex.match(index):
-                        toDelete[ index ] = 1
-            if annotator in mainEventLinks and file in mainEventLinks[annotator]:
-                for index in mainEventLinks[annotator][file]:
-                    if index not in existingEvents and not timexIndex.match(index):
-                        toDelete[ index ] = 1
-            if annotator in subEventLinks and file in subEventLinks[annotator]:
-                for index in subEventLinks[annotator][file]:
-                    if index not in existingEvents and not timexIndex.match(index):
-                        toDelete[ index ] = 1
+            ids = None
+            for tlinks in [ eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks ]:
+                if annotator in tlinks and file in tlinks[annotator]:
+                    graph = tlinks[annotator][file].graph
+                    if ids is None:
+                        ids = graph.ids
+                        existingEvents.setEntityIDs( ids )
+                    elif graph.ids is not ids:
+                        raise Exception(" TLINK layers of "+file+" do not share the entity ID table.")
+                    for index in graph.keys:
+                        if index not in existingEvents.idIndex and not graph.ids.isTimex(index):
+                            toDelete[ index ] = 1
             eventsRemovedTotal += len(toDelete.keys())
             # 2) Perform the deletion
             for eventID in toDelete.keys():
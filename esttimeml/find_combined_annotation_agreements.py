@@ -0,0 +1,508 @@
+# -*- coding: utf-8 -*- 
+#
+#     Script for calculating combined (EVENT, TLINK) annotation agreements.
+#    Also allows to filter EVENT (and associated TLINK) annotations based 
+#    on linguistic constraints, using filtering methods implemented in 
+#    'filtering_utils.py';
+#
+#    Required input arguments:
+#       <corpus_dir> <experimentID>
+#
+#    The filtered EVENT annotations and the resulting counters of the
+#    experiment are cached on disk (see disk_cache.py), keyed by the content
+#    of the corpus, the experiment and the version of the code, so repeated
+#    runs of the same experiment only print the cached results (the option
+#    --no-cache disables the cache);
+#
+#    Developed and tested under Python's version: 3.4.1
+#    (the option --jobs requires Python's version 3.8 or newer, see corpus_shm.py)
+#
+
+import sys, os, re
+
+from . import data_import
+from . import ia_agreements
+from . import dependency_trees
+from . import sol_format_tools
+from . import filtering_utils
+from . import corpus_shm
+from . import corpus_columnar
+from . import disk_cache
+from .corpus import Corpus
+from .entity_table import EntityLocView, EntityIDView
+
+defaultFilterKey = '2a'
+judge = 'j'
+
+#  Modules whose code the cached filtered annotations and counters depend on
+filteringCodeModules = ("data_import", "entity_table", "tlink_store", "corpus_columnar", \
+                        "dependency_trees", "sol_format_tools", "filtering_utils", \
+                        "find_combined_annotation_agreements")
+countersCodeModules  = filteringCodeModules + ("ia_agreements",)
+
+# =========================================================================
+#    Recording the counts and agreements
+# =========================================================================
+
+#  Records the count of events by considering the number of tokens covered
+#  by events with unique ids
+def recordEventCounts(eventAnnotationsByLocs, countingPhase, totalCounter, file, judge):
+    headerTag = re.compile('^(EVENT|TIMEX)\s+([A-Z_]+)\s*')
+    allUniqAnnotatorEvents = dict()
+    for annotator in eventAnnotationsByLocs:
+        idsCounted = dict()
+        if file in eventAnnotationsByLocs[annotator]:
+            for (sentID, wordID) in sorted(eventAnnotationsByLocs[annotator][file]):
+                for ann in sorted(eventAnnotationsByLocs[annotator][file][(sentID, wordID)]):
+                    [entityID, expression, annotation] = ann
+                    if (entityID not in idsCounted):
+                        totalCounter.addToCount(countingPhase, annotator, "_", 1)
+                        totalCounter.addToCount(countingPhase, "_all", "_", 1)
+                        idsCounted[entityID] = 1
+                        if (annotator != judge):
+                            allUniqAnnotatorEvents[(sentID, wordID)] = 1
+    totalCounter.addToCount(countingPhase, "_all_uniq_anns", "_", len( allUniqAnnotatorEvents.keys() ))
+
+
+# Records TLINK counts (over all layers)
+def recordTLINKCounts(eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks, \
+                      relCountKey, totalCounter, judge):
+    for annotator in ['a', 'b', 'c', 'j']:
+        tlinks1 = data_import.get_relation_annotations_as_list(eventTimexLinks[annotator])
+        tlinks2 = data_import.get_relation_annotations_as_list(eventDCTLinks[annotator])
+        tlinks3 = data_import.get_relation_annotations_as_list(mainEventLinks[annotator])
+        tlinks4 = data_import.get_relation_annotations_as_list(subEventLinks[annotator])
+        if (relCountKey == "_all"):
+            #  Fills the initial counts section
+            totalCounter.addToCount("total-count-tlinks", annotator, "_", len(tlinks1))
+            totalCounter.addToCount("total-count-tlinks", annotator, "_", len(tlinks2))
+            totalCounter.addToCount("total-count-tlinks", annotator, "_", len(tlinks3))
+            totalCounter.addToCount("total-count-tlinks", annotator, "_", len(tlinks4))
+            if annotator != judge:
+                totalCounter.addToCount("total-count-tlinks", "_all", "_", len(tlinks1))
+                totalCounter.addToCount("total-count-tlinks", "_all", "_", len(tlinks2))
+                totalCounter.addToCount("total-count-tlinks", "_all", "_", len(tlinks3))
+                totalCounter.addToCount("total-count-tlinks", "_all", "_", len(tlinks4))
+            if annotator == judge:
+                # Record annotations of the judge, phase by phase
+                totalCounter.addToCount( "total-count-tlinks", judge, "tlink_layer_1", len(tlinks1) )
+                totalCounter.addToCount( "total-count-tlinks", judge, "tlink_layer_2", len(tlinks2) )
+                totalCounter.addToCount( "total-count-tlinks", judge, "tlink_layer_3", len(tlinks3) )
+                totalCounter.addToCount( "total-count-tlinks", judge, "tlink_layer_4", len(tlinks4) )
+        elif (relCountKey == "_remain"):
+            #  Fills the remaining counts section
+            layers = ["1-event_timex", "2-event_dct", "3-main_events", "4-event_event"]
+            links  = [tlinks1, tlinks2, tlinks3, tlinks4]
+            for l in range(len(layers)):
+                #
+                # Data format:
+                #  [file, entityA, relation, entityB, comment]
+                #
+                for [file, entityA, rel, entityB, comment] in links[l]:
+                    totalCounter.addToCount("total-count-remaining-tlinks", annotator, "_", 1)
+                    totalCounter.addToCount("total-count-remaining-tlinks", "_all", layers[l], 1)
+                    totalCounter.addToCount("total-count-remaining-tlinks", "_all", "_all", 1)
+                    if rel == 'VAGUE':
+                        totalCounter.addToCount("total-count-remaining-tlinks", "_all", "_vague", 1)
+                        totalCounter.addToCount("total-count-remaining-tlinks", annotator, "_vague", 1)
+        else:
+            raise Exception (" Unexpected relCountKey: "+relCountKey)
+
+
+def recordEventAnnotationAgreementsOnFile(fileName, annotators, eventAnnotationsByLoc, \
+                                          eventAnnotationsByIds, totalCounter):
+    ''' Calculates event annotation agreements (on both extent + specific attributes) 
+        between all pairs of annotators that have annotated given file.
+        Records agreements in terms of precision, recall and F-score into the 
+        totalCounter for aggregation.
+    '''
+    pairs = []
+    if (len(annotators) == 2):
+        pairs = [ [annotators[0], annotators[1]] ]
+    elif (len(annotators) == 3):
+        pairs = [ [annotators[0], annotators[1]], \
+                  [annotators[1], annotators[2]], \
+                  [annotators[0], annotators[2]] ]
+    else:
+        raise Exception(" Unexpected number of annotators:", len(annotators))
+    # Find agreements on entity extents
+    allRes = dict()
+    for pair in pairs:
+        [a, b] = sorted(pair, reverse=('j' in pair))
+        eveA = eventAnnotationsByIds[a][fileName] if fileName in eventAnnotationsByIds[a] else {}
+        eveB = eventAnnotationsByIds[b][fileName] if fileName in eventAnnotationsByIds[b] else {}
+        (res, pairName) = \
+            ia_agreements.compAnnotationExtents("EVENT", a, b, eveA, eveB, totalCounter, multipleStrategy = 'largest')
+        for k in res.keys():
+            if (k not in allRes):
+               allRes[k] = dict()
+            allRes[k][pairName] = res[k]
+    # Find agreements on entity attributes
+    allRes = dict()
+    for pair in pairs:
+        [a, b] = sorted(pair, reverse=('j' in pair))
+        eveA = eventAnnotationsByIds[a][fileName] if fileName in eventAnnotationsByIds[a] else {}
+        eveB = eventAnnotationsByIds[b][fileName] if fileName in eventAnnotationsByIds[b] else {}
+        (res, pairName) = \
+            ia_agreements.compAnnotationAttribsFscore("EVENT", a, b, eveA, eveB, totalCounter, multipleStrategy = 'largest', countOnlyAligned = True)
+        for k in res.keys():
+            if (k not in allRes):
+               allRes[k] = dict()
+            allRes[k][pairName] = res[k]
+
+
+def recordTlinkAnnotationAgreements(eventTimexLinks, eventDCTLinks, mainEventLinks, \
+                                    subEventLinks, judge, totalCounter, fileToAnnotators):
+    ''' Records relation annotation agreements (matching and mismatching annotations)
+        over all relation layers and between all annotator pairs.
+    '''
+    # ============================================
+    #    1-tlinks-event-timex
+    # ============================================
+    allAnnotations = dict()
+    for annotator in ['a', 'b', 'c', 'j']:
+        allAnnotations[annotator] = eventTimexLinks[annotator]
+    ia_agreements.record_tlinks_matches(allAnnotations, "event_timex", "base", totalCounter, fileToAnnotators)
+    ia_agreements.record_tlinks_matches(allAnnotations, "event_timex", "rel_3_1", totalCounter, fileToAnnotators)
+    ia_agreements.record_tlinks_matches(allAnnotations, "event_timex", "rel_3_2", totalCounter, fileToAnnotators)
+    ia_agreements.record_tlinks_matches(allAnnotations, "event_timex", "rel_ovrl", totalCounter, fileToAnnotators)
+
+    # ============================================
+    #    2-tlinks-event-dct
+    # ============================================
+    allAnnotations = dict()
+    for annotator in ['a', 'b', 'c', 'j']:
+        allAnnotations[annotator] = eventDCTLinks[annotator]
+    ia_agreements.record_tlinks_matches(allAnnotations, "event_dct", "base", totalCounter, fileToAnnotators)
+    ia_agreements.record_tlinks_matches(allAnnotations, "event_dct", "rel_3_1", totalCounter, fileToAnnotators)
+    ia_agreements.record_tlinks_matches(allAnnotations, "event_dct", "rel_3_2", totalCounter, fileToAnnotators)
+    ia_agreements.record_tlinks_matches(allAnnotations, "event_dct", "rel_ovrl", totalCounter, fileToAnnotators)
+    
+    # ============================================
+    #    3-tlinks-main-events
+    # ============================================ 
+    allAnnotations = dict()
+    for annotator in ['a', 'b', 'c', 'j']:
+        allAnnotations[annotator] = mainEventLinks[annotator]
+    ia_agreements.record_tlinks_matches(allAnnotations, "main_events", "base", totalCounter, fileToAnnotators)
+    ia_agreements.record_tlinks_matches(allAnnotations, "main_events", "rel_3_1", totalCounter, fileToAnnotators)
+    ia_agreements.record_tlinks_matches(allAnnotations, "main_events", "rel_3_2", totalCounter, fileToAnnotators)
+    ia_agreements.record_tlinks_matches(allAnnotations, "main_events", "rel_ovrl", totalCounter, fileToAnnotators)
+    
+    # ============================================
+    #    4-tlinks-main-events
+    # ============================================
+    allAnnotations = dict()
+    for annotator in ['a', 'b', 'c', 'j']:
+        allAnnotations[annotator] = subEventLinks[annotator]
+    ia_agreements.record_tlinks_matches(allAnnotations, "event_event", "base", totalCounter, fileToAnnotators)
+    ia_agreements.record_tlinks_matches(allAnnotations, "event_event", "rel_3_1", totalCounter, fileToAnnotators)
+    ia_agreements.record_tlinks_matches(allAnnotations, "event_event", "rel_3_2", totalCounter, fileToAnnotators)
+    ia_agreements.record_tlinks_matches(allAnnotations, "event_event", "rel_ovrl", totalCounter, fileToAnnotators)
+
+
+# =========================================================================
+#    Filtering and recording event agreements file by file
+# =========================================================================
+
+def filterAndRecordFile(file, annotators, sentences, eventAnnotationsByLoc, eventAnnotationsByIds, \
+                        tmxAnnotationsByLoc, tmxAnnotationsByIds, filterKey, totalCounter, \
+                        deletedAnnotationsByLoc, deletedEVENTStatistics, repairSyntax = False, \
+                        sentTrees = None, filteredTables = None):
+    ''' Builds dependency trees of the file, filters out events of the file, and 
+        records event counts (before and after filtering) and event annotation 
+        agreements on the remaining events into the totalCounter;
+        If repairSyntax, invalid dependency structures of the sentences are 
+        repaired before building the trees (see dependency_trees.py);
+        sentTrees are the trees of the file, if these are already built; 
+        filteredTables (annotator -> EntityTable) are the filtered events of
+        the file from an earlier run: if given, these replace the events of 
+        the file, instead of filtering them;
+    '''
+    if repairSyntax:
+        sentences = [ dependency_trees.repair_dependency_structure(sentence)[0] \
+                      for sentence in sentences ]
+    # Construct trees
+    if sentTrees is None and filteredTables is None:
+        sentTrees = dependency_trees.build_dependency_trees( sentences )
+        dependency_trees.add_clause_info_to_trees( sentences, sentTrees )
+    
+    recordEventCounts(eventAnnotationsByLoc, "total-count-events", \
+                      totalCounter, file, judge)
+    if filteredTables is not None:
+        for annotator in filteredTables:
+            eventAnnotationsByLoc[annotator][file] = EntityLocView( filteredTables[annotator] )
+            eventAnnotationsByIds[annotator][file] = EntityIDView( filteredTables[annotator] )
+    else:
+        # Filter out events based on morphological/syntactic/other constraints
+        filtering_utils.filterAnnotations(file, annotators, judge, sentences,\
+                          sentTrees, eventAnnotationsByLoc, tmxAnnotationsByLoc, \
+                          eventAnnotationsByIds, tmxAnnotationsByIds, filterKey, \
+                          deletedAnnotationsByLoc, deletedEVENTStatistics, debug=False)
+    recordEventCounts(eventAnnotationsByLoc, "total-count-remaining-events", \
+                      totalCounter, file, judge)
+    # Find annotation agreements on the set of remaining events
+    recordEventAnnotationAgreementsOnFile(file, annotators, eventAnnotationsByLoc, \
+                                          eventAnnotationsByIds, totalCounter)
+
+
+def filterAndRecordFileInWorker(task):
+    ''' filterAndRecordFile() in a worker process: annotations of the file are
+        unpacked from the shared corpus (see corpus_shm.py). Returns a tuple
+        (counter, deletedEVENTStatistics, eventTables), where eventTables maps
+        each annotator to the filtered EntityTable of the file;
+    '''
+    (file, annotators, filterKey, repairSyntax) = task
+    shared = corpus_shm.getAttachedCorpus()
+    eventAnnotationsByLoc, eventAnnotationsByIds = shared.getDocumentEntityLayers("event", file)
+    tmxAnnotationsByLoc, tmxAnnotationsByIds = shared.getDocumentEntityLayers("timex", file)
+    counter = ia_agreements.AggregateCounter()
+    deletedEVENTStatistics = dict()
+    filterAndRecordFile(file, annotators, shared.getSentences(file), eventAnnotationsByLoc, \
+                        eventAnnotationsByIds, tmxAnnotationsByLoc, tmxAnnotationsByIds, \
+                        filterKey, counter, dict(), deletedEVENTStatistics, repairSyntax)
+    eventTables = dict()
+    for annotator in eventAnnotationsByLoc:
+        if file in eventAnnotationsByLoc[annotator]:
+            eventTables[annotator] = eventAnnotationsByLoc[annotator][file].table
+    return (counter, deletedEVENTStatistics, eventTables)
+
+
+def recordTlinkAgreementsOnFile(file, annotators, tlinks, eventAnnotationsByIds, totalCounter):
+    ''' Records TLINK counts of the file, filters out relations of the deleted
+        events, and records TLINK counts and agreements on the remaining 
+        relations of the file into the totalCounter (all of these are counted 
+        file by file, so the results are the same as over the whole corpus);
+    '''
+    (eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks) = tlinks
+    recordTLINKCounts(eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks,\
+                      "_all", totalCounter, judge)
+    filtering_utils.filterOutDeletedRelations(eventTimexLinks, eventDCTLinks, mainEventLinks, \
+                                              subEventLinks, eventAnnotationsByIds, judge)
+    recordTLINKCounts(eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks,\
+                      "_remain", totalCounter, judge)
+    recordTlinkAnnotationAgreements(eventTimexLinks, eventDCTLinks, mainEventLinks, \
+                                    subEventLinks, judge, totalCounter, { file : annotators })
+
+
+def processCorpusStreaming(corpusDir, filterKey, totalCounter, deletedEVENTStatistics, \
+                           repairSyntax = False):
+    ''' Bounded-memory mode (--stream): streams the corpus document by 
+        document (see data_import.iterateDocuments()) and passes each document
+        through the whole pipeline -- building the trees, filtering, and
+        recording event and TLINK agreements --, so that only the counters 
+        are kept in memory. Processes the files annotated by the judge, and
+        returns the list of the processed files;
+    '''
+    processedFiles = []
+    for document in data_import.iterateDocuments(corpusDir):
+        file = document.file
+        eventAnnotationsByLoc, eventAnnotationsByIds, \
+        tmxAnnotationsByLoc, tmxAnnotationsByIds = document.getEntityAnnotations()
+        if file not in eventAnnotationsByIds[judge]:
+            continue
+        print (" Processing "+file+" ... ", end="")
+        annotators = [annotator for annotator in eventAnnotationsByIds \
+                      if file in eventAnnotationsByIds[annotator]]
+        if (len(annotators) < 3):
+            raise Exception(" Too few annotators for the file "+file+" "+str(len(annotators)))
+        filterAndRecordFile(file, annotators, document.baseAnnotations[file], eventAnnotationsByLoc, \
+                            eventAnnotationsByIds, tmxAnnotationsByLoc, tmxAnnotationsByIds, \
+                            filterKey, totalCounter, dict(), deletedEVENTStatistics, repairSyntax)
+        recordTlinkAgreementsOnFile(file, annotators, document.getTLINKAnnotations(), \
+                                    eventAnnotationsByIds, totalCounter)
+        processedFiles.append( file )
+        print()
+    return processedFiles
+
+
+def mergeDeletionStatistics(deletedEVENTStatistics, statistics):
+    for annotator in statistics:
+        if (annotator not in deletedEVENTStatistics):
+            deletedEVENTStatistics[annotator] = dict()
+        for key in statistics[annotator]:
+            if (key not in deletedEVENTStatistics[annotator]):
+                deletedEVENTStatistics[annotator][key] = 0
+            deletedEVENTStatistics[annotator][key] += statistics[annotator][key]
+
+
+# =========================================================================
+#    Main program : load corpus from files, apply the filtering method, 
+#    find agreements on remaining annotations, aggregate and display the 
+#    results 
+# =========================================================================
+
+def main(argv):
+    filterKey = defaultFilterKey
+    if len(argv) > 1 and data_import.isCorpusLocation(argv[1]):
+        corpusDir = argv[1]
+        jobs = 1
+        streaming = False
+        repairSyntax = False
+        useCache = True
+        if (len(argv) > 2):
+            for i in range(2, len(argv)):
+                if (re.match("^[0-9]+\*?[a-z]$", argv[i])):
+                    filterKey = argv[i]
+                    print (" Using the filtering method: "+filterKey)
+                elif (argv[i] == "--jobs" and i + 1 < len(argv)):
+                    jobs = int(argv[i + 1])
+                elif (argv[i] == "--stream"):
+                    streaming = True
+                elif (argv[i] == "--repair-syntax"):
+                    repairSyntax = True
+                elif (argv[i] == "--no-cache"):
+                    useCache = False
+        if streaming and (jobs > 1 or corpus_columnar.isColumnarCorpus(corpusDir)):
+            raise Exception(" The option --stream requires the corpus layer files and cannot be used with --jobs.")
+
+        #  Results of the same experiment on the same corpus (and by the same 
+        #  code) are taken from the disk cache
+        cache = None
+        cachedCounters = None
+        if useCache:
+            cache = disk_cache.getCorpusCache(corpusDir)
+            cacheInputs = [ data_import.hashCorpusLayers(corpusDir), filterKey, repairSyntax ]
+            filteredKey = cache.makeKey( cacheInputs, disk_cache.getCodeVersion(*filteringCodeModules) )
+            countersKey = cache.makeKey( cacheInputs, disk_cache.getCodeVersion(*countersCodeModules) )
+            cachedCounters = cache.get("counters", countersKey)
+
+        if cachedCounters is not None:
+            (processedFiles, deletedEVENTStatistics, totalCounter) = cachedCounters
+            for file in processedFiles:
+                print (" Processing "+file+" ... ")
+        elif streaming:
+            totalCounter = ia_agreements.AggregateCounter() # Results over all files
+            deletedEVENTStatistics = dict()
+            #  Pass the documents one by one through the whole pipeline
+            processedFiles = processCorpusStreaming(corpusDir, filterKey, totalCounter, \
+                                                    deletedEVENTStatistics, repairSyntax)
+        else:
+            totalCounter = ia_agreements.AggregateCounter() # Results over all files
+            deletedEVENTStatistics = dict()
+            #  Load base segmentation, morphological and syntactic annotations, and
+            #  EVENT, TIMEX and TLINK annotations of all annotators (layers are 
+            #  loaded from the disk cache, if these are up to date) ...
+            #  NB! The filtering modifies the loaded annotations in place;
+            corpus = Corpus(corpusDir, useCache = useCache, jobs = jobs)
+            # (layers missing from the cache are parsed by jobs workers)
+            corpus.loadLayers( data_import.getCorpusLayerFiles() )
+            baseAnnotations = corpus.base
+            eventAnnotationsByLoc, eventAnnotationsByIds, \
+            tmxAnnotationsByLoc, tmxAnnotationsByIds = corpus.getEntityAnnotations()
+            eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks = corpus.getTLINKAnnotations()
+            #print(len(eventTimexLinks), len(eventDCTLinks), len(mainEventLinks), len(subEventLinks))
+
+            # Names of all corpus files
+            allFiles = list(eventAnnotationsByIds['j'].keys())
+            processedFiles = sorted(allFiles)
+
+            # Filtered events of an earlier run: fileName -> annotator -> EntityTable
+            filteredTables = None
+            if cache is not None:
+                cachedFiltered = cache.get("filtered", filteredKey)
+                if cachedFiltered is not None:
+                    (filteredTables, deletedEVENTStatistics) = cachedFiltered
+                    jobs = 1
+            allTrees = None
+            if filteredTables is None and jobs == 1:
+                allTrees = corpus.getDependencyTrees( repairSyntax )
+
+            # Iterate over all files, filter and calculate IA agreements on entities
+            results = []
+            deletedAnnotationsByLoc   = dict()
+            remainingEventAnnotations = dict()
+            fileToAnnotators          = dict()
+            for file in allFiles:
+                fileToAnnotators[file] = [annotator for annotator in eventAnnotationsByIds \
+                                          if file in eventAnnotationsByIds[annotator]]
+            workerResults = None
+            if jobs > 1:
+                #  Fan the files out over worker processes, which read the corpus
+                #  from a shared memory segment (instead of getting its copy)
+                from concurrent.futures import ProcessPoolExecutor
+                shared = corpus_shm.publishCorpus( baseAnnotations, \
+                            { "event" : eventAnnotationsByLoc, "timex" : tmxAnnotationsByLoc }, \
+                            { data_import.tlinkEventTimexFile : eventTimexLinks, \
+                              data_import.tlinkEventDCTFile   : eventDCTLinks, \
+                              data_import.tlinkMainEventsFile : mainEventLinks, \
+                              data_import.tlinkSubEventsFile  : subEventLinks } )
+                executor = ProcessPoolExecutor(jobs, initializer=corpus_shm.attachWorker, \
+                                               initargs=(shared.descriptor,))
+                tasks = [ (file, fileToAnnotators[file], filterKey, repairSyntax) for file in sorted(allFiles) \
+                          if len(fileToAnnotators[file]) >= 3 ]
+                workerResults = executor.map(filterAndRecordFileInWorker, tasks, chunksize=4)
+            try:
+                for file in sorted(allFiles):
+                    print (" Processing "+file+" ... ", end="")
+                    annotators = fileToAnnotators[file]
+                    if (len(annotators) < 3):
+                        raise Exception(" Too few annotators for the file "+file+" "+str(len(annotators)))
+                    if workerResults is None:
+                        filterAndRecordFile(file, annotators, baseAnnotations[file], eventAnnotationsByLoc, \
+                                            eventAnnotationsByIds, tmxAnnotationsByLoc, tmxAnnotationsByIds, \
+                                            filterKey, totalCounter, deletedAnnotationsByLoc, deletedEVENTStatistics, \
+                                            repairSyntax, sentTrees = allTrees[file] if allTrees else None, \
+                                            filteredTables = filteredTables[file] if filteredTables else None)
+                    else:
+                        (counter, statistics, eventTables) = next(workerResults)
+                        totalCounter.merge( counter )
+                        mergeDeletionStatistics( deletedEVENTStatistics, statistics )
+                        # Replace the events of the file with the filtered ones
+                        for annotator in eventTables:
+                            eventAnnotationsByLoc[annotator][file] = EntityLocView( eventTables[annotator] )
+                            eventAnnotationsByIds[annotator][file] = EntityIDView( eventTables[annotator] )
+                    print()
+            finally:
+                if workerResults is not None:
+                    executor.shutdown()
+                    shared.unlink()
+            if cache is not None and filteredTables is None:
+                filteredTables = dict()
+                for file in allFiles:
+                    filteredTables[file] = dict( (annotator, eventAnnotationsByLoc[annotator][file].table) \
+                                                 for annotator in fileToAnnotators[file] )
+                cache.put("filtered", filteredKey, (filteredTables, deletedEVENTStatistics))
+
+        # Some debug information 
+        totalEventsByID   = 0
+        deletedEventsByID = 0
+        for annotator in deletedEVENTStatistics:
+            totalEventsByID   += deletedEVENTStatistics[annotator]["_all_IDs"]
+            deletedEventsByID += deletedEVENTStatistics[annotator]["_del_IDs"]
+        print ('  Events deleted (counting IDs):       ',deletedEventsByID,'/',totalEventsByID)
+        print ('  Judge events deleted (counting IDs): ',deletedEVENTStatistics[judge]["_del_IDs"],'/',deletedEVENTStatistics[judge]["_all_IDs"])    
+
+
+        if cachedCounters is None and not streaming:
+            recordTLINKCounts(eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks,\
+                              "_all", totalCounter, judge)
+            # Filter out tlinks based on deleted events
+            filtering_utils.filterOutDeletedRelations(eventTimexLinks, eventDCTLinks, mainEventLinks, \
+                                                      subEventLinks, eventAnnotationsByIds, judge)
+            recordTLINKCounts(eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks,\
+                              "_remain", totalCounter, judge)
+        # Find tlink annotation agreements on the set of remaining relations
+        # (in the streaming mode, these were already recorded file by file)
+        print (" Recording relation annotation agreements:")
+        if cachedCounters is None and not streaming:
+            recordTlinkAnnotationAgreements(eventTimexLinks, eventDCTLinks, mainEventLinks, \
+                                            subEventLinks, judge, totalCounter, fileToAnnotators)
+        if cache is not None and cachedCounters is None:
+            cache.put("counters", countersKey, (processedFiles, deletedEVENTStatistics, totalCounter))
+
+        print ()
+        print (("="*30))
+        print (" Results over all files ("+filterKey+")")
+        print (("="*30))
+
+        ia_agreements.aggregateAndPrintFilteringResults( \
+            totalCounter, filterKey, judge = judge, onlyTlinkBase = True)
+
+    else:
+        print(" Please give arguments: <corpus_dir> <experimentID> [--jobs N | --stream] [--repair-syntax] [--no-cache]")
+        print(" Example:\n     python  "+argv[0]+"  corpus 1a")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
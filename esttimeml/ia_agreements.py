@@ -12,7 +12,7 @@
 import sys, os, re
 from math import fsum
 
-import ia_agreements_chance_corrected
+from . import ia_agreements_chance_corrected
 
 class AggregateCounter:
     'An aggregate counter for recording different aspects of annotation.'
@@ -41,6 +41,14 @@ class AggregateCounter:
     def getCounts(self):
         return self.results
 
+    #  Adds all the counts of the other counter to this counter (e.g. 
+    # counts recorded on a single file in a worker process)
+    def merge(self, other):
+        for task in other.results:
+            for pair in other.results[task]:
+                for item in other.results[task][pair]:
+                    self.addToCount(task, pair, item, other.results[task][pair][item])
+
     #  Gets sorted pairs of given task. If judge name is defined,
     # all the pairs with the judge are added at the end of the list,
     # regardless the alphabetical sorting order
@@ -685,9 +693,11 @@ def record_tlinks_matches(allRelations, layer, rel_merging, counter, fileToAnnot
         given layer, and records the counts (matches and mismatches) into the 
         counter.
         Assumes that allRelations is a dict, where annotator names are the keys
-        and values are lists of corresponding tlink annotations, and each list 
-        has elements with the structure:
-            [file, entityA, relation, entityB, comment]
+        and values are the corresponding tlink layers (dicts fileName -> 
+        TLINKView, as returned by the loaders of data_import). Relations of a 
+        file are taken in the order of get_relation_annotations_as_list(), 
+        and are matched by the integer IDs of their entities (so the layers of
+        a file must share the EntityIDTable of the file, as the loaders do);
         
         If applyCommCorrect=True, then the method attempts to detect cases
         where the annotators have switched the entities (e.g. "A BEFORE B" vs
@@ -696,13 +706,25 @@ def record_tlinks_matches(allRelations, layer, rel_merging, counter, fileToAnnot
         to have only a minor effect on the overall results);
     '''
     allPairs = getAnnotatorPairs( ['a','b','c','j'] )
-    # Divide relations into groups by files
+    # Divide relations into groups by files; each relation is recorded as
+    #     [annotator, entityA, relation, entityB, pairKey]
+    # where entityA and entityB are integer IDs, and pairKey is an integer key
+    # of the entity pair (independent of the order of the entities)
     fileToRels       = dict()
+    fileToIDs        = dict()
     for annotator in allRelations:
-        for [file, entityA, relation, entityB, comment] in allRelations[annotator]:
-            if file not in fileToRels:
-                fileToRels[file] = []
-            fileToRels[file].append( [annotator, entityA, relation, entityB, comment] )
+        for file in allRelations[annotator]:
+            graph = allRelations[annotator][file].graph
+            if file not in fileToIDs:
+                fileToIDs[file] = graph.ids
+            elif graph.ids is not fileToIDs[file]:
+                raise Exception(" TLINK layers of "+file+" do not share the entity ID table.")
+            for i in graph.getEdgesByEntities():
+                (idA, idB) = graph.getEndpoints(i)
+                if file not in fileToRels:
+                    fileToRels[file] = []
+                fileToRels[file].append( [annotator, idA, graph.edges[i][1], idB, \
+                                          (min(idA, idB) << 32) | max(idA, idB)] )
     # Count agreements for each annotator pair
     for (a, b) in allPairs:
         pair = a+" vs "+b
@@ -711,63 +733,61 @@ def record_tlinks_matches(allRelations, layer, rel_merging, counter, fileToAnnot
                 #  If one of the annotators was not tasked to annotate the file,
                 #  skip the counting on that file;
                 continue
-            for i in range(len(fileToRels[file])):
-                relation1 = fileToRels[file][i]
+            #  Relations of the other annotator by their entity pairs (the 
+            #  first relation of each entity pair is matched)
+            relationsOfB = dict()
+            for relation in fileToRels[file]:
+                if relation[0] == b and relation[4] not in relationsOfB:
+                    relationsOfB[relation[4]] = relation
+            for relation1 in fileToRels[file]:
                 if (relation1[0] == a):
                     counter.addToCount("tlink-"+layer+"-find", pair, "all_in_ref", 1)
                 if (relation1[0] == b):
                     counter.addToCount("tlink-"+layer+"-find", pair, "all_in_sug", 1)
-                keyList1 = sorted([ relation1[1], relation1[3] ])
-                key1 = keyList1[0]+"_"+keyList1[1]
                 if relation1[0] == a:
                     # Find whether we have a matching relation from the other annotator
-                    for j in range(len(fileToRels[file])):
-                        relation2 = fileToRels[file][j]
-                        if relation2[0] == b:
-                            keyList2 = sorted([ relation2[1], relation2[3] ])
-                            key2 = keyList2[0]+"_"+keyList2[1]
-                            if (key1 == key2):
-                                #
-                                # Entities of both relations are matching, so we know
-                                # that at least both annotators draw a relation in
-                                # that place
-                                #
-                                counter.addToCount("tlink-"+layer+"-find", pair, "correct", 1)
-                                counter.addToCount("tlink-"+layer+"-rel_match-"+rel_merging, pair, "all", 1)
+                    relation2 = relationsOfB.get( relation1[4] )
+                    if relation2 is not None:
+                        #
+                        # Entities of both relations are matching, so we know
+                        # that at least both annotators draw a relation in
+                        # that place
+                        #
+                        counter.addToCount("tlink-"+layer+"-find", pair, "correct", 1)
+                        counter.addToCount("tlink-"+layer+"-rel_match-"+rel_merging, pair, "all", 1)
 
-                                # The next question is: whether the relation type is also
-                                # matching?
-                                relType1 = relation1[2]
-                                relType2 = relation2[2]
-                                if relation1[1] != relation2[1] and applyCommCorrect:
-                                    #
-                                    #   The order of the entities is different, i.e.
-                                    #   we have the case:
-                                    #        A relation1 B     vs     B relation2 A
-                                    #   Attempt to make some corrections, if relation1
-                                    #   and relation2 represent clear opposite relations
-                                    #   (e.g.    A AFTER B     vs     B BEFORE A   );
-                                    #
-                                    (relType1, relType2) = \
-                                        makeCommCorrection(relType1, relType2)
-                                    #
-                                    #    NB! Some of the cases remain uncorrected, e.g. 
-                                    #       A BEFORE-OR-OVERLAP B   vs   B AFTER A
-                                    #
-                                
-                                #
-                                #   If required (specified in rel_merging), try to merge 
-                                #  semantically similar relations;
-                                #
-                                relType1 = mergeRelation(relType1, rel_merging)
-                                relType2 = mergeRelation(relType2, rel_merging)
+                        # The next question is: whether the relation type is also
+                        # matching?
+                        relType1 = relation1[2]
+                        relType2 = relation2[2]
+                        if relation1[1] != relation2[1] and applyCommCorrect:
+                            #
+                            #   The order of the entities is different, i.e.
+                            #   we have the case:
+                            #        A relation1 B     vs     B relation2 A
+                            #   Attempt to make some corrections, if relation1
+                            #   and relation2 represent clear opposite relations
+                            #   (e.g.    A AFTER B     vs     B BEFORE A   );
+                            #
+                            (relType1, relType2) = \
+                                makeCommCorrection(relType1, relType2)
+                            #
+                            #    NB! Some of the cases remain uncorrected, e.g. 
+                            #       A BEFORE-OR-OVERLAP B   vs   B AFTER A
+                            #
+                        
+                        #
+                        #   If required (specified in rel_merging), try to merge 
+                        #  semantically similar relations;
+                        #
+                        relType1 = mergeRelation(relType1, rel_merging)
+                        relType2 = mergeRelation(relType2, rel_merging)
 
-                                ia_agreements_chance_corrected.update_contingency_table( \
-                                    a, b, relType1, relType2, counter, \
-                                    "tlink-"+layer+"-rel_match-"+rel_merging, pair)
-                                if (relType1 == relType2):
-                                    counter.addToCount("tlink-"+layer+"-rel_match-"+rel_merging, pair, "agree", 1)
-                                break
+                        ia_agreements_chance_corrected.update_contingency_table( \
+                            a, b, relType1, relType2, counter, \
+                            "tlink-"+layer+"-rel_match-"+rel_merging, pair)
+                        if (relType1 == relType2):
+                            counter.addToCount("tlink-"+layer+"-rel_match-"+rel_merging, pair, "agree", 1)
 
 
 # ============================================================
@@ -0,0 +1,429 @@
+# -*- coding: utf-8 -*- 
+#
+#   Developed and tested under Python's version: 3.3.2
+#
+#    Script for reading and displaying Estonian TimeML corpus annotations;
+#
+
+import sys, io
+
+# Corpus loading methods are shared with the IAA experiment tools
+from . import data_import
+from . import corpus_columnar
+from .corpus import Corpus
+from .document_index import DocumentIndex
+from . import document_export
+
+# =========================================================================
+#    Rendering sentences
+# =========================================================================
+
+def renderSentence(sentID, tokens):
+    ''' Renders the sentence with entity tags (tokens as returned by
+        getEntitySpans()); '''
+    parts = [ " s"+str(sentID)+" " ]
+    for (token, openedIDs, closedCount) in tokens:
+        for entityID in openedIDs:
+            parts.append( " ["+entityID )
+        parts.append( " "+token )
+        if closedCount:
+            parts.append( " ]"*closedCount )
+    return "".join(parts)
+
+# =========================================================================
+#    Displaying annotations on corpus files
+# =========================================================================
+def display(base, eventsByLoc, timexesByLoc, eventsByID, timexesByID, \
+            DCTsByFile, eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks, out = None):
+    for file in sorted(base):
+        displayFile(file, base, eventsByLoc, timexesByLoc, eventsByID, timexesByID, \
+                    DCTsByFile, eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks, out)
+
+
+def displayStreaming(corpusDir, out = None, outputFormat = "text"):
+    ''' Displays the annotations of the judge, reading the corpus document by
+        document (see data_import.iterateDocuments()); only the layers of the
+        judge are read. If the outputFormat is "jsonl" or "html", documents
+        are rendered in that format, and written by out.writeDocument() (see
+        document_export.py); '''
+    for bundle in Corpus(corpusDir).iterateDocuments(annotators = ['j']):
+        if outputFormat == "text":
+            displayFile(bundle.file, bundle.baseAnnotations, \
+                        bundle.eventAnnotationsByLoc['j'], bundle.tmxAnnotationsByLoc['j'], \
+                        bundle.eventAnnotationsByIds['j'], bundle.tmxAnnotationsByIds['j'], \
+                        bundle.DCTsByFile, bundle.eventTimexLinks['j'], bundle.eventDCTLinks['j'], \
+                        bundle.mainEventLinks['j'], bundle.subEventLinks['j'], out)
+        else:
+            out.writeDocument( bundle.file, renderBundle(bundle, outputFormat) )
+
+
+def renderBundle(bundle, outputFormat = "text"):
+    ''' Renders the annotations of the judge on the document (a DocumentBundle)
+        in the given output format (see document_export.exportFormats).
+        Returns the rendered text; '''
+    file = bundle.file
+    index = DocumentIndex(file, bundle.baseAnnotations, \
+                          bundle.eventAnnotationsByLoc['j'], bundle.tmxAnnotationsByLoc['j'], \
+                          bundle.eventAnnotationsByIds['j'], bundle.tmxAnnotationsByIds['j'], \
+                          bundle.eventTimexLinks['j'], bundle.eventDCTLinks['j'], \
+                          bundle.mainEventLinks['j'], bundle.subEventLinks['j'])
+    if outputFormat == "jsonl":
+        return document_export.renderJSONLines(index, bundle.baseAnnotations[file], \
+                                               bundle.DCTsByFile[file])
+    if outputFormat == "html":
+        return document_export.renderHTMLPage(index, bundle.DCTsByFile[file])
+    lines = renderIndex(index, bundle.DCTsByFile[file], range(len(index.sentences)))
+    return "\n".join(lines)+"\n"
+
+
+def renderRawDocument(rawDocument, outputFormat = "text"):
+    ''' Parses and renders a document (as yielded by
+        data_import.iterateRawDocuments()) in a worker process. Returns a
+        pair (file, rendered text); '''
+    bundle = data_import.parseRawDocument(rawDocument)
+    return (bundle.file, renderBundle(bundle, outputFormat))
+
+
+def displayParallel(corpusDir, jobs, out = None, outputFormat = "text"):
+    ''' Same as displayStreaming(), but the documents are parsed and rendered
+        in a pool of worker processes. The main process reads the layers
+        document by document, and writes the rendered documents in the order
+        of the corpus (the output is the same as in displayStreaming()); at
+        most a few documents per worker are in progress at a time; '''
+    from concurrent.futures import ProcessPoolExecutor
+    from collections import deque
+    if out is None:
+        out = getOutputWriter()
+    def writeDocument(future):
+        (file, text) = future.result()
+        if outputFormat == "text":
+            out.write( text )
+        else:
+            out.writeDocument( file, text )
+    executor = ProcessPoolExecutor(jobs)
+    pending  = deque()
+    try:
+        for rawDocument in data_import.iterateRawDocuments(corpusDir, annotators = ['j']):
+            pending.append( executor.submit(renderRawDocument, rawDocument, outputFormat) )
+            if len(pending) >= jobs * 4:
+                writeDocument( pending.popleft() )
+        while pending:
+            writeDocument( pending.popleft() )
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown()
+
+
+def renderLink(index, link):
+    ''' Renders a TLINK (as listed by DocumentIndex.getLinks()); '''
+    (layer, entityA, relation, entityB, comment) = link
+    exprA = index.getExpression(entityA)
+    if layer == data_import.tlinkEventDCTFile:
+        return " "*5+entityA+" "+exprA+"  "+relation+"  "+"DCT"+" "+comment
+    exprB = index.getExpression(entityB, isTimex = (layer == data_import.tlinkEventTimexFile))
+    return " "*5+entityA+" "+exprA+"  "+relation+"  "+entityB+" "+exprB+" "+comment
+
+
+def renderFile(file, base, eventsByLoc, timexesByLoc, eventsByID, timexesByID, \
+               DCTsByFile, eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks):
+    ''' Renders annotations of the file. Returns a list of output lines; '''
+    index = DocumentIndex(file, base, eventsByLoc, timexesByLoc, eventsByID, timexesByID, \
+                          eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks)
+    return renderIndex(index, DCTsByFile[file], range(len(index.sentences)))
+
+
+def renderIndex(index, DCT, positions, selectedLinks = None):
+    ''' Renders the sentences of the DocumentIndex, labelling them with the
+        given positions (in the document). If selectedLinks is given, only
+        the TLINKs in selectedLinks are listed. Returns a list of output
+        lines; '''
+    # Link lines of each event are rendered only once
+    linkLines = dict( (eventID, [ renderLink(index, link) for link in index.getLinks(eventID) \
+                                  if selectedLinks is None or link in selectedLinks ]) \
+                      for eventID in index.links )
+    lines = [ "="*50, " "*5 + index.file, " "*5 + " DCT: "+DCT, "="*50 ]
+    for (sentID, (tokens, eventIDs, timexIDs)) in zip(positions, index.sentences):
+        # Sentence annotation
+        lines.append( renderSentence(sentID, tokens) )
+        # Relation annotations
+        sentenceLinks = []
+        for eventID in eventIDs:
+            sentenceLinks.extend( linkLines[eventID] )
+        if sentenceLinks:
+            sentenceLinks[-1] += "\n"
+            lines.extend( sentenceLinks )
+    lines.append( "" )
+    return lines
+
+
+def displayFile(file, base, eventsByLoc, timexesByLoc, eventsByID, timexesByID, \
+                DCTsByFile, eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks, out = None):
+    ''' Writes annotations of the file into out (by default, into the UTF-8
+        writer of the standard output, see getOutputWriter()); '''
+    if out is None:
+        out = getOutputWriter()
+    lines = renderFile(file, base, eventsByLoc, timexesByLoc, eventsByID, timexesByID, \
+                       DCTsByFile, eventTimexLinks, eventDCTLinks, mainEventLinks, subEventLinks)
+    out.write( "\n".join(lines)+"\n" )
+
+
+# =========================================================================
+#    Querying selected documents, sentences and entities
+# =========================================================================
+
+def parseSentenceRange(selector):
+    ''' Parses a range of sentence positions "A-B" (or a single position "A")
+        into a pair (first, last); '''
+    items = selector.split("-")
+    if len(items) == 1:
+        return (int(items[0]), int(items[0]))
+    if len(items) == 2:
+        return (int(items[0]), int(items[1]))
+    raise Exception(" Unexpected sentence range: "+selector)
+
+
+def getEntityLocations(bundle, file, entityID):
+    ''' Returns sentence_ID-s of the tokens of the EVENT or TIMEX (of the
+        judge) with the given ID; '''
+    for entitiesByID in [ bundle.eventAnnotationsByIds['j'], bundle.tmxAnnotationsByIds['j'] ]:
+        if file in entitiesByID and entityID in entitiesByID[file]:
+            # [sentenceID, wordID, expression, annotation]
+            return [ item[0] for item in entitiesByID[file][entityID] ]
+    raise Exception(" Unknown entity "+entityID+" in the file "+file)
+
+
+def getNeighbourhood(bundle, file, entityID, depth):
+    ''' Finds the TLINK neighbourhood of the entity: entities reachable from
+        the entity by at most depth TLINKs (of the judge, in any direction).
+        Relations to the DCT are included, but are not followed further.
+        Returns a pair (entityIDs, links), where links is a set of the
+        traversed TLINKs (in the format of DocumentIndex.getLinks()); '''
+    layerLinks = [ (data_import.tlinkEventTimexFile, bundle.eventTimexLinks['j'].get(file)), \
+                   (data_import.tlinkEventDCTFile,   bundle.eventDCTLinks['j'].get(file)), \
+                   (data_import.tlinkSubEventsFile,  bundle.subEventLinks['j'].get(file)), \
+                   (data_import.tlinkMainEventsFile, bundle.mainEventLinks['j'].get(file)) ]
+    visited  = set([ entityID ])
+    links    = set()
+    frontier = [ entityID ]
+    for level in range(depth):
+        nextFrontier = []
+        for currentID in frontier:
+            for (layer, fileLinks) in layerLinks:
+                if fileLinks is None or currentID not in fileLinks:
+                    continue
+                # Links are listed under both entities
+                for [entityA, relation, entityB, comment] in fileLinks[currentID]:
+                    links.add( (layer, entityA, relation, entityB, comment) )
+                    if layer == data_import.tlinkEventDCTFile:
+                        continue
+                    for otherID in [ entityA, entityB ]:
+                        if otherID not in visited:
+                            visited.add( otherID )
+                            nextFrontier.append( otherID )
+        frontier = nextFrontier
+    return (visited, links)
+
+
+def selectPage(items, page, pageSize):
+    ''' Returns the items of the page (numbered from 1), and the footer line
+        describing the page; '''
+    pageCount = max(1, (len(items) + pageSize - 1) // pageSize)
+    if page < 1 or page > pageCount:
+        raise Exception(" Page "+str(page)+" is out of the range 1-"+str(pageCount))
+    first = (page - 1) * pageSize
+    selected = items[first:first + pageSize]
+    footer = " page "+str(page)+"/"+str(pageCount)+" ("+str(first + 1)+"-"+\
+             str(first + len(selected))+" of "+str(len(items))+")"
+    return (selected, footer)
+
+
+def displayQuery(corpusDir, file, sentenceRange = None, entityID = None, depth = None, \
+                 page = None, pageSize = 20, out = None):
+    ''' Displays annotations of the judge on selected sentences of a single
+        file: the sentences in the sentenceRange (a pair of positions), or
+        the sentences of the entity (entityID), or the sentences of the
+        entities in the TLINK neighbourhood of the entity (if depth is
+        given; only the traversed TLINKs are listed). By default, all
+        sentences of the file are displayed. If the page is given, only the
+        sentences on the page (of pageSize sentences) are displayed.
+        Only the lines of the requested file (and only the selected
+        sentences of the base segmentation) are decoded, using byte-offset
+        indices of the layers (see corpus_index.MappedCorpus); '''
+    from .corpus_index import MappedCorpus
+    if out is None:
+        out = getOutputWriter()
+    with MappedCorpus(corpusDir, annotators = ['j']) as corpus:
+        if file not in corpus:
+            raise Exception(" Unknown file: "+file)
+        # Layers of the document, without the base segmentation
+        bundle = corpus.getDocument(file, positions = [])
+        selectedLinks = None
+        if entityID is not None:
+            entityIDs = [ entityID ]
+            if depth is not None:
+                (entityIDs, selectedLinks) = getNeighbourhood(bundle, file, entityID, depth)
+            sentenceIDs = set()
+            for currentID in entityIDs:
+                sentenceIDs.update( getEntityLocations(bundle, file, currentID) )
+            allIDs = corpus.getSentenceIDs(file)
+            positions = [ i for i in range(len(allIDs)) if allIDs[i] in sentenceIDs ]
+        else:
+            sentenceCount = corpus.getSentenceCount(file)
+            (first, last) = sentenceRange if sentenceRange is not None else (0, sentenceCount - 1)
+            if first < 0 or last >= sentenceCount or first > last:
+                raise Exception(" Sentence range "+str(first)+"-"+str(last)+\
+                                " is out of the range of the file 0-"+str(sentenceCount - 1))
+            positions = list(range(first, last + 1))
+        footer = None
+        if page is not None:
+            (positions, footer) = selectPage(positions, page, pageSize)
+        bundle.baseAnnotations = { file : corpus.getSentences(file, positions) }
+    index = DocumentIndex(file, bundle.baseAnnotations, \
+                          bundle.eventAnnotationsByLoc['j'], bundle.tmxAnnotationsByLoc['j'], \
+                          bundle.eventAnnotationsByIds['j'], bundle.tmxAnnotationsByIds['j'], \
+                          bundle.eventTimexLinks['j'], bundle.eventDCTLinks['j'], \
+                          bundle.mainEventLinks['j'], bundle.subEventLinks['j'])
+    lines = renderIndex(index, bundle.DCTsByFile[file], positions, selectedLinks)
+    if footer is not None:
+        lines.append( footer )
+    out.write( "\n".join(lines)+"\n" )
+
+
+def displayPage(corpusDir, page, pageSize = 20, out = None):
+    ''' Displays annotations of the judge on the files of the page (of
+        pageSize files, in the order of the base segmentation); '''
+    from .corpus_index import MappedCorpus
+    if out is None:
+        out = getOutputWriter()
+    with MappedCorpus(corpusDir, annotators = ['j']) as corpus:
+        (files, footer) = selectPage(corpus.getFileNames(), page, pageSize)
+        for file in files:
+            bundle = corpus.getDocument(file)
+            displayFile(file, bundle.baseAnnotations, \
+                        bundle.eventAnnotationsByLoc['j'], bundle.tmxAnnotationsByLoc['j'], \
+                        bundle.eventAnnotationsByIds['j'], bundle.tmxAnnotationsByIds['j'], \
+                        bundle.DCTsByFile, bundle.eventTimexLinks['j'], bundle.eventDCTLinks['j'], \
+                        bundle.mainEventLinks['j'], bundle.subEventLinks['j'], out)
+    out.write( footer+"\n" )
+
+# =========================================================================
+#    Output
+# =========================================================================
+
+_outputWriter = None
+
+def getOutputWriter(outputFile = None):
+    ''' Returns a buffered UTF-8 writer of the standard output (regardless of
+        the encoding of the console), or of the outputFile, if given; '''
+    global _outputWriter
+    if _outputWriter is None:
+        sys.stdout.flush()
+        if outputFile is not None:
+            _outputWriter = open(outputFile, mode='w', encoding="utf-8", errors="replace")
+        elif hasattr(sys.stdout, "buffer"):
+            _outputWriter = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", \
+                                             errors="replace", write_through=False)
+        else:
+            _outputWriter = sys.stdout
+    return _outputWriter
+
+def closeOutputWriter():
+    ''' Flushes the writer, and gives the standard output back; '''
+    global _outputWriter
+    if _outputWriter is not None and _outputWriter is not sys.stdout:
+        _outputWriter.flush()
+        if _outputWriter.buffer is getattr(sys.stdout, "buffer", None):
+            _outputWriter.detach()
+        else:
+            _outputWriter.close()
+    _outputWriter = None
+
+# =========================================================================
+#    Main program : loading corpus from files and displaying the content
+# =========================================================================
+
+def main(argv):
+    if len(argv) > 1 and data_import.isCorpusLocation(argv[1]):
+        corpusDir = argv[1]
+        jobs = 1
+        outputFile = None
+        (file, sentenceRange, entityID, depth) = (None, None, None, None)
+        (page, pageSize) = (None, 20)
+        outputFormat = "text"
+        for i in range(2, len(argv)):
+            if (argv[i] == "--jobs" and i + 1 < len(argv)):
+                jobs = int(argv[i + 1])
+            elif (argv[i] == "--output" and i + 1 < len(argv)):
+                outputFile = argv[i + 1]
+            elif (argv[i] == "--file" and i + 1 < len(argv)):
+                file = argv[i + 1]
+            elif (argv[i] == "--sentences" and i + 1 < len(argv)):
+                sentenceRange = parseSentenceRange(argv[i + 1])
+            elif (argv[i] == "--entity" and i + 1 < len(argv)):
+                entityID = argv[i + 1]
+            elif (argv[i] == "--neighbourhood"):
+                depth = int(argv[i + 1]) if i + 1 < len(argv) and argv[i + 1].isdigit() else 1
+            elif (argv[i] == "--page" and i + 1 < len(argv)):
+                page = int(argv[i + 1])
+            elif (argv[i] == "--page-size" and i + 1 < len(argv)):
+                pageSize = int(argv[i + 1])
+            elif (argv[i] == "--format" and i + 1 < len(argv)):
+                outputFormat = argv[i + 1]
+        if outputFormat not in document_export.exportFormats:
+            raise Exception(" Unknown output format: "+outputFormat)
+        if outputFormat == "html" and outputFile is None:
+            raise Exception(" The output format html requires an output directory (--output DIR).")
+        if outputFormat != "text" and (file is not None or page is not None):
+            raise Exception(" Selectors can only be used with the output format text.")
+        if (sentenceRange is not None or entityID is not None) and file is None:
+            raise Exception(" Selectors --sentences and --entity require the selector --file.")
+        if depth is not None and entityID is None:
+            raise Exception(" Selector --neighbourhood requires the selector --entity.")
+        if corpus_columnar.isColumnarCorpus(corpusDir) and \
+           (jobs > 1 or file is not None or page is not None):
+            raise Exception(" Options --jobs, --file and --page require the corpus layer files; "+\
+                            "a columnar corpus can only be displayed as a whole.")
+
+        if outputFormat != "text":
+            # Export the annotations document by document
+            if outputFormat == "html":
+                writer = document_export.HTMLDirectoryWriter(outputFile)
+            else:
+                writer = document_export.JSONLinesWriter(getOutputWriter(outputFile))
+            try:
+                if jobs > 1:
+                    displayParallel(corpusDir, jobs, writer, outputFormat)
+                else:
+                    displayStreaming(corpusDir, writer, outputFormat)
+                writer.close()
+            finally:
+                closeOutputWriter()
+            return
+
+        try:
+            if file is not None:
+                # Display selected sentences of a single file
+                displayQuery(corpusDir, file, sentenceRange, entityID, depth, \
+                             page, pageSize, getOutputWriter(outputFile))
+            elif page is not None:
+                # Display the files of the page
+                displayPage(corpusDir, page, pageSize, getOutputWriter(outputFile))
+            # Load and display annotations document by document
+            elif jobs > 1:
+                displayParallel(corpusDir, jobs, getOutputWriter(outputFile))
+            else:
+                displayStreaming(corpusDir, getOutputWriter(outputFile))
+        finally:
+            closeOutputWriter()
+
+    else:
+        print(" Please give arguments: <annotated_corpus_dir> [--jobs N] [--output FILE]")
+        print("     [--file FILE [--sentences A-B | --entity ID [--neighbourhood [DEPTH]]]]")
+        print("     [--page N [--page-size S]]  [--format text|jsonl|html]")
+        print(" Example:\n     python  "+argv[0]+"  corpus")
+        print("     python  "+argv[0]+"  corpus  --file aja_ml_2002_47.tasak.a014.sol  --entity e1  --neighbourhood 2")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
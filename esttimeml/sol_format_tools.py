@@ -189,7 +189,7 @@ def getClPredicateStructure(sentence, labelToFind, clbFinLabels = None):
     for j in range( len(sentence) ):
         #(token, morphSynt, label, parentLabel, anno) = lause[j]
         [sentenceID, wordID, token, morphSynt, label, parent] = sentence[j]
-        if (int(labelToFind) == int(label)):
+        if (labelToFind == label):
             i = j
             while(i > -1):
                 if (clbMatcher.match(clbFinLabels[i])):
@@ -211,7 +211,7 @@ def getClPredicateStructure(sentence, labelToFind, clbFinLabels = None):
     if (rightBound == -1 or leftBound == -1):
         tokens = [ (t[1],t[2]) for t in sentence ]
         print (tokens)
-        raise Exception(" Could not locate clause boundaries for the element with label "+label)
+        raise Exception(" Could not locate clause boundaries for the element with label "+str(label))
     # 2) Leiame predikaatstruktuuri osalausepiiride seest
     verbChainMatcher = re.compile("@(NEG|FMV|FCV|IMV|ICV)")
     verbChain = []
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+#
+#    TLINK store: relations of a single TLINK layer of a single document (of
+#   a single annotator), stored once as a flat edge array:
+#
+#       [entityA, relation, entityB, comment]
+#
+#   (entityB of a relation to DCT is 't0'), along with CSR-style adjacency:
+#   for each entity (node), the numbers of its outgoing edges (where the
+#   entity is entityA) and incoming edges (where the entity is entityB) are
+#   stored as consecutive slices of two arrays, delimited by offset arrays:
+#
+#       outEdges[ outOffsets[node] : outOffsets[node+1] ]
+#       inEdges[ inOffsets[node] : inOffsets[node+1] ]
+#
+#   Nodes are the integer IDs of the entities (see entity_table.py; the
+#   EntityIDTable is shared by all layers of the document). The graph is
+#   exposed through TLINKView, which provides the same mapping interface as
+#   the dicts that the loaders used to build:
+#
+#       TLINKView :  entityID -> [[entityA, relation, entityB, comment], ...]
+#
+#   (relations to DCT are listed only under the event). Deleting an event
+#   only flags its edges as deleted, so it costs O(degree of the event), and
+#   listing all relations of the document is O(number of edges).
+#
+#    Developed and tested under Python's version: 3.4.1
+#
+
+from array import array
+from collections.abc import Mapping
+
+from .entity_table import EntityIDTable
+
+class TLINKGraph(object):
+    ''' TLINKs of a single document, stored as an edge array with outgoing
+        and incoming adjacency in CSR form; '''
+
+    def __init__(self, toDCT = False):
+        self.toDCT   = toDCT
+        self.edges   = []
+        # Integer IDs of the entities (see entity_table.EntityIDTable), and
+        # integer IDs of the endpoints of the edges (entityA, entityB of each
+        # edge)
+        self.ids       = EntityIDTable()
+        self.endpoints = array('i')
+        # integer ID -> node number, in the order of first appearance
+        self.nodes   = dict()
+        # Entities listed by the view (integer ID -> None), in the order of
+        # first appearance; relations to DCT are listed only under the event
+        self.keys    = dict()
+        self.deleted = bytearray()
+        self.outOffsets = None
+        self.outEdges   = None
+        self.inOffsets  = None
+        self.inEdges    = None
+
+    def addEdge(self, entityA, relation, entityB, comment):
+        self.edges.append( [entityA, relation, entityB, comment] )
+        self.deleted.append( 0 )
+        intA = self.ids.add(entityA)
+        intB = self.ids.add(entityB)
+        self.endpoints.append( intA )
+        self.endpoints.append( intB )
+        nodes = self.nodes
+        if intA not in nodes:
+            nodes[intA] = len(nodes)
+            self.keys[intA] = None
+        if intB not in nodes:
+            nodes[intB] = len(nodes)
+            if not self.toDCT:
+                self.keys[intB] = None
+        self.outOffsets = None
+
+    def setEntityIDs(self, ids):
+        ''' Renumbers the entities with the integer IDs of the given
+            EntityIDTable (the table shared by all layers of the document); '''
+        if ids is self.ids:
+            return
+        remap = [ ids.add(entityID) for entityID in self.ids.strings ]
+        self.endpoints = array('i', [ remap[intID] for intID in self.endpoints ])
+        self.nodes = dict( (remap[intID], node) for (intID, node) in self.nodes.items() )
+        self.keys  = dict( (remap[intID], None) for intID in self.keys )
+        self.ids   = ids
+
+    def getEndpoints(self, i):
+        ''' Returns integer IDs of the entities (entityA, entityB) of the edge; '''
+        return (self.endpoints[2*i], self.endpoints[2*i + 1])
+
+    def _buildAdjacency(self):
+        nodes = self.nodes
+        endpoints = self.endpoints
+        edgeCount = len(self.edges)
+        nodeCount = len(nodes)
+        for (endpoint, offsetsAttr, edgesAttr) in [ (0, 'outOffsets', 'outEdges'), \
+                                                    (1, 'inOffsets',  'inEdges') ]:
+            endpointNodes = [ nodes[endpoints[2*i + endpoint]] for i in range(edgeCount) ]
+            offsets = array('i', [0]) * (nodeCount + 1)
+            for node in endpointNodes:
+                offsets[node + 1] += 1
+            for node in range(nodeCount):
+                offsets[node + 1] += offsets[node]
+            position = array('i', offsets[:nodeCount])
+            adjacent = array('i', [0]) * edgeCount
+            # Edges are filled in in their order, so each slice is sorted
+            for i in range(edgeCount):
+                node = endpointNodes[i]
+                adjacent[ position[node] ] = i
+                position[node] += 1
+            setattr(self, edgesAttr, adjacent)
+            setattr(self, offsetsAttr, offsets)
+
+    def getEdgesOf(self, intID, incoming = True):
+        ''' Returns numbers of the (non-deleted) edges involving the entity, in
+            the order of the layer; a relation of the entity to itself is
+            listed twice (as the dict-of-lists did); '''
+        node = self.nodes.get(intID)
+        if node is None:
+            return []
+        if self.outOffsets is None:
+            self._buildAdjacency()
+        edgeNumbers = list( self.outEdges[ self.outOffsets[node] : self.outOffsets[node+1] ] )
+        if incoming:
+            edgeNumbers.extend( self.inEdges[ self.inOffsets[node] : self.inOffsets[node+1] ] )
+            # Merging two sorted runs
+            edgeNumbers.sort()
+        deleted = self.deleted
+        return [ i for i in edgeNumbers if not deleted[i] ]
+
+    def getRelationsOf(self, intID):
+        ''' Returns the relations listed under the entity; '''
+        edges = self.edges
+        return [ edges[i] for i in self.getEdgesOf(intID, incoming = not self.toDCT) ]
+
+    def getRelations(self):
+        ''' Returns all (non-deleted) relations, in the order of the layer; '''
+        deleted = self.deleted
+        return [ edge for (i, edge) in enumerate(self.edges) if not deleted[i] ]
+
+    def getEdgesByEntities(self):
+        ''' Returns numbers of all (non-deleted) edges without duplicate
+            relations, in the order in which they are met when walking through
+            the relations of the listed entities (the order of
+            get_relation_annotations_as_list);
+        '''
+        edges = self.edges
+        edgeNumbers = []
+        seen = set()
+        for intID in self.keys:
+            for i in self.getEdgesOf(intID, incoming = not self.toDCT):
+                key = tuple(edges[i])
+                if key not in seen:
+                    seen.add( key )
+                    edgeNumbers.append( i )
+        return edgeNumbers
+
+    def getRelationsByEntities(self):
+        ''' Returns the relations of getEdgesByEntities(); '''
+        edges = self.edges
+        return [ edges[i] for i in self.getEdgesByEntities() ]
+
+    # =======================================================
+    #    Deletion
+    # =======================================================
+
+    def deleteKey(self, intID):
+        ''' Removes the entity from the entities listed by the view (the
+            relations themselves are kept); '''
+        del self.keys[intID]
+
+    def deleteRelationsOf(self, intID):
+        ''' Flags all relations involving the entity as deleted; '''
+        for i in self.getEdgesOf(intID):
+            self.deleted[i] = 1
+
+    def deleteEntity(self, intID):
+        ''' Removes the entity from the listed entities, and deletes all
+            relations involving it; '''
+        if intID in self.keys:
+            self.deleteKey(intID)
+        self.deleteRelationsOf(intID)
+
+
+class TLINKView(Mapping):
+    ''' Entity view of the graph: entityID -> list of
+        [entityA, relation, entityB, comment]; '''
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def _getIntID(self, entityID):
+        intID = self.graph.ids.toInt(entityID)
+        if intID is None or intID not in self.graph.keys:
+            raise KeyError(entityID)
+        return intID
+
+    def __getitem__(self, entityID):
+        return self.graph.getRelationsOf( self._getIntID(entityID) )
+
+    def __delitem__(self, entityID):
+        self.graph.deleteKey( self._getIntID(entityID) )
+
+    def __contains__(self, entityID):
+        intID = self.graph.ids.toInt(entityID)
+        return intID is not None and intID in self.graph.keys
+
+    def __iter__(self):
+        toString = self.graph.ids.toString
+        return iter( [ toString(intID) for intID in self.graph.keys ] )
+
+    def __len__(self):
+        return len(self.graph.keys)
+
+    def __repr__(self):
+        return repr( dict(self.items()) )
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+#
+#    Runs the script benchmark_loading of the package esttimeml (see
+#   esttimeml/benchmark_loading.py for the usage), so that it can be executed
+#   from this directory without installing the package;
+#
+
+import sys, os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from esttimeml import benchmark_loading
+
+if __name__ == "__main__":
+    benchmark_loading.main(sys.argv)
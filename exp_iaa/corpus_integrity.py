@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+#
+#    Runs the script corpus_integrity of the package esttimeml (see
+#   esttimeml/corpus_integrity.py for the usage), so that it can be executed
+#   from this directory without installing the package;
+#
+
+import sys, os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from esttimeml import corpus_integrity
+
+if __name__ == "__main__":
+    corpus_integrity.main(sys.argv)
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+#
+#    Runs the script disk_cache of the package esttimeml (see
+#   esttimeml/disk_cache.py for the usage), so that it can be executed
+#   from this directory without installing the package;
+#
+
+import sys, os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from esttimeml import disk_cache
+
+if __name__ == "__main__":
+    disk_cache.main(sys.argv)
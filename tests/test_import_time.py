@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#
+#    Import-time budget of the package esttimeml: each module is imported in
+#   a fresh interpreter (with "python -X importtime"), and its cumulative
+#   import time (best of the repeats) must stay within the budget. Also
+#   checks that importing does no work: importing the package must not
+#   import any of its submodules, importing the scripts must not run their
+#   main programs (print anything), and the modules of the package must not
+#   be registered under their own (top-level) names.
+#
+#   Usage (from the root of the repository):
+#      python  -m pytest  tests
+#
+#   Requires Python's version: 3.7 or newer (python -X importtime)
+#
+
+import sys, os, subprocess
+
+import pytest
+
+rootDir = os.path.dirname( os.path.dirname( os.path.abspath(__file__) ) )
+repeats = 5
+
+#  (statement, name of the module in the importtime output, budget in ms)
+importBudgets = [ ("import esttimeml",                        "esttimeml",                                     10), \
+                  ("import esttimeml.cli",                    "esttimeml.cli",                                 15), \
+                  ("import esttimeml.entity_table",           "esttimeml.entity_table",                        20), \
+                  ("import esttimeml.data_import",            "esttimeml.data_import",                         60), \
+                  ("import esttimeml.corpus",                 "esttimeml.corpus",                              80), \
+                  ("import esttimeml.reader",                 "esttimeml.reader",                             100), \
+                  ("import esttimeml.find_entity_annotation_agreements",   "esttimeml.find_entity_annotation_agreements",   150), \
+                  ("import esttimeml.find_combined_annotation_agreements", "esttimeml.find_combined_annotation_agreements", 200) ]
+
+def runPython(code, importTime = False):
+    ''' Runs the code in a fresh interpreter, with the repository root on
+        the path. Returns (stdout, stderr); '''
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join( [ rootDir ] + \
+                                         ([ env["PYTHONPATH"] ] if env.get("PYTHONPATH") else []) )
+    command = [ sys.executable ] + ([ "-X", "importtime" ] if importTime else []) + [ "-c", code ]
+    process = subprocess.run(command, env=env, cwd=rootDir, stdout=subprocess.PIPE, \
+                             stderr=subprocess.PIPE, universal_newlines=True)
+    if process.returncode != 0:
+        raise Exception(" Running '"+code+"' failed:\n"+process.stderr)
+    return (process.stdout, process.stderr)
+
+def getImportTime(statement, moduleName):
+    ''' Returns the cumulative import time (in ms) of the module; '''
+    (out, err) = runPython(statement, importTime = True)
+    for line in err.splitlines():
+        # import time: self [us] | cumulative | imported package
+        items = line.split("|")
+        if len(items) == 3 and items[2].strip() == moduleName:
+            return int(items[1]) / 1000.0
+    raise Exception(" Module "+moduleName+" missing from the importtime output of '"+statement+"'")
+
+def test_importingThePackageImportsNoSubmodules():
+    (out, err) = runPython("import sys, esttimeml; "+\
+                           "print(' '.join(m for m in sys.modules if m.startswith('esttimeml.')))")
+    assert out.strip() == ""
+
+def test_submodulesAreNotImportedUnderTheirOwnNames():
+    (out, err) = runPython("import sys, esttimeml, esttimeml.find_combined_annotation_agreements, esttimeml.reader; "+\
+                           "print(' '.join(m for m in esttimeml.submodules if m in sys.modules))")
+    assert out.strip() == ""
+
+@pytest.mark.parametrize("statement", [ statement for (statement, moduleName, budget) in importBudgets ])
+def test_importingPrintsNothing(statement):
+    (out, err) = runPython(statement)
+    assert out == ""
+
+@pytest.mark.parametrize("statement, moduleName, budget", importBudgets)
+def test_importTimeWithinBudget(statement, moduleName, budget):
+    best = min( getImportTime(statement, moduleName) for i in range(repeats) )
+    assert best <= budget, "'"+statement+"' took {:.1f}ms (budget {}ms)".format(best, budget)